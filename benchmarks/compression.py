@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: compression.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+"""Compares the gzip and Rice tile-compressed write modes on simulated LVM frames.
+
+Run as ``python benchmarks/compression.py --help`` for the available options. For
+each mode the script reports the time to write the file (including compression),
+the time to read the full image, the time to read only the header, and the size
+of the resulting file.
+
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+import time
+
+from typing import Callable
+
+import click
+import numpy
+from astropy.io import fits
+from lvmscp.delegate import LVMExposeDelegate
+
+from archon.actor.delegate import ExposureDelegate
+
+
+# Size of a full LVM CCD frame, including overscan.
+NROWS = 4080
+NCOLS = 4120
+
+
+def simulate_frame(flavour: str = "arc", seed: int = 42) -> numpy.ndarray:
+    """Returns a simulated LVM frame."""
+
+    rng = numpy.random.default_rng(seed)
+
+    # Bias level per quadrant and ~3 e- of read noise (gain ~2.7 e-/ADU).
+    image = numpy.empty((NROWS, NCOLS), dtype=numpy.float32)
+    half_r, half_c = NROWS // 2, NCOLS // 2
+    for ii, (rr, cc) in enumerate([(0, 0), (0, half_c), (half_r, 0), (half_r, half_c)]):
+        image[rr : rr + half_r, cc : cc + half_c] = 1000 + 20 * ii
+    image += rng.normal(0, 1.2, image.shape).astype(numpy.float32)
+
+    if flavour in ["arc", "flat"]:
+        # Fibre traces every ~6 rows with a Gaussian profile.
+        rows = numpy.arange(NROWS)[:, None]
+        centres = numpy.arange(10, NROWS - 10, 6.2)
+        profile = numpy.zeros((NROWS, 1), dtype=numpy.float32)
+        for centre in centres:
+            profile[:, 0] += numpy.exp(-0.5 * ((rows[:, 0] - centre) / 1.1) ** 2)
+
+        if flavour == "arc":
+            # A few hundred emission lines with a range of intensities.
+            spectrum = numpy.zeros(NCOLS, dtype=numpy.float32)
+            cols = numpy.arange(NCOLS)
+            for line in rng.uniform(0, NCOLS, 300):
+                amplitude = 10 ** rng.uniform(1, 4.3)
+                spectrum += amplitude * numpy.exp(-0.5 * ((cols - line) / 1.3) ** 2)
+        else:
+            spectrum = numpy.full(NCOLS, 20000, dtype=numpy.float32)
+
+        signal = profile * spectrum[None, :]
+        image += rng.poisson(numpy.clip(signal, 0, None)).astype(numpy.float32)
+
+    # Cosmic rays.
+    n_cr = 500
+    image[rng.integers(0, NROWS, n_cr), rng.integers(0, NCOLS, n_cr)] += 30000
+
+    return numpy.clip(image, 0, 65535).astype(numpy.uint16)
+
+
+def get_header() -> dict[str, list]:
+    """Returns a header with a number of cards similar to the real one."""
+
+    header: dict[str, list] = {}
+    for ii in range(300):
+        header[f"KEY{ii:04d}"] = [ii * 1.5, f"Dummy keyword {ii}"]
+
+    header["FILENAME"] = ["", "File basename"]
+    header["EXPOSURE"] = [1, "Exposure number"]
+
+    return header
+
+
+def write_gzip(fdata, path: str, write_engine: str = "astropy"):
+    """Writes the image as the default write path does (uncompressed + gzip -1)."""
+
+    if write_engine == "astropy":
+        ExposureDelegate._write_file_astropy(fdata, path)
+    else:
+        ExposureDelegate._write_file_fitsio(fdata, path)
+
+    subprocess.run(["gzip", "-1", "-f", path], check=True)
+
+    return path + ".gz"
+
+
+def write_rice(fdata, path: str, write_engine: str = "astropy"):
+    """Writes the image with Rice tile compression."""
+
+    path = path + ".fz"
+
+    if write_engine == "astropy":
+        LVMExposeDelegate._write_file_rice_astropy(fdata, path)
+    else:
+        LVMExposeDelegate._write_file_rice_fitsio(fdata, path)
+
+    return path
+
+
+def read_image(path: str) -> numpy.ndarray:
+    """Reads the image data, which may be in the primary HDU or the first extension."""
+
+    with fits.open(path) as hdul:
+        hdu = hdul[1] if len(hdul) > 1 else hdul[0]
+        return numpy.array(hdu.data)
+
+
+def read_header(path: str) -> fits.Header:
+    """Reads the header of the image HDU."""
+
+    with fits.open(path) as hdul:
+        hdu = hdul[1] if len(hdul) > 1 else hdul[0]
+        return hdu.header
+
+
+def benchmark(
+    writer: Callable,
+    fdata,
+    write_engine: str,
+    repeat: int,
+    tmpdir: str,
+) -> dict[str, float]:
+    """Runs a benchmark for a writer."""
+
+    write_times = []
+    read_times = []
+    header_times = []
+    size = 0
+
+    for nn in range(repeat):
+        base = os.path.join(tmpdir, f"bench-{nn}.fits")
+
+        t0 = time.perf_counter()
+        path = writer(fdata, base, write_engine=write_engine)
+        write_times.append(time.perf_counter() - t0)
+
+        size = os.path.getsize(path)
+
+        t0 = time.perf_counter()
+        data = read_image(path)
+        read_times.append(time.perf_counter() - t0)
+
+        if not numpy.array_equal(data, fdata["data"]):
+            raise RuntimeError(f"Data read from {path} does not match.")
+
+        t0 = time.perf_counter()
+        read_header(path)
+        header_times.append(time.perf_counter() - t0)
+
+        os.unlink(path)
+
+    return {
+        "write": float(numpy.median(write_times)),
+        "read": float(numpy.median(read_times)),
+        "header": float(numpy.median(header_times)),
+        "size": size / 1024**2,
+    }
+
+
+@click.command()
+@click.option(
+    "--flavour",
+    type=click.Choice(["bias", "arc", "flat"]),
+    default="arc",
+    show_default=True,
+    help="The type of frame to simulate.",
+)
+@click.option("--repeat", type=int, default=3, show_default=True)
+@click.option(
+    "--tmpdir",
+    type=click.Path(file_okay=False, exists=True),
+    default=None,
+    help="Directory where to write the files. Use the data disk for realistic times.",
+)
+def main(flavour: str, repeat: int, tmpdir: str | None = None):
+    """Benchmarks the gzip and Rice write modes."""
+
+    data = simulate_frame(flavour)
+    fdata = {"data": data, "header": get_header(), "ccd": "b1"}
+
+    engines = ["astropy"]
+    try:
+        import fitsio  # noqa: F401
+
+        engines.append("fitsio")
+    except ImportError:
+        pass
+
+    print(
+        f"Frame: {flavour} {data.shape} {data.dtype} ({data.nbytes / 1024**2:.1f} MB)"
+    )
+    print(
+        f"{'mode':<8} {'engine':<8} {'write [s]':>10} {'read [s]':>10} "
+        f"{'header [s]':>11} {'size [MB]':>10}"
+    )
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        for mode, writer in [("gzip", write_gzip), ("rice", write_rice)]:
+            for engine in engines:
+                result = benchmark(writer, fdata, engine, repeat, tmp)
+                print(
+                    f"{mode:<8} {engine:<8} {result['write']:>10.3f} "
+                    f"{result['read']:>10.3f} {result['header']:>11.4f} "
+                    f"{result['size']:>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
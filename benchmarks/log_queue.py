@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: log_queue.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+"""Compares writing the actor log directly and through the batching queue handler.
+
+Run as ``python benchmarks/log_queue.py --help`` for the available options. For
+each mode the script logs bursts of records from a coroutine while a ticker
+measures the event loop lag, optionally while another thread writes large files
+to the same disk to simulate the FITS writes. It reports the throughput seen by
+the caller, the time until all records are on disk, the maximum and 99th
+percentile event loop stall, and the number of dropped records.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import click
+import numpy
+from lvmscp.logs import BatchingQueueHandler
+
+
+FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def disk_writer(directory: str, stop: threading.Event, size_mb: int = 32):
+    """Writes and fsyncs large files until ``stop`` is set."""
+
+    block = os.urandom(1024 * 1024)
+    nn = 0
+
+    while not stop.is_set():
+        path = os.path.join(directory, f"load-{nn % 2}.bin")
+        with open(path, "wb") as fd:
+            for _ in range(size_mb):
+                fd.write(block)
+            fd.flush()
+            os.fsync(fd.fileno())
+        nn += 1
+
+
+async def monitor_lag(lags: list[float], interval: float = 0.001):
+    """Records the event loop lag with respect to scheduled wake-ups."""
+
+    loop = asyncio.get_running_loop()
+
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - t0 - interval))
+
+
+async def log_bursts(log: logging.Logger, n_bursts: int, burst_size: int):
+    """Logs bursts of warnings, yielding to the event loop between bursts."""
+
+    for burst in range(n_bursts):
+        for nn in range(burst_size):
+            log.warning(f"Burst {burst}: failed retrieving values for source {nn}.")
+        await asyncio.sleep(0.01)
+
+
+async def run(
+    mode: str,
+    path: str,
+    n_bursts: int,
+    burst_size: int,
+    max_size: int,
+) -> dict[str, float]:
+    """Runs the benchmark for one mode."""
+
+    log = logging.getLogger(f"benchmark.{mode}")
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(logging.Formatter(FORMAT))
+
+    queue_handler: BatchingQueueHandler | None = None
+    if mode == "queue":
+        queue_handler = BatchingQueueHandler.install(
+            log,
+            [file_handler],
+            max_size=max_size,
+        )
+    else:
+        log.addHandler(file_handler)
+
+    lags: list[float] = []
+    lag_task = asyncio.create_task(monitor_lag(lags))
+    await asyncio.sleep(0.05)
+
+    t0 = time.perf_counter()
+    await log_bursts(log, n_bursts, burst_size)
+    elapsed_caller = time.perf_counter() - t0
+
+    lag_task.cancel()
+
+    dropped = 0
+    if queue_handler is not None:
+        queue_handler.uninstall(log)
+        dropped = queue_handler.dropped
+    elapsed_total = time.perf_counter() - t0
+
+    log.removeHandler(file_handler)
+    file_handler.close()
+
+    n_records = n_bursts * burst_size
+    lags_array = numpy.array(lags) if len(lags) > 0 else numpy.zeros(1)
+
+    return {
+        "throughput": n_records / elapsed_caller,
+        "total": elapsed_total,
+        "max_stall": float(lags_array.max() * 1000),
+        "p99_stall": float(numpy.percentile(lags_array, 99) * 1000),
+        "dropped": dropped,
+    }
+
+
+@click.command()
+@click.option("--bursts", type=int, default=50, show_default=True)
+@click.option("--burst-size", type=int, default=200, show_default=True)
+@click.option("--max-size", type=int, default=10000, show_default=True)
+@click.option("--load/--no-load", default=True, help="Write large files meanwhile.")
+@click.option(
+    "--tmpdir",
+    type=click.Path(file_okay=False, exists=True),
+    default=None,
+    help="Directory for the log and load files. Use the data disk for real times.",
+)
+def main(
+    bursts: int,
+    burst_size: int,
+    max_size: int,
+    load: bool,
+    tmpdir: str | None = None,
+):
+    """Benchmarks the direct and queued file log handlers."""
+
+    print(
+        f"{'mode':<8} {'records/s':>12} {'total [s]':>10} "
+        f"{'max stall [ms]':>15} {'p99 stall [ms]':>15} {'dropped':>8}"
+    )
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        for mode in ["direct", "queue"]:
+            stop = threading.Event()
+            writer = threading.Thread(target=disk_writer, args=(tmp, stop))
+            if load:
+                writer.start()
+
+            try:
+                result = asyncio.run(
+                    run(
+                        mode,
+                        os.path.join(tmp, f"{mode}.log"),
+                        bursts,
+                        burst_size,
+                        max_size,
+                    )
+                )
+            finally:
+                stop.set()
+                if load:
+                    writer.join()
+
+            print(
+                f"{mode:<8} {result['throughput']:>12.0f} {result['total']:>10.3f} "
+                f"{result['max_stall']:>15.2f} {result['p99_stall']:>15.2f} "
+                f"{result['dropped']:>8d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: reply_validation.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+"""Compares validating the actor replies with jsonschema and the compiled validator.
+
+Run as ``python benchmarks/reply_validation.py --help`` for the available options.
+The replies are validated with the model of an actor created from the default
+configuration, as in `clu.base.BaseActor.write`. The script reports the replies
+per second when only validating and when also updating the model (as the actor
+does for each reply), for jsonschema, the compiled validator, and the compiled
+validator skipping the ``exposure_progress`` keyword.
+
+"""
+
+from __future__ import annotations
+
+import time
+
+import click
+from lvmscp.actor import SCPActor
+from lvmscp.validation import ReplyValidator
+
+
+REPLIES = [
+    {
+        "status": {
+            "controller": "sp1",
+            "status": 1,
+            "status_names": ["IDLE"],
+            "last_exposure_no": 1234,
+            "mod2/tempa": -110.1,
+            "mod2/tempb": -180.3,
+            "mod12/tempa": -109.8,
+        }
+    },
+    {
+        "exposure_progress": {
+            "phase": "integrating",
+            "elapsed": 12.3,
+            "etr": 47.7,
+            "total_time": 60.0,
+            "readout_progress": 0.0,
+            "percent": 20.5,
+        }
+    },
+    {"text": "Reading out sp1."},
+    {"filenames": ["/data/spectro/lvm/60500/sdR-s-b1-00001234.fits.gz"]},
+    {"error": {"controller": "sp1", "error": "Controller not connected."}},
+]
+
+
+def run(actor: SCPActor, validator, n_replies: int, update_model: bool) -> float:
+    """Validates the replies and returns the replies per second."""
+
+    model = actor.model
+    assert model
+
+    model.validator = validator
+
+    t0 = time.perf_counter()
+    for nn in range(n_replies):
+        result, _ = model.validate(REPLIES[nn % len(REPLIES)], update_model)
+        assert result
+
+    return n_replies / (time.perf_counter() - t0)
+
+
+@click.command()
+@click.option("--replies", type=int, default=50000, show_default=True)
+def main(replies: int):
+    """Benchmarks the reply validators."""
+
+    actor = SCPActor.from_config(None)
+    assert actor.model
+
+    schema = actor.model.schema
+    validator_class = actor.model.VALIDATOR
+
+    validators = {
+        "jsonschema": validator_class(schema),
+        "compiled": ReplyValidator(schema, validator_class),
+        "skip": ReplyValidator(schema, validator_class, skip=["exposure_progress"]),
+    }
+
+    print(
+        f"{'mode':<12} {'replies/s':>12} {'us/reply':>10} "
+        f"{'with model/s':>14} {'us/reply':>10}"
+    )
+
+    for mode, validator in validators.items():
+        rate = run(actor, validator, replies, False)
+        rate_model = run(actor, validator, replies, True)
+        print(
+            f"{mode:<12} {rate:>12.0f} {1e6 / rate:>10.2f} "
+            f"{rate_model:>14.0f} {1e6 / rate_model:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
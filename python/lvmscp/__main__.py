@@ -10,6 +10,7 @@
 
 import asyncio
 import functools
+import json
 import os
 
 import click
@@ -63,6 +64,139 @@ async def actor(ctx):
     await lvmscp_obj.run_forever()  # type: ignore
 
 
+def get_exposure_index(config_file: str | None, path: str | None = None):
+    """Returns the exposure index defined in the configuration file."""
+
+    from lvmscp.index import ExposureIndex
+
+    config = SCPActor.load_config(config_file)
+
+    index_config = config.get("index", None) or {}
+    path = path or index_config.get("path", None)
+    if path is None:
+        path = os.path.join(config["files"]["data_dir"], "lvmscp.sqlite")
+
+    return ExposureIndex(path, header_keys=index_config.get("header_keys", None))
+
+
+@lvmscp.group()
+@click.option("--path", type=click.Path(dir_okay=False), help="Path to the index.")
+@click.pass_context
+def index(ctx, path: str | None = None):
+    """Queries and updates the exposure index."""
+
+    ctx.obj["index_path"] = path
+
+
+@index.command()
+@click.option("--exposure-no", type=int, help="The exposure number.")
+@click.option("--mjd", type=int, help="The MJD of the exposures.")
+@click.option("--min-mjd", type=int, help="The minimum MJD of the exposures.")
+@click.option("--max-mjd", type=int, help="The maximum MJD of the exposures.")
+@click.option("--controller", type=str, help="The spectrograph, e.g., sp1.")
+@click.option("--ccd", type=str, help="The CCD, e.g., b1.")
+@click.option("--flavour", type=str, help="The image type.")
+@click.option(
+    "--header",
+    "header_filters",
+    type=str,
+    multiple=True,
+    help="Header filter as KEY=VALUE. Can be used multiple times.",
+)
+@click.option("--limit", type=int, default=20, show_default=True)
+@click.option("--json", "as_json", is_flag=True, help="Output the results as JSON.")
+@click.pass_context
+def query(ctx, header_filters: tuple[str, ...], as_json: bool, **kwargs):
+    """Queries the exposure index."""
+
+    from lvmscp.index import parse_header_filters
+
+    exposure_index = get_exposure_index(ctx.obj["config_file"], ctx.obj["index_path"])
+
+    try:
+        header = parse_header_filters(header_filters)
+    except ValueError as err:
+        raise click.BadParameter(str(err), param_hint="--header")
+
+    results = exposure_index.query(header=header, **kwargs)
+
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+        return
+
+    for row in results:
+        click.echo(
+            f"{row['exposure_no']!s:>8} {row['mjd']!s:>5} {row['ccd']!s:<3} "
+            f"{row['flavour']!s:<6} {row['exptime']!s:>8} {row['path']}"
+        )
+
+
+@index.command()
+@click.argument("DIRECTORY", type=click.Path(exists=True, file_okay=False))
+@click.option("--overwrite", is_flag=True, help="Replace files already indexed.")
+@click.pass_context
+def backfill(ctx, directory: str, overwrite: bool = False):
+    """Adds the files in DIRECTORY (searched recursively) to the index."""
+
+    exposure_index = get_exposure_index(ctx.obj["config_file"], ctx.obj["index_path"])
+    n_files = exposure_index.backfill(directory, overwrite=overwrite)
+
+    click.echo(f"Added {n_files} files to {exposure_index.path}.")
+
+
+@lvmscp.command()
+@click.argument("MJD", type=int)
+@click.option("--max-mjd", type=int, help="Process all the MJDs from MJD to this one.")
+@click.option("--overwrite", is_flag=True, help="Replace values that are not null.")
+@click.option("--dry-run", is_flag=True, help="List the changes without saving them.")
+@click.option("--workers", type=int, help="Number of processes. Defaults to the CPUs.")
+@click.pass_context
+def reheader(
+    ctx,
+    mjd: int,
+    max_mjd: int | None = None,
+    overwrite: bool = False,
+    dry_run: bool = False,
+    workers: int | None = None,
+):
+    """Recomputes the header values from the saved header source replies.
+
+    The replies stored in the telemetry file of each MJD are processed with the
+    current header source configuration. By default only keywords that are missing
+    or null are updated. Run "lvmscp index backfill --overwrite" afterwards to
+    update the exposure index.
+
+    """
+
+    from lvmscp.reheader import reheader as reheader_files
+
+    config = SCPActor.load_config(ctx.obj["config_file"])
+
+    mjds = range(mjd, (max_mjd or mjd) + 1)
+
+    try:
+        results = reheader_files(
+            config,
+            mjds,
+            overwrite=overwrite,
+            dry_run=dry_run,
+            workers=workers,
+        )
+    except ValueError as err:
+        raise click.ClickException(str(err))
+
+    n_updated = 0
+    for result in results:
+        if result.error is not None:
+            click.echo(f"{result.filename}: {result.error}", err=True)
+        elif len(result.updated) > 0:
+            n_updated += 1
+            click.echo(f"{result.filename}: {', '.join(result.updated)}")
+
+    action = "would be updated" if dry_run else "updated"
+    click.echo(f"{n_updated} out of {len(results)} files {action}.")
+
+
 def main():
     lvmscp(auto_envvar_prefix="LVMSCP")
 
@@ -21,10 +21,25 @@ from archon.actor import ArchonActor
 from archon.actor.tools import get_schema
 from clu import Command
 from sdsstools import read_yaml_file
+from sdsstools.time import get_sjd
 
 from lvmscp import __version__, config
+from lvmscp.coalesce import CommandCoalescer
 from lvmscp.controller import SCPController
+from lvmscp.cryo import CryoHistory
 from lvmscp.delegate import LVMExposeDelegate
+from lvmscp.exposure_queue import ExposureQueue
+from lvmscp.frames import FrameRing
+from lvmscp.header_sources import HeaderSourceReply, get_header_values
+from lvmscp.hooks import PostWritePipeline
+from lvmscp.index import ExposureIndex
+from lvmscp.logs import BatchingQueueHandler
+from lvmscp.masters import MasterLibrary
+from lvmscp.metrics import MetricsServer, SCPMetrics
+from lvmscp.profiling import MemoryProfiler, SamplingProfiler
+from lvmscp.reload import get_changed_sections, validate_config
+from lvmscp.replay import TrafficRecorder
+from lvmscp.validation import ReplyValidator
 
 from .commands import parser
 
@@ -43,6 +58,9 @@ class SCPActor(ArchonActor):
     def __init__(self, *args, **kwargs):
         schema = self.merge_schemas(kwargs.pop("schema", None))
 
+        # Created before the delegate so that it's always available.
+        self.metrics = SCPMetrics()
+
         # Just for typing.
         self.controllers: dict[str, SCPController]
         self.exposure_delegate: LVMExposeDelegate
@@ -51,27 +69,309 @@ class SCPActor(ArchonActor):
 
         assert self.model
 
+        # Replaces the jsonschema validator of the replies with a compiled one.
+        validation_config = self.config.get("reply_validation", {})
+        if validation_config.get("compiled", True):
+            self.model.validator = ReplyValidator(
+                self.model.schema,
+                self.model.VALIDATOR,
+                skip=validation_config.get("skip", None) or [],
+            )
+
         self.emit_status_task: asyncio.Task | None = None
 
+        self.metrics_server: MetricsServer | None = None
+        self.loop_monitor_task: asyncio.Task | None = None
+
+        # On-demand profilers.
+        self.profiler: SamplingProfiler | None = None
+        self.memory_profiler = MemoryProfiler.from_config(
+            self.config.get("memory_profiler", {})
+        )
+
+        self._exposure_index: ExposureIndex | None = None
+
+        # Moves the file logging to a background thread.
+        self.log_queue: BatchingQueueHandler | None = None
+        self.start_log_queue()
+
+        # Records the commands sent to other actors, if set.
+        self.traffic_recorder: TrafficRecorder | None = None
+
+        # History of LN2 depth and cryostat pressure readings.
+        self.cryo = CryoHistory.from_config(self.config.get("cryo", {}))
+        self.cryo_task: asyncio.Task | None = None
+
+        # Shares the results of identical status commands sent at the same time.
+        self.coalescer = self.create_coalescer()
+
+        # The user configuration file, if any, and the task that reloads the
+        # configuration when the files change.
+        self.user_config_file: str | None = None
+        self.config_watch_task: asyncio.Task | None = None
+
+        # Preallocated buffers for the frames waiting to be written.
+        self.frame_ring: FrameRing | None = None
+        frame_ring_config = self.config.get("frame_ring", {})
+        if frame_ring_config.get("enabled", False):
+            frame_ring = FrameRing.from_config(frame_ring_config)
+            self.metrics.frame_ring_in_use.callback = lambda: frame_ring.in_use
+            self.metrics.frame_ring_overflows.callback = lambda: frame_ring.overflows
+            self.frame_ring = frame_ring
+
+        # Follow-up steps run in the background after each file is written.
+        self.post_write: PostWritePipeline | None = None
+        post_write_config = self.config.get("post_write", {})
+        if post_write_config.get("enabled", False):
+            post_write = PostWritePipeline.from_config(
+                post_write_config,
+                metrics=self.metrics,
+                log=self.log,
+            )
+            self.metrics.post_write_pending.callback = lambda: post_write.queue.qsize()
+            self.metrics.post_write_dropped.callback = lambda: post_write.dropped
+            self.post_write = post_write
+
+        # Master biases and dark rates updated as the calibrations are written.
+        self.masters: MasterLibrary | None = None
+        masters_config = self.config.get("masters", {})
+        if masters_config.get("enabled", False):
+            self.masters = MasterLibrary.from_config(
+                masters_config,
+                self.config,
+                metrics=self.metrics,
+                log=self.log,
+            )
+
+        # Exposures run by the actor as soon as the controllers are free.
+        self.exposure_queue = ExposureQueue.from_config(
+            self,
+            self.config.get("exposure_queue", {}),
+        )
+
     async def start(self, **_):
         """Starts the actor."""
 
         start_result = await super().start()
 
-        delay = self.config.get("status_delay", 30.0)
-        self.emit_status_task = asyncio.create_task(self.emit_status(delay))
+        self.start_emit_status()
+
+        await self.start_metrics()
+
+        cryo_interval = self.config.get("cryo", {}).get("poll_interval", 0)
+        if cryo_interval and cryo_interval > 0:
+            self.cryo_task = asyncio.create_task(self.monitor_cryo(cryo_interval))
+
+        self.exposure_queue.start()
+
+        reload_config = self.config.get("config_reload", {})
+        if reload_config.get("watch", False):
+            self.config_watch_task = asyncio.create_task(
+                self.watch_config(reload_config.get("interval", 10.0))
+            )
 
         return start_result
 
+    def create_coalescer(self):
+        """Creates the command coalescer from the ``coalescing`` configuration."""
+
+        return CommandCoalescer.from_config(
+            self.config.get("coalescing", {}),
+            on_coalesced=lambda target: self.metrics.coalesced_commands.inc(
+                actor=target
+            ),
+        )
+
+    async def start_metrics(self):
+        """Starts the event loop monitor and, if enabled, the metrics server."""
+
+        metrics_config = self.config.get("metrics", {})
+
+        lag_interval = metrics_config.get("loop_lag_interval", 1.0)
+        self.loop_monitor_task = asyncio.create_task(
+            self.metrics.monitor_event_loop(lag_interval)
+        )
+
+        if not metrics_config.get("enabled", False):
+            return
+
+        try:
+            self.metrics_server = await MetricsServer(
+                self.metrics,
+                host=metrics_config.get("host", "127.0.0.1"),
+                port=metrics_config.get("port", 9150),
+            ).start()
+        except OSError as err:
+            self.log.warning(f"Failed starting metrics server: {err}")
+            self.metrics_server = None
+
+    async def _recover_exposures(self):
+        """Recovers failed exposures, writing first those in the frame ring."""
+
+        await self.recover_frame_ring()
+
+        return await super()._recover_exposures()
+
+    async def recover_frame_ring(self):
+        """Writes the frames left in the frame ring by a previous run.
+
+        The header and file name of each frame are read from the lock file of the
+        exposure. Frames without a lock file have already been written or cannot
+        be recovered and are discarded.
+
+        """
+
+        if self.frame_ring is None:
+            return []
+
+        recovered: list[str] = []
+
+        checksum_mode = self.config.get("checksum.mode", "md5")
+        checksum_file = self.config.get("checksum.file", f"{{SJD}}.{checksum_mode}sum")
+        checksum_file = checksum_file.format(SJD=get_sjd())
+
+        for filename, data in self.frame_ring.pending():
+            lock_path = self.exposure_recovery._get_path(filename)
+            if os.path.exists(filename) or not lock_path.exists():
+                self.frame_ring.release(filename)
+                continue
+
+            with open(lock_path, "r") as fd:
+                fdata = json.load(fd)
+            fdata["data"] = data
+
+            self.write("w", f"Recovering exposure {filename!r} from the frame ring.")
+
+            try:
+                result = await self.exposure_delegate.write_to_disk(
+                    fdata,
+                    write_engine=self.config.get("files.write_engine", "astropy"),
+                )
+            except Exception as err:
+                self.write("w", f"Failed writing recovered exposure: {err!r}")
+                continue
+
+            if result is None:
+                self.frame_ring.release(filename)
+                continue
+
+            if self.config["checksum.write"]:
+                await self.exposure_delegate._generate_checksum(
+                    checksum_file,
+                    [result],
+                    mode=checksum_mode,
+                )
+
+            self.exposure_recovery.unlink(result)
+            recovered.append(result)
+
+        return recovered
+
+    def start_log_queue(self):
+        """Writes the file logs from a background thread, if enabled."""
+
+        log_queue_config = self.config.get("log_queue", {})
+        if not log_queue_config.get("enabled", False) or not self.log.fh:
+            return
+
+        self.log_queue = BatchingQueueHandler.install(
+            self.log,
+            [self.log.fh, getattr(self.log, "jh", None)],
+            max_size=log_queue_config.get("max_size", 10000),
+            batch_size=log_queue_config.get("batch_size", 500),
+            flush_interval=log_queue_config.get("flush_interval", 0.5),
+        )
+
+        log_queue = self.log_queue
+        self.metrics.log_records_dropped.callback = lambda: log_queue.dropped
+
+    def get_exposure_index(self) -> ExposureIndex | None:
+        """Returns the exposure index, or `None` if the index is disabled."""
+
+        index_config = self.config.get("index", {})
+        if not index_config.get("enabled", False):
+            return None
+
+        path = index_config.get("path", None)
+        if path is None:
+            path = os.path.join(self.config["files"]["data_dir"], "lvmscp.sqlite")
+        path = pathlib.Path(path).expanduser()
+
+        if self._exposure_index is None or self._exposure_index.path != path:
+            self._exposure_index = ExposureIndex(
+                path,
+                header_keys=index_config.get("header_keys", None),
+            )
+
+        return self._exposure_index
+
     async def stop(self):
         """Stops the actor and cancels tasks."""
 
+        for task in [
+            self.emit_status_task,
+            self.loop_monitor_task,
+            self.cryo_task,
+            self.config_watch_task,
+        ]:
+            if task and not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+
+        await self.exposure_queue.stop()
+
+        if self.post_write:
+            await self.post_write.stop(timeout=10)
+
+        if self.masters:
+            await self.masters.stop()
+
+        if self.traffic_recorder:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.traffic_recorder.stop)
+            self.traffic_recorder = None
+
+        if self.metrics_server:
+            await self.metrics_server.stop()
+
+        if self.profiler:
+            self.profiler.stop()
+
+        result = await super().stop()
+
+        if self.log_queue:
+            self.log_queue.uninstall(self.log)
+            self.log_queue = None
+
+        return result
+
+    async def send_command(self, target: str, command_string: str, *args, **kwargs):
+        """Sends a command to another actor.
+
+        Identical status commands that are already running are not sent again;
+        the callers share the result of the running command.
+
+        """
+
+        if len(args) > 0:
+            command_string += " " + " ".join(map(str, args))
+
+        return await self.coalescer.send(
+            super().send_command,
+            target,
+            command_string,
+            **kwargs,
+        )
+
+    def start_emit_status(self):
+        """Starts the task that emits the status, cancelling the current one."""
+
         if self.emit_status_task and not self.emit_status_task.done():
             self.emit_status_task.cancel()
-            with suppress(asyncio.CancelledError):
-                await self.emit_status_task
 
-        return await super().stop()
+        delay = self.config.get("status_delay", 30.0)
+        self.emit_status_task = asyncio.create_task(self.emit_status(delay))
 
     async def emit_status(self, delay: float = 30.0):
         """Emits the status of the controller on a timer."""
@@ -88,6 +388,184 @@ class SCPActor(ArchonActor):
 
             await asyncio.sleep(delay)
 
+    async def poll_cryo(self):
+        """Queries the cryostat header sources and adds the readings to the history.
+
+        Runs the sources in the groups listed in ``cryo.sources`` for each
+        controller and stores the values for each CCD.
+
+        """
+
+        groups = self.config.get("cryo", {}).get("sources", ["pressure", "depth"])
+        sources = [
+            source
+            for source in self.exposure_delegate.get_header_sources()
+            if source.group in groups
+        ]
+
+        async def run_source(source, context):
+            actor = source.format(source.actor, **context)
+            command_string = source.format(source.command, **context)
+
+            cmd = await asyncio.wait_for(
+                self.send_command(
+                    actor,
+                    command_string,
+                    internal=True,
+                    time_limit=source.timeout,
+                ),
+                timeout=source.timeout,
+            )
+            if cmd.status.did_fail:
+                raise RuntimeError(f"Command {command_string!r} failed.")
+
+            message = {}
+            for reply in reversed(cmd.replies):
+                message.update(reply.message)
+
+            return HeaderSourceReply(
+                source.name, {**context, **source.context}, message
+            )
+
+        for controller in self.controllers.values():
+            context = {
+                "spec": controller.name,
+                "lvmieb": controller.lvmieb,
+                "lvmnps": self.config.get("lvmnps", "lvmnps"),
+            }
+
+            results = await asyncio.gather(
+                *[run_source(source, context) for source in sources],
+                return_exceptions=True,
+            )
+            replies = [res for res in results if isinstance(res, HeaderSourceReply)]
+
+            detectors = self.config["controllers"][controller.name]["detectors"]
+            for ccd in detectors:
+                header_values = get_header_values(sources, replies, ccd=ccd)
+                self.cryo.add_header_values(ccd, header_values)
+
+    async def monitor_cryo(self, interval: float):
+        """Polls the cryostat readings and outputs the forecast on a timer."""
+
+        await asyncio.sleep(10)
+
+        while True:
+            try:
+                await self.poll_cryo()
+                self.write("d", cryo_forecast=self.cryo.forecast(), broadcast=True)
+            except Exception as err:
+                self.log.warning(f"Failed polling cryostat readings: {err}")
+
+            await asyncio.sleep(interval)
+
+    def read_config_file(self, path: str | None = None) -> dict:
+        """Reads the configuration files again.
+
+        The base configuration file is updated with ``path`` or, if `None`, with the
+        user configuration file with which the actor was created, as in
+        `.from_config`.
+
+        """
+
+        if self.config_file_path and os.path.exists(self.config_file_path):
+            new_config = dict(read_yaml_file(self.config_file_path))
+        else:
+            new_config = deepcopy(dict(self.BASE_CONFIG or {}))
+
+        path = path or self.user_config_file
+        if path:
+            new_config.update(read_yaml_file(path))
+
+        return new_config
+
+    async def reload_config(self, path: str | None = None):
+        """Reloads the configuration sections that do not require a restart.
+
+        The new configuration is validated and the changed sections listed in
+        `.RELOADABLE_SECTIONS` are replaced at once between exposures. The
+        controllers stay connected. Changes to other sections are ignored.
+
+        Parameters
+        ----------
+        path
+            The user configuration file. Defaults to the file with which the
+            actor was created.
+
+        Returns
+        -------
+        sections
+            A tuple with the sections reloaded and the changed sections that
+            require restarting the actor.
+
+        Raises
+        ------
+        ValueError
+            If the new configuration is not valid.
+
+        """
+
+        new_config = self.read_config_file(path)
+
+        errors = validate_config(new_config)
+        if len(errors) > 0:
+            raise ValueError(" ".join(errors))
+
+        reloaded, restart = get_changed_sections(self.config, new_config)
+        if len(reloaded) == 0:
+            return reloaded, restart
+
+        delegate = self.exposure_delegate
+
+        # The controllers share the actor configuration but the delegate has a copy.
+        async with delegate.lock:
+            for section in reloaded:
+                for config in [self.config, delegate.config]:
+                    if section in new_config:
+                        config[section] = deepcopy(new_config[section])
+                    else:
+                        config.pop(section, None)
+
+            if "coalescing" in reloaded:
+                self.coalescer = self.create_coalescer()
+
+            # The delay is only read when the task starts.
+            if "status_delay" in reloaded and self.emit_status_task is not None:
+                self.start_emit_status()
+
+        self.log.info(f"Reloaded configuration sections {reloaded}.")
+
+        return reloaded, restart
+
+    async def watch_config(self, interval: float = 10.0):
+        """Reloads the configuration when the configuration files change."""
+
+        def get_mtimes():
+            paths = [self.config_file_path, self.user_config_file]
+            return [os.path.getmtime(path) for path in paths if path]
+
+        mtimes = get_mtimes()
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                new_mtimes = get_mtimes()
+                if new_mtimes == mtimes:
+                    continue
+
+                mtimes = new_mtimes
+                reloaded, restart = await self.reload_config()
+            except Exception as err:
+                self.write("w", f"Failed reloading the configuration: {err}")
+                continue
+
+            self.write(
+                "i",
+                config_reload={"reloaded": reloaded, "restart_required": restart},
+                broadcast=True,
+            )
+
     def merge_schemas(self, scp_schema_path: str | None = None):
         """Merge default schema with SCP one."""
 
@@ -110,8 +588,14 @@ class SCPActor(ArchonActor):
         return schema
 
     @classmethod
-    def from_config(cls, iconfig, *args, **kwargs):
-        """Creates an actor from a configuration file."""
+    def load_config(cls, iconfig: str | dict | None = None) -> dict:
+        """Returns the base configuration updated with a user configuration.
+
+        ``iconfig`` can be the path to the user configuration file or a
+        dictionary. The top-level sections in ``iconfig`` replace those in the
+        base configuration.
+
+        """
 
         if isinstance(cls.BASE_CONFIG, str):
             cls.BASE_CONFIG = read_yaml_file(cls.BASE_CONFIG)
@@ -119,19 +603,31 @@ class SCPActor(ArchonActor):
         if iconfig is None:
             if cls.BASE_CONFIG is None:
                 raise RuntimeError("The class does not have a base configuration.")
+            return deepcopy(cls.BASE_CONFIG)
+
+        if isinstance(cls.BASE_CONFIG, dict):
             config = deepcopy(cls.BASE_CONFIG)
         else:
-            if isinstance(cls.BASE_CONFIG, dict):
-                config = deepcopy(cls.BASE_CONFIG)
-            else:
-                config = {}
+            config = {}
+
+        if isinstance(iconfig, str):
+            iconfig = read_yaml_file(iconfig)
+
+        config.update(iconfig)
+
+        return config
+
+    @classmethod
+    def from_config(cls, iconfig, *args, **kwargs):
+        """Creates an actor from a configuration file."""
 
-            if isinstance(iconfig, str):
-                iconfig = read_yaml_file(iconfig)
+        user_config_file = iconfig if isinstance(iconfig, str) else None
+        config = cls.load_config(iconfig)
 
-            config.update(iconfig)
+        instance = super(SCPActor, cls).from_config(config, *args, **kwargs)
+        instance.user_config_file = user_config_file
 
-        return super(SCPActor, cls).from_config(config, *args, **kwargs)
+        return instance
 
 
 CommandType = Command[SCPActor]
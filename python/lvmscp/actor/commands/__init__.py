@@ -10,6 +10,16 @@ from __future__ import annotations
 
 from archon.actor.commands import parser
 
+from .calib_batch import calib_batch
+from .cryo import cryo_forecast
 from .etr import get_etr
+from .fast_abort import fast_abort
 from .focus import focus
 from .hardware_status import hardware_status
+from .index import index
+from .masters import masters
+from .profile import memory, profile
+from .queue import queue
+from .reload import reload_config
+from .standards import standards
+from .traffic import traffic
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: calib_batch.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import time
+
+from typing import TYPE_CHECKING
+
+import click
+
+from archon.actor.tools import check_controller, controller
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from archon.controller import ArchonController
+
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["calib_batch"]
+
+
+@parser.command(name="calib-batch")
+@controller
+@click.argument("FLAVOUR", type=click.Choice(["bias", "dark"]))
+@click.argument("COUNT", type=int)
+@click.argument("EXPOSURE-TIME", type=float, required=False)
+async def calib_batch(
+    command: CommandType,
+    controllers: dict[str, ArchonController],
+    flavour: str,
+    count: int,
+    exposure_time: float | None = None,
+    controller: str | None = None,
+):
+    """Takes COUNT biases or darks back to back.
+
+    The shutter is not commanded or checked and only the groups of header sources
+    listed in ``calib_batch.cotasks`` for the flavour are run during integration.
+
+    """
+
+    if flavour == "dark" and exposure_time is None:
+        return command.fail("Darks require an exposure time.")
+    elif flavour == "bias":
+        exposure_time = 0.0
+
+    if count < 1:
+        return command.fail("COUNT must be a positive integer.")
+
+    if not controller:
+        selected_controllers = list(controllers.values())
+    else:
+        if controller not in controllers:
+            return command.fail(error=f"Controller {controller!r} not found.")
+        selected_controllers = [controllers[controller]]
+
+    if not all([check_controller(command, c) for c in selected_controllers]):
+        return command.fail()
+
+    cotasks_config = command.actor.config.get("calib_batch", {}).get("cotasks", {})
+    cotasks: list[str] = list(cotasks_config.get(flavour, None) or [])
+
+    delegate = command.actor.exposure_delegate
+
+    groups = {source.group for source in delegate.get_header_sources()}
+    invalid = set(cotasks) - groups
+    if len(invalid) > 0:
+        return command.fail(f"Invalid cotasks for {flavour}: {sorted(invalid)}.")
+
+    # Wait for any ongoing recovery to finish.
+    if not command.actor.exposure_recovery.locker.is_set():
+        command.warning("Waiting for image recovery to finish.")
+        await command.actor.exposure_recovery.locker.wait()
+
+    t0 = time.time()
+    frame_times: list[float] = []
+
+    for nexp in range(1, count + 1):
+        t_frame = time.time()
+
+        # These are reset after each readout.
+        delegate.use_shutter = False
+        delegate.cotasks = cotasks
+
+        exposure_result = await delegate.set_task(
+            delegate.expose(
+                command,
+                selected_controllers,
+                flavour=flavour,
+                exposure_time=exposure_time,
+                readout=False,
+            )
+        )
+        if not exposure_result:
+            # expose will fail the command.
+            return
+
+        readout_result = await delegate.set_task(delegate.readout(command))
+        if not readout_result:
+            return
+
+        frame_times.append(time.time() - t_frame)
+
+        command.info(
+            calib_batch={
+                "flavour": flavour,
+                "frame": nexp,
+                "count": count,
+                "frame_time": round(frame_times[-1], 2),
+            }
+        )
+
+    elapsed = time.time() - t0
+    cadence = elapsed / count
+
+    return command.finish(
+        calib_batch={
+            "flavour": flavour,
+            "frame": count,
+            "count": count,
+            "elapsed": round(elapsed, 2),
+            "cadence": round(cadence, 2),
+            "overhead": round(cadence - (exposure_time or 0.0), 2),
+        }
+    )
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: cryo.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import click
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["cryo_forecast"]
+
+
+@parser.command(name="cryo-forecast")
+@click.option("--poll", is_flag=True, help="Query the cryostat readings first.")
+async def cryo_forecast(command: CommandType, *_, poll: bool = False):
+    """Reports the predicted time until each cryostat runs out of LN2."""
+
+    if poll:
+        try:
+            await command.actor.poll_cryo()
+        except Exception as err:
+            command.warning(f"Failed polling cryostat readings: {err}")
+
+    return command.finish(cryo_forecast=command.actor.cryo.forecast())
@@ -10,8 +10,6 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from lvmscp.delegate import EXPECTED_READOUT_TIME
-
 from . import parser
 
 
@@ -31,6 +29,6 @@ async def get_etr(command: CommandType, *_):
         command.warning("ETR not available. The controllers may be idle.")
         total_time = None
     else:
-        total_time = e_data.exposure_time + EXPECTED_READOUT_TIME
+        total_time = e_data.exposure_time + delegate.get_readout_time()
 
     command.finish(etr=[etr, total_time])
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: fast_abort.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import click
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["fast_abort"]
+
+
+@parser.command(name="fast-abort")
+@click.option("--flush", is_flag=True, help="Discard the frame with a fast flush.")
+@click.option("--flush-count", type=int, help="Number of flushes.")
+async def fast_abort(
+    command: CommandType,
+    *_,
+    flush: bool = False,
+    flush_count: int | None = None,
+):
+    """Aborts the current exposure as quickly as possible.
+
+    The shutters are closed and the controllers aborted concurrently, without
+    retries, and the frame is not read out. Use for emergencies in which the
+    instrument must be freed within seconds.
+
+    """
+
+    delegate = command.actor.exposure_delegate
+    if delegate._command is None and not delegate.lock.locked():
+        return command.fail(error="No exposure is running.")
+
+    if flush_count is None:
+        flush_count = command.actor.config.get("fast_abort", {}).get("flush_count", 1)
+
+    command.debug(text="Aborting exposure.")
+    result = await delegate.fast_abort(command, flush=flush, flush_count=flush_count)
+
+    if not result["shutters_closed"]:
+        return command.fail(fast_abort=result, error="Some shutters failed to close.")
+
+    return command.finish(fast_abort=result)
@@ -8,47 +8,208 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
+from asyncio import FIRST_COMPLETED
+from functools import partial
+
 from typing import TYPE_CHECKING
 
 import click
 
 from archon.actor.commands import parser
+from sdsstools.utils import cancel_task
+
+from lvmscp.autoexp import get_auto_exposure_time, get_line_levels, read_test_frames
 
 
 if TYPE_CHECKING:
     from archon.controller import ArchonController
+    from clu import Command
 
     from ..actor import CommandType
 
 __all__ = ["focus"]
 
 
-async def move_hds(
+# The sides of the Hartmann doors, in the order in which they are closed.
+SIDES: list[str] = ["left", "right"]
+
+HD_FAILED_MESSAGE = "Failed moving Hartmann doors. See lvmieb log for more information."
+
+
+async def send_hd_command(
     command: CommandType,
     spectro: str,
     side: str = "all",
     action: str = "open",
-    verbose: bool = False,
-):
-    """Helper to open/close HDs."""
-
-    if verbose:
-        if action == "open":
-            command.info(f"Opening {side} Hartmann door(s).")
-        else:
-            command.info(f"Closing {side} Hartmann door(s).")
+) -> bool:
+    """Sends a command to open or close Hartmann doors. Returns `False` on failure."""
 
     hd_cmd = await (
         await command.send_command(f"lvmieb.{spectro}", f"hartmann {action} -s {side}")
     )
 
-    if hd_cmd.status.did_fail:
-        command.fail(
-            "Failed moving Hartmann doors. See lvmieb log for more information."
+    return not hd_cmd.status.did_fail
+
+
+async def position_hds(command: CommandType, spectro: str, side: str | None) -> bool:
+    """Closes the Hartmann door on one side and opens the other one.
+
+    Both doors are commanded at the same time. If ``side`` is `None`, both doors
+    are opened. Returns `False` if any of the doors failed to move.
+
+    """
+
+    if side is None:
+        return await send_hd_command(command, spectro, "all", "open")
+
+    command.info(f"Closing {side} Hartmann door.")
+
+    other = "right" if side == "left" else "left"
+    results = await asyncio.gather(
+        send_hd_command(command, spectro, other, "open"),
+        send_hd_command(command, spectro, side, "close"),
+    )
+
+    return all(results)
+
+
+async def preposition_hds(
+    command: CommandType,
+    spectro: str,
+    side: str | None,
+) -> tuple[bool, float, float]:
+    """Positions the Hartmann doors and returns the result and start and end times."""
+
+    t0 = time.time()
+    result = await position_hds(command, spectro, side)
+
+    return result, t0, time.time()
+
+
+async def send_expose(
+    command: CommandType,
+    spectro: str,
+    command_string: str,
+) -> tuple[Command, bool]:
+    """Sends an expose command and waits until the readout begins.
+
+    Returns the expose command, which may still be running, and whether the
+    readout has started. The readout is considered not started if the command
+    finished without the ``readout_started`` keyword.
+
+    """
+
+    readout_started = asyncio.Event()
+
+    def check_reply(reply):
+        if "readout_started" in (getattr(reply, "body", None) or {}):
+            readout_started.set()
+
+    expose_cmd = await command.send_command(
+        f"lvmscp.{spectro}",
+        command_string,
+        await_command=False,
+        reply_callback=check_reply,
+    )
+
+    readout_task = asyncio.create_task(readout_started.wait())
+    await asyncio.wait([readout_task, expose_cmd], return_when=FIRST_COMPLETED)
+    await cancel_task(readout_task)
+
+    return expose_cmd, readout_started.is_set() and not expose_cmd.done()
+
+
+def get_filenames(expose_cmd: Command) -> list[str]:
+    """Returns the filenames written by an expose command."""
+
+    filenames = []
+    for reply in expose_cmd.replies:
+        if "filenames" in reply.message:
+            filenames += reply.message["filenames"]
+
+    return filenames
+
+
+async def calibrate_exptime(
+    command: CommandType,
+    spectro: str,
+    test_exptime: float,
+) -> float | None:
+    """Takes a short arc test frame and returns the exposure time for the arcs.
+
+    The test frame is read out with the ``focus.auto_exptime.window_mode`` window.
+    Returns `None` and fails the command if the test frame cannot be taken, or if
+    it has no lines or is saturated.
+
+    """
+
+    config = command.actor.config.get("focus", {}).get("auto_exptime", {})
+
+    window_mode = config.get("window_mode", None)
+    window_modes = command.actor.config.get("window_modes", None) or {}
+    window_flag = f" --window-mode {window_mode}" if window_mode in window_modes else ""
+
+    command.info(f"Taking {test_exptime} s arc test frame.")
+    test_cmd = await command.send_command(
+        f"lvmscp.{spectro}",
+        f"expose --arc{window_flag} {test_exptime}",
+    )
+    await test_cmd
+
+    if test_cmd.status.did_fail:
+        command.fail("Failed taking arc test frame.")
+        return None
+
+    filenames = []
+    for reply in test_cmd.replies:
+        if "filenames" in reply.message:
+            filenames += reply.message["filenames"]
+
+    try:
+        loop = asyncio.get_running_loop()
+        frames = await loop.run_in_executor(None, read_test_frames, filenames)
+    except Exception as err:
+        command.fail(f"Failed reading arc test frame: {err}")
+        return None
+
+    ccds = list(frames)
+    levels = await loop.run_in_executor(
+        None,
+        partial(
+            get_line_levels,
+            [frames[ccd] for ccd in ccds],
+            percentile=config.get("percentile", 99.9),
+            filter_size=config.get("filter_size", 3),
+        ),
+    )
+
+    try:
+        exptime, limited = get_auto_exposure_time(
+            test_exptime,
+            levels.peak,
+            config,
+            backgrounds=levels.background,
+            noises=levels.noise,
         )
-        return False
+    except ValueError as err:
+        command.fail(f"Cannot determine the exposure time: {err}")
+        return None
 
-    return True
+    command.info(
+        auto_exptime={
+            "spectrograph": spectro,
+            "test_exptime": test_exptime,
+            "exptime": exptime,
+            "limited": limited,
+            "ccds": ccds,
+            "peak": [round(float(value), 1) for value in levels.peak],
+            "percentile": [round(float(value), 1) for value in levels.high],
+        }
+    )
+
+    return exptime
 
 
 # TODO: needs rewriting for different specs.
@@ -59,6 +220,17 @@ async def move_hds(
 @click.argument("EXPTIME", type=float)
 @click.option("-n", "--count", type=int, default=1, help="Number of focus cycles.")
 @click.option("--dark", flag_value=True, help="Take a dark along each exposure.")
+@click.option(
+    "--window-mode",
+    type=str,
+    help="Readout window preset for the focus frames (e.g., focus_strip).",
+)
+@click.option(
+    "--auto-exptime",
+    is_flag=True,
+    help="Take an arc test frame with EXPTIME and scale the exposure time "
+    "of the focus sequence to reach the target peak counts.",
+)
 async def focus(
     command: CommandType,
     controllers: dict[str, ArchonController],
@@ -66,70 +238,129 @@ async def focus(
     exptime: float,
     count: int = 1,
     dark: bool = False,
+    window_mode: str | None = None,
+    auto_exptime: bool = False,
 ):
-    """Take a focus sequence with both Hartmann doors."""
+    """Take a focus sequence with both Hartmann doors.
+
+    With ``--auto-exptime``, EXPTIME is used for a short arc test frame taken with
+    the first Hartmann door closed, and the exposure time of the sequence is
+    scaled from the peak line counts in the test frame.
+
+    """
+
+    window_modes = command.actor.config.get("window_modes", None) or {}
+    if window_mode is not None and window_mode not in window_modes:
+        return command.fail(f"Invalid window mode {window_mode!r}.")
+
+    window_flag = f" --window-mode {window_mode}" if window_mode else ""
 
     # TODO: add a check for arc lamps or, better, command them to be on.
 
-    for n in range(count):
-        if count != 1:
-            command.info(f"Focus iteration {n + 1} out of {count}.")
+    # The Hartmann door configurations to use, in order. The doors are opened at
+    # the end of the sequence.
+    steps: list[tuple[int, str]] = [(n, side) for n in range(count) for side in SIDES]
 
-        for side in ["left", "right"]:
-            # Open both HDs.
-            if not (await move_hds(command, spectro, "all", "open", verbose=False)):
-                return
+    preposition_task: asyncio.Task | None = None
+
+    iteration_t0 = time.time()
+    time_saved: float = 0.0
+
+    for istep, (n, side) in enumerate(steps):
+        if side == SIDES[0]:
+            iteration_t0 = time.time()
+            time_saved = 0.0
+            if count != 1:
+                command.info(f"Focus iteration {n + 1} out of {count}.")
+
+        # Move the doors unless they were moved during the previous readout.
+        if preposition_task is None:
+            if not (await position_hds(command, spectro, side)):
+                return command.fail(HD_FAILED_MESSAGE)
+        else:
+            t_needed = time.time()
+            hd_result, t_start, t_end = await preposition_task
+            preposition_task = None
+
+            if not hd_result:
+                return command.fail(HD_FAILED_MESSAGE)
+
+            time_saved += max(0.0, min(t_end, t_needed) - t_start)
 
-            # Close HD.
-            if not (await move_hds(command, spectro, side, "close", verbose=True)):
+        # Calibrate the exposure time with the same Hartmann door closed.
+        if auto_exptime and n == 0 and side == SIDES[0]:
+            new_exptime = await calibrate_exptime(command, spectro, exptime)
+            if new_exptime is None:
                 return
+            exptime = new_exptime
 
-            # Arc exposure.
-            command.info("Taking arc exposure.")
-            expose_cmd = await command.send_command(
-                f"lvmscp.{spectro}",
-                f"expose --arc {exptime}",
+        # Arc exposure. The doors do not affect the exposure once the shutter is
+        # closed, so they are moved for the next step during the readout.
+        command.info("Taking arc exposure.")
+        expose_cmd, reading = await send_expose(
+            command,
+            spectro,
+            f"expose --arc{window_flag} {exptime}",
+        )
+
+        next_side = steps[istep + 1][1] if istep + 1 < len(steps) else None
+        if reading:
+            preposition_task = asyncio.create_task(
+                preposition_hds(command, spectro, next_side)
             )
-            await expose_cmd
 
-            if expose_cmd.status.did_fail:
-                return command.fail("Failed taking arc exposure.")
+        await expose_cmd
 
-            filenames = []
-            for reply in expose_cmd.replies:
-                if "filenames" in reply.message:
-                    filenames += reply.message["filenames"]
+        if expose_cmd.status.did_fail:
+            await cancel_task(preposition_task)
+            return command.fail("Failed taking arc exposure.")
 
-            dark_filenames = []
-            if dark:
-                # Dark exposure, if commanded.
-                command.info("Taking dark exposure.")
-                dark_cmd = await command.send_command(
-                    f"lvmscp.{spectro}",
-                    f"expose --dark -c {spectro} {exptime}",
-                )
-                await dark_cmd
+        filenames = get_filenames(expose_cmd)
 
-                if dark_cmd.status.did_fail:
-                    return command.fail("Failed taking arc exposure.")
+        dark_filenames = []
+        if dark:
+            # Dark exposure, if commanded.
+            command.info("Taking dark exposure.")
+            dark_cmd = await command.send_command(
+                f"lvmscp.{spectro}",
+                f"expose --dark{window_flag} -c {spectro} {exptime}",
+            )
+            await dark_cmd
 
-                for reply in dark_cmd.replies:
-                    if "filenames" in reply.message:
-                        dark_filenames += reply.message["filenames"]
+            if dark_cmd.status.did_fail:
+                await cancel_task(preposition_task)
+                return command.fail("Failed taking arc exposure.")
 
+            dark_filenames = get_filenames(dark_cmd)
+
+        command.info(
+            focus={
+                "spectrograph": spectro,
+                "iteration": n + 1,
+                "side": side,
+                "exposures": filenames,
+                "darks": dark_filenames,
+            }
+        )
+
+        if side == SIDES[-1]:
             command.info(
-                focus={
+                focus_timing={
                     "spectrograph": spectro,
                     "iteration": n + 1,
-                    "side": side,
-                    "exposures": filenames,
-                    "darks": dark_filenames,
+                    "elapsed": round(time.time() - iteration_t0, 1),
+                    "time_saved": round(time_saved, 1),
                 }
             )
 
     # Reopen HDs.
     command.info("Reopening Hartmann doors.")
-    if not (await move_hds(command, spectro, "all", "open", verbose=False)):
-        return
+    if preposition_task is not None:
+        hd_result, _, _ = await preposition_task
+    else:
+        hd_result = await position_hds(command, spectro, None)
+
+    if not hd_result:
+        return command.fail(HD_FAILED_MESSAGE)
 
     command.finish()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: index.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+
+import click
+
+from sdsstools.time import get_sjd
+
+from lvmscp.index import parse_header_filters
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["index"]
+
+
+@parser.group()
+def index(*args):
+    """Queries the local exposure index."""
+
+    pass
+
+
+@index.command()
+@click.option("--exposure-no", type=int, help="The exposure number.")
+@click.option("--mjd", type=int, help="The MJD of the exposures.")
+@click.option("--tonight", is_flag=True, help="Only exposures from the current MJD.")
+@click.option("--controller", type=str, help="The spectrograph, e.g., sp1.")
+@click.option("--ccd", type=str, help="The CCD, e.g., b1.")
+@click.option("--flavour", type=str, help="The image type.")
+@click.option(
+    "--header",
+    "header_filters",
+    type=str,
+    multiple=True,
+    help="Header filter as KEY=VALUE. Can be used multiple times.",
+)
+@click.option("--limit", type=int, default=20, show_default=True)
+async def query(
+    command: CommandType,
+    *_,
+    exposure_no: int | None = None,
+    mjd: int | None = None,
+    tonight: bool = False,
+    controller: str | None = None,
+    ccd: str | None = None,
+    flavour: str | None = None,
+    header_filters: tuple[str, ...] = (),
+    limit: int = 20,
+):
+    """Queries the exposure index. Results are sorted newest first."""
+
+    exposure_index = command.actor.get_exposure_index()
+    if exposure_index is None:
+        return command.fail("The exposure index is disabled.")
+
+    try:
+        header = parse_header_filters(header_filters)
+    except ValueError as err:
+        return command.fail(str(err))
+
+    if tonight:
+        mjd = get_sjd("LCO")
+
+    results = await asyncio.get_running_loop().run_in_executor(
+        None,
+        lambda: exposure_index.query(
+            exposure_no=exposure_no,
+            mjd=mjd,
+            controller=controller,
+            ccd=ccd,
+            flavour=flavour,
+            header=header,
+            limit=limit,
+        ),
+    )
+
+    return command.finish(index_query={"n_results": len(results), "results": results})
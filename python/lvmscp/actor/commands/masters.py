@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: masters.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import click
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["masters"]
+
+
+@parser.command()
+@click.argument("CCDS", type=str, nargs=-1)
+async def masters(command: CommandType, *_, ccds: tuple[str, ...] = ()):
+    """Reports the bias level and read noise drift of the master library.
+
+    The read noise measured in the last bias of each CCD is compared with the
+    readnoise of the detector in the configuration. CCDS defaults to all the
+    CCDs of the actor.
+
+    """
+
+    library = command.actor.masters
+    if library is None:
+        return command.fail(error="The master library is not enabled.")
+
+    if len(ccds) == 0:
+        ccds = tuple(library.detectors)
+
+    flagged: list[str] = []
+    for ccd in ccds:
+        if ccd not in library.detectors:
+            return command.fail(error=f"Unknown CCD {ccd!r}.")
+
+        drift = library.get_drift(ccd)
+        if drift is None:
+            command.warning(f"There is no master bias for {ccd}.")
+            continue
+
+        if not drift["ok"]:
+            flagged.append(ccd)
+
+        command.info(master_drift=drift)
+
+    if len(flagged) > 0:
+        command.warning(f"Read noise of {flagged} differs from the configuration.")
+
+    return command.finish()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: profile.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from typing import TYPE_CHECKING
+
+import click
+
+from lvmscp.profiling import SamplingProfiler, get_reports_dir
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["profile", "memory"]
+
+
+def _get_reports_dir(command: CommandType):
+    """Returns the directory for the reports."""
+
+    return get_reports_dir(command.actor.config["actor"].get("log_dir", None))
+
+
+@parser.group()
+def profile(*args):
+    """Samples the CPU usage of the actor."""
+
+    pass
+
+
+@profile.command()
+@click.option(
+    "--interval",
+    type=float,
+    default=0.01,
+    show_default=True,
+    help="Sampling interval in seconds.",
+)
+@click.option(
+    "--max-duration",
+    type=float,
+    default=600.0,
+    show_default=True,
+    help="Stop sampling after this many seconds.",
+)
+async def start(command: CommandType, *_, interval: float, max_duration: float):
+    """Starts the sampling profiler."""
+
+    actor = command.actor
+
+    if actor.profiler is not None and actor.profiler.running:
+        return command.fail("The profiler is already running.")
+
+    actor.profiler = SamplingProfiler(interval=interval, max_duration=max_duration)
+    actor.profiler.start()
+
+    return command.finish(text="Profiler started.")
+
+
+@profile.command()
+@click.option("--top", type=int, default=10, help="Number of frames to report.")
+async def stop(command: CommandType, *_, top: int = 10):
+    """Stops the profiler and reports the hottest frames."""
+
+    actor = command.actor
+    profiler = actor.profiler
+
+    if profiler is None:
+        return command.fail("The profiler has not been started.")
+
+    profiler.stop()
+    actor.profiler = None
+
+    filename = _get_reports_dir(command) / f"profile-{time.strftime('%Y%m%dT%H%M%S')}"
+    profiler.write_report(filename)
+
+    return command.finish(
+        profile={
+            "filename": str(filename),
+            "samples": profiler.n_samples,
+            "top": [f"{row['percent']}% {row['frame']}" for row in profiler.top(top)],
+        }
+    )
+
+
+@parser.group()
+def memory(*args):
+    """Traces the memory allocations of the actor."""
+
+    pass
+
+
+@memory.command()
+@click.option("--top", type=int, default=10, help="Number of sites to report.")
+async def snapshot(command: CommandType, *_, top: int = 10):
+    """Takes a memory snapshot. The first snapshot is used as baseline."""
+
+    memory_profiler = command.actor.memory_profiler
+    loop = asyncio.get_running_loop()
+
+    is_baseline = len(memory_profiler.snapshots) == 0
+    await loop.run_in_executor(None, memory_profiler.snapshot)
+    rows = await loop.run_in_executor(None, memory_profiler.top, top)
+
+    filename = _get_reports_dir(command) / f"memory-{time.strftime('%Y%m%dT%H%M%S')}"
+    await loop.run_in_executor(None, memory_profiler.write_report, filename, rows)
+
+    return command.finish(
+        memory={
+            "filename": str(filename),
+            "baseline": is_baseline,
+            "top": [f"{row['size']} B {row['site']}" for row in rows],
+        }
+    )
+
+
+@memory.command()
+@click.option("--top", type=int, default=10, help="Number of sites to report.")
+async def diff(command: CommandType, *_, top: int = 10):
+    """Compares the current memory allocations with the baseline snapshot."""
+
+    memory_profiler = command.actor.memory_profiler
+    loop = asyncio.get_running_loop()
+
+    try:
+        rows = await loop.run_in_executor(None, memory_profiler.diff, top)
+    except RuntimeError as err:
+        return command.fail(str(err))
+
+    name = f"memory-diff-{time.strftime('%Y%m%dT%H%M%S')}"
+    filename = _get_reports_dir(command) / name
+    await loop.run_in_executor(None, memory_profiler.write_report, filename, rows)
+
+    return command.finish(
+        memory={
+            "filename": str(filename),
+            "baseline": False,
+            "top": [f"{row['size_diff']:+d} B {row['site']}" for row in rows],
+        }
+    )
+
+
+@memory.command(name="stop")
+async def memory_stop(command: CommandType, *_):
+    """Stops tracing memory allocations."""
+
+    # Freeing the traces can take a while.
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, command.actor.memory_profiler.stop)
+
+    return command.finish(text="Memory tracing stopped.")
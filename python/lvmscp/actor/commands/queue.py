@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: queue.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import shlex
+from dataclasses import asdict
+
+from typing import TYPE_CHECKING
+
+import click
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["queue"]
+
+
+@parser.group()
+def queue(*args):
+    """Manages the queue of exposures run by the actor."""
+
+    pass
+
+
+@queue.command(context_settings={"ignore_unknown_options": True})
+@click.option(
+    "-p",
+    "--priority",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Priority of the job. Jobs with higher priority run first.",
+)
+@click.argument("EXPOSE-ARGS", nargs=-1, type=click.UNPROCESSED)
+async def submit(
+    command: CommandType,
+    *_,
+    expose_args: tuple[str, ...] = (),
+    priority: int = 0,
+):
+    """Adds an exposure to the queue. EXPOSE-ARGS are the arguments of expose."""
+
+    # Reject invalid arguments now instead of when the job runs.
+    try:
+        parser.commands["expose"].make_context("expose", list(expose_args))
+    except click.ClickException as err:
+        return command.fail(f"Invalid expose arguments: {err.format_message()}")
+
+    job = command.actor.exposure_queue.submit(shlex.join(expose_args), priority)
+
+    return command.finish(exposure_queue_job=asdict(job))
+
+
+@queue.command(name="list")
+async def list_(command: CommandType, *_):
+    """Outputs the jobs in the queue."""
+
+    return command.finish(exposure_queue=command.actor.exposure_queue.get_status())
+
+
+@queue.command()
+@click.argument("JOB-IDS", type=int, nargs=-1)
+@click.option("--all", "all_jobs", is_flag=True, help="Cancel all the queued jobs.")
+async def cancel(
+    command: CommandType,
+    *_,
+    job_ids: tuple[int, ...] = (),
+    all_jobs: bool = False,
+):
+    """Cancels queued jobs. Use abort to stop the running exposure."""
+
+    exposure_queue = command.actor.exposure_queue
+
+    if all_jobs:
+        job_ids = tuple(job.job_id for job in exposure_queue.queued)
+    elif len(job_ids) == 0:
+        return command.fail("No jobs to cancel.")
+
+    for job_id in job_ids:
+        try:
+            exposure_queue.cancel(job_id)
+        except (KeyError, ValueError) as err:
+            return command.fail(str(err.args[0]))
+
+    return command.finish(exposure_queue=exposure_queue.get_status())
+
+
+@queue.command()
+@click.argument("JOB-ID", type=int)
+@click.argument("PRIORITY", type=int)
+async def priority(command: CommandType, *_, job_id: int, priority: int):
+    """Changes the priority of a queued job."""
+
+    exposure_queue = command.actor.exposure_queue
+
+    try:
+        exposure_queue.set_priority(job_id, priority)
+    except (KeyError, ValueError) as err:
+        return command.fail(str(err.args[0]))
+
+    return command.finish(exposure_queue=exposure_queue.get_status())
+
+
+@queue.command()
+async def pause(command: CommandType, *_):
+    """Stops starting queued jobs. The running exposure is not affected."""
+
+    command.actor.exposure_queue.pause(True)
+
+    return command.finish(exposure_queue=command.actor.exposure_queue.get_status())
+
+
+@queue.command()
+async def resume(command: CommandType, *_):
+    """Resumes running the queued jobs."""
+
+    command.actor.exposure_queue.pause(False)
+
+    return command.finish(exposure_queue=command.actor.exposure_queue.get_status())
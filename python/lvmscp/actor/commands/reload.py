@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: reload.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import click
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["reload_config"]
+
+
+@parser.command(name="reload-config")
+@click.argument("PATH", type=click.Path(exists=True, dir_okay=False), required=False)
+async def reload_config(command: CommandType, *_, path: str | None = None):
+    """Reloads the header, lamps, timeouts, and header sources configuration.
+
+    PATH is the user configuration file, by default the one with which the actor
+    was started. The sections are replaced between exposures and the controllers
+    stay connected. Changes to other sections require restarting the actor.
+
+    """
+
+    actor = command.actor
+
+    if actor.exposure_delegate.lock.locked():
+        command.info("Waiting for the exposure to finish.")
+
+    try:
+        reloaded, restart = await actor.reload_config(path)
+    except Exception as err:
+        return command.fail(f"Configuration not reloaded: {err}")
+
+    if len(restart) > 0:
+        command.warning(f"Changes to {restart} require restarting the actor.")
+
+    return command.finish(
+        config_reload={"reloaded": reloaded, "restart_required": restart}
+    )
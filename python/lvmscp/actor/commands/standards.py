@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: standards.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import json
+
+from typing import TYPE_CHECKING
+
+import click
+
+from lvmscp.standards import MAX_STANDARDS, validate_standards
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["standards"]
+
+
+@parser.group()
+def standards(*args):
+    """Sets the table of standards for the current exposure."""
+
+    pass
+
+
+@standards.command(name="set")
+@click.argument("TABLE", type=str)
+async def set_standard(command: CommandType, *_, table: str):
+    """Sets the standards from a JSON array of rows.
+
+    Each row is an object with keys id, ra, dec, acquired, t0, t1, exptime, and
+    fibre (only id is required). The table replaces any previous one and is
+    cleared after the exposure is read out.
+
+    """
+
+    try:
+        rows = json.loads(table)
+    except json.JSONDecodeError as err:
+        return command.fail(f"Invalid JSON: {err}")
+
+    cards = command.actor.config.get("standards", {}).get("cards", True)
+
+    try:
+        rows = validate_standards(rows, max_standards=MAX_STANDARDS if cards else None)
+    except ValueError as err:
+        return command.fail(str(err))
+
+    command.actor.exposure_delegate.standards = rows
+
+    return command.finish(standards={"n_standards": len(rows)})
+
+
+@standards.command()
+async def clear(command: CommandType, *_):
+    """Clears the table of standards."""
+
+    command.actor.exposure_delegate.standards = None
+
+    return command.finish(standards={"n_standards": 0})
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: traffic.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import os
+import pathlib
+import time
+
+from typing import TYPE_CHECKING
+
+import click
+
+from lvmscp.replay import TrafficRecorder
+
+from . import parser
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import CommandType
+
+
+__all__ = ["traffic"]
+
+
+@parser.group()
+def traffic(*args):
+    """Records the traffic with other actors for offline replay."""
+
+    pass
+
+
+@traffic.command()
+@click.argument("PATH", type=str, required=False)
+async def start(command: CommandType, *_, path: str | None = None):
+    """Starts recording to PATH (by default in <log_dir>/traffic)."""
+
+    actor = command.actor
+
+    if actor.traffic_recorder is not None:
+        return command.fail(f"Already recording to {actor.traffic_recorder.path}.")
+
+    if path is None:
+        log_dir = actor.config["actor"].get("log_dir", None)
+        log_dir = log_dir or os.environ.get("TMPDIR", "/tmp")
+
+        filename = f"traffic-{time.strftime('%Y%m%dT%H%M%S')}.jsonl"
+        path = str(pathlib.Path(log_dir).expanduser() / "traffic" / filename)
+
+    actor.traffic_recorder = TrafficRecorder(path)
+    actor.traffic_recorder.start()
+
+    return command.finish(traffic={"recording": True, "path": path, "n_records": 0})
+
+
+@traffic.command()
+async def stop(command: CommandType, *_):
+    """Stops recording."""
+
+    recorder = command.actor.traffic_recorder
+    if recorder is None:
+        return command.fail("Traffic is not being recorded.")
+
+    command.actor.traffic_recorder = None
+
+    # Waits for the pending records to be written without blocking the loop.
+    await asyncio.get_running_loop().run_in_executor(None, recorder.stop)
+
+    return command.finish(
+        traffic={
+            "recording": False,
+            "path": str(recorder.path),
+            "n_records": recorder.n_records,
+            "dropped": recorder.dropped,
+        }
+    )
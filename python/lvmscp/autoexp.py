@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: autoexp.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from typing import Any, Mapping, Sequence
+
+import numpy
+from astropy.io import fits
+from numpy.lib.stride_tricks import sliding_window_view
+
+from lvmscp.masters import parse_section
+
+
+__all__ = [
+    "LineLevels",
+    "get_line_levels",
+    "get_auto_exposure_time",
+    "median_filter",
+    "read_test_frames",
+]
+
+
+# Number of rows median-filtered at once, to limit the memory used.
+CHUNK_ROWS: int = 256
+
+
+def _get_data_sections(data: numpy.ndarray, header: fits.Header):
+    """Returns the data sections of a frame, without the overscan.
+
+    The whole frame is returned if the header does not have the ``TRIMSEC``
+    keywords or they do not match the frame.
+
+    """
+
+    sections: list[numpy.ndarray] = []
+
+    for quad in range(1, 5):
+        trimsec = header.get(f"TRIMSEC{quad}", None)
+        if trimsec is None:
+            break
+
+        rows, cols = parse_section(trimsec)
+        if rows.stop > data.shape[0] or cols.stop > data.shape[1]:
+            return [data]
+
+        sections.append(data[rows, cols])
+
+    return sections if len(sections) > 0 else [data]
+
+
+def read_test_frames(filenames: Sequence[str]) -> dict[str, list[numpy.ndarray]]:
+    """Reads the data sections of the test frames, keyed by the ``CCD`` keyword.
+
+    Each quadrant (``TRIMSEC1`` to ``TRIMSEC4``) is returned as a separate array,
+    so that the overscan is excluded and each quadrant has its own background.
+
+    """
+
+    frames: dict[str, list[numpy.ndarray]] = {}
+
+    for filename in filenames:
+        with fits.open(filename) as hdul:
+            hdu = hdul[1] if hdul[0].data is None and len(hdul) > 1 else hdul[0]
+            ccd = hdu.header.get("CCD", None) or hdul[0].header.get("CCD", filename)
+            data = numpy.asarray(hdu.data, dtype=numpy.float32)
+            frames[ccd] = _get_data_sections(data, hdu.header)
+
+    return frames
+
+
+def median_filter(data: numpy.ndarray, size: int = 3) -> numpy.ndarray:
+    """Median-filters an image with a square box of ``size`` pixels.
+
+    The edges are not padded, so the output is ``size - 1`` pixels smaller in
+    each axis. Returns the data unchanged if ``size`` is one or less.
+
+    """
+
+    if size <= 1:
+        return data
+
+    if data.shape[0] < size or data.shape[1] < size:
+        return numpy.zeros((0, 0), dtype=data.dtype)
+
+    filtered = []
+    for row0 in range(0, data.shape[0] - size + 1, CHUNK_ROWS):
+        chunk = data[row0 : row0 + CHUNK_ROWS + size - 1]
+        windows = sliding_window_view(chunk, (size, size))
+        filtered.append(numpy.median(windows, axis=(-2, -1)))
+
+    return numpy.concatenate(filtered)
+
+
+@dataclass
+class LineLevels:
+    """The line levels measured in a set of test frames.
+
+    Each attribute is an array with one value per frame.
+
+    Parameters
+    ----------
+    peak
+        The background-subtracted peak of the median-filtered frame.
+    high
+        The background-subtracted high percentile of the frame.
+    background
+        The background, estimated as the median of the frame.
+    noise
+        The noise, estimated from the median absolute deviation of the frame.
+
+    """
+
+    peak: numpy.ndarray
+    high: numpy.ndarray
+    background: numpy.ndarray
+    noise: numpy.ndarray
+
+
+def _measure(data: numpy.ndarray, percentile: float, filter_size: int):
+    """Returns the peak, high percentile, background, and noise of an image."""
+
+    if data.size == 0:
+        return numpy.nan, numpy.nan, numpy.nan, numpy.nan
+
+    background, high = numpy.percentile(data, [50, percentile])
+    noise = 1.4826 * numpy.median(numpy.abs(data - background))
+
+    filtered = median_filter(data, size=filter_size)
+    peak = filtered.max() if filtered.size > 0 else numpy.nan
+
+    return peak - background, high - background, background, noise
+
+
+def get_line_levels(
+    frames: Sequence[numpy.ndarray | Sequence[numpy.ndarray]],
+    percentile: float = 99.9,
+    filter_size: int = 3,
+) -> LineLevels:
+    """Measures the line levels of each frame.
+
+    The peak is measured on the frame median-filtered with a box of
+    ``filter_size`` pixels, so that single hot pixels and cosmic rays are
+    rejected. The background of each frame, estimated as its median, is
+    subtracted.
+
+    Parameters
+    ----------
+    frames
+        The frames for each CCD. Each frame can be an image or a list of the
+        data sections of the image, as returned by `.read_test_frames`, in which
+        case the values of the section with the highest peak are used.
+    percentile
+        The percentile of the pixel values to return, in addition to the peak.
+    filter_size
+        The size of the median filter.
+
+    """
+
+    values: list[tuple[float, float, float, float]] = []
+
+    for frame in frames:
+        sections = [frame] if isinstance(frame, numpy.ndarray) else list(frame)
+        levels = [_measure(data, percentile, filter_size) for data in sections]
+
+        peaks = [level[0] for level in levels]
+        if len(levels) == 0 or numpy.all(numpy.isnan(peaks)):
+            values.append((numpy.nan, numpy.nan, numpy.nan, numpy.nan))
+        else:
+            values.append(levels[int(numpy.nanargmax(peaks))])
+
+    columns = numpy.array(values, dtype=numpy.float64).reshape(-1, 4).T
+
+    return LineLevels(*columns)
+
+
+def get_auto_exposure_time(
+    test_exptime: float,
+    peaks: numpy.ndarray,
+    config: Mapping[str, Any],
+    backgrounds: numpy.ndarray | None = None,
+    noises: numpy.ndarray | None = None,
+) -> tuple[float, bool]:
+    """Scales the exposure time of a test frame to reach the target peak.
+
+    The exposure time is chosen so that the brightest of the CCDs reaches
+    ``target_peak`` counts, and is reduced if the peak plus the background of
+    any CCD would go over the ``saturation`` level. The result is clipped to
+    ``min_exptime`` and ``max_exptime``. Only the CCDs with a peak of at least
+    ``min_significance`` times the noise are considered to have lines.
+
+    Parameters
+    ----------
+    test_exptime
+        The exposure time of the test frame.
+    peaks
+        The background-subtracted peak counts of each CCD in the test frame.
+    config
+        The ``focus.auto_exptime`` configuration section.
+    backgrounds
+        The background counts of each CCD in the test frame. Assumed to be zero
+        if not set.
+    noises
+        The noise of each CCD in the test frame. If not set, any positive peak
+        is considered a line.
+
+    Returns
+    -------
+    exptime
+        A tuple with the new exposure time, rounded to 0.1 seconds, and whether
+        the exposure time was limited by the saturation, the ``min_exptime``, or
+        the ``max_exptime``.
+
+    Raises
+    ------
+    ValueError
+        If the test frame has no lines or is saturated, in which case its peak
+        cannot be used to scale the exposure time.
+
+    """
+
+    target_peak = config.get("target_peak", 30000)
+    saturation = config.get("saturation", 60000)
+    min_exptime = config.get("min_exptime", 1.0)
+    max_exptime = config.get("max_exptime", 300.0)
+    min_significance = config.get("min_significance", 10.0)
+
+    if test_exptime <= 0:
+        raise ValueError("The exposure time of the test frame must be positive.")
+
+    peaks = numpy.asarray(peaks, dtype=numpy.float64)
+    if backgrounds is None:
+        backgrounds = numpy.zeros_like(peaks)
+    backgrounds = numpy.asarray(backgrounds, dtype=numpy.float64)
+
+    if numpy.any(peaks + backgrounds >= saturation):
+        raise ValueError("The test frame is saturated. Use a shorter exposure time.")
+
+    if noises is None:
+        noises = numpy.zeros_like(peaks)
+    noises = numpy.asarray(noises, dtype=numpy.float64)
+
+    valid = numpy.isfinite(peaks) & (peaks > 0) & (peaks >= min_significance * noises)
+    if not numpy.any(valid):
+        raise ValueError("No lines detected in the test frame. Are the lamps on?")
+
+    rates = peaks[valid] / test_exptime
+    exptime = target_peak / rates.max()
+
+    limited = False
+    max_saturation = numpy.min((saturation - backgrounds[valid]) / rates)
+    if exptime > max_saturation:
+        exptime = max_saturation
+        limited = True
+
+    if exptime < min_exptime or exptime > max_exptime:
+        exptime = float(numpy.clip(exptime, min_exptime, max_exptime))
+        limited = True
+
+    return round(float(exptime), 1), limited
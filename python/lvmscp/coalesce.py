@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: coalesce.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+
+
+__all__ = ["CommandCoalescer", "DEFAULT_PATTERNS"]
+
+
+# The actor, command string, and keyword arguments of a command.
+CoalescingKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+# Commands that only query a status and can be safely shared between callers.
+DEFAULT_PATTERNS: list[str] = [r"(^|\s)status(\s|$)", r"(^|\s)getpower(\s|$)"]
+
+
+class CommandCoalescer:
+    """Shares the result of identical in-flight commands to other actors.
+
+    If a command matching one of the ``patterns`` is sent to an actor while an
+    identical command (same actor, command string, and keyword arguments such as
+    ``time_limit`` or ``internal``) is still running, the new
+    caller waits for the running command and receives the same `~clu.Command`
+    instead of sending a new message. Optionally, the result of a successful
+    command is reused for ``ttl`` seconds after it finishes.
+
+    Only commands that are awaited until they finish and that do not have a reply
+    callback are coalesced.
+
+    Parameters
+    ----------
+    patterns
+        Regular expressions matched against the command string. Only matching
+        commands are coalesced. They must correspond to idempotent commands.
+    ttl
+        Time, in seconds, for which the result of a successful command is reused.
+        Zero disables the cache and only in-flight commands are shared.
+    enabled
+        If `False`, all commands are sent.
+    on_coalesced
+        A function called with the name of the actor each time a command is not
+        sent because its result was shared.
+
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[str] = DEFAULT_PATTERNS,
+        ttl: float = 0.0,
+        enabled: bool = True,
+        on_coalesced: Callable[[str], Any] | None = None,
+    ):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.ttl = ttl
+        self.enabled = enabled
+        self.on_coalesced = on_coalesced
+
+        self._in_flight: dict[CoalescingKey, asyncio.Task] = {}
+        self._cache: dict[CoalescingKey, tuple[float, Any]] = {}
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], **kwargs):
+        """Creates an instance from the ``coalescing`` configuration section."""
+
+        return cls(
+            patterns=config.get("patterns", DEFAULT_PATTERNS),
+            ttl=config.get("ttl", 0.0),
+            enabled=config.get("enabled", False),
+            **kwargs,
+        )
+
+    def can_coalesce(self, command_string: str, **kwargs) -> bool:
+        """Returns whether a command can share the result of an identical one."""
+
+        if not self.enabled:
+            return False
+
+        if not kwargs.get("await_command", True):
+            return False
+
+        if kwargs.get("reply_callback", None) or kwargs.get("callback", None):
+            return False
+
+        return any(pattern.search(command_string) for pattern in self.patterns)
+
+    @staticmethod
+    def get_key(target: str, command_string: str, **kwargs) -> CoalescingKey:
+        """Returns the key that identifies identical commands.
+
+        Commands are only identical if they are sent to the same actor with the
+        same command string and keyword arguments (``time_limit``, ``internal``,
+        etc.)
+
+        """
+
+        return (
+            target,
+            command_string,
+            tuple(sorted((key, repr(value)) for key, value in kwargs.items())),
+        )
+
+    async def send(
+        self,
+        send_command: Callable[..., Awaitable[Any]],
+        target: str,
+        command_string: str,
+        **kwargs,
+    ):
+        """Sends a command or shares the result of an identical one.
+
+        Parameters
+        ----------
+        send_command
+            The coroutine function used to send the command. It's called with
+            ``target``, ``command_string``, and ``kwargs``.
+        target
+            The actor to command.
+        command_string
+            The command string.
+        kwargs
+            Other arguments to pass to ``send_command``.
+
+        Returns
+        -------
+        command
+            The finished command.
+
+        """
+
+        if not self.can_coalesce(command_string, **kwargs):
+            return await send_command(target, command_string, **kwargs)
+
+        key = self.get_key(target, command_string, **kwargs)
+
+        if key in self._cache:
+            expires, command = self._cache[key]
+            if time.monotonic() < expires:
+                self._coalesced(target)
+                return command
+            del self._cache[key]
+
+        if key in self._in_flight:
+            self._coalesced(target)
+            return await asyncio.shield(self._in_flight[key])
+
+        task = asyncio.create_task(send_command(target, command_string, **kwargs))
+        task.add_done_callback(lambda task: self._done(key, task))
+        self._in_flight[key] = task
+
+        # Shield the task so that a cancelled caller does not cancel the command
+        # for the callers that are sharing it.
+        return await asyncio.shield(task)
+
+    def clear(self):
+        """Clears the cached results."""
+
+        self._cache.clear()
+
+    def _coalesced(self, target: str):
+        """Notifies that a command was not sent."""
+
+        if self.on_coalesced is not None:
+            self.on_coalesced(target)
+
+    def _done(self, key: CoalescingKey, task: asyncio.Task):
+        """Removes a finished command and caches its result."""
+
+        if self._in_flight.get(key, None) is task:
+            del self._in_flight[key]
+
+        if self.ttl <= 0 or task.cancelled() or task.exception() is not None:
+            return
+
+        command = task.result()
+        status = getattr(command, "status", None)
+        if status is None or status.did_succeed:
+            self._cache[key] = (time.monotonic() + self.ttl, command)
@@ -6,6 +6,12 @@
 # @Filename: controller.py
 # @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
 
+from __future__ import annotations
+
+import time
+
+from typing import Any, Callable, Optional
+
 from archon.controller import ArchonController
 
 
@@ -19,3 +25,62 @@ class SCPController(ArchonController):
         # This is useful when deploying multiple instances of the actors, e.g.,
         # lvmscp.sp1, lvmieb.sp1, etc.
         self.lvmieb: str = self.config["controllers"][name].get("lvmieb", "lvmieb")
+
+        # When and how the detectors were last cleared. None if unknown. Whether
+        # the timing script is flushing them while idle is kept by
+        # ArchonController.set_autoflush in auto_flush.
+        self.last_cleared: float | None = None
+        self.last_cleared_by: str | None = None
+
+    async def flush(self, count: int = 2, wait_for: Optional[float] = None):
+        """Flushes the detector and records when it was cleared."""
+
+        await super().flush(count=count, wait_for=wait_for)
+
+        self.last_cleared = time.time()
+        self.last_cleared_by = "flush"
+
+    async def readout(
+        self,
+        force: bool = False,
+        block: bool = True,
+        delay: int = 0,
+        wait_for: float | None = None,
+        notifier: Optional[Callable[[str], None]] = None,
+        idle_after: bool = True,
+    ):
+        """Reads the detector and, if blocking, records when it was cleared."""
+
+        wbuf = await super().readout(
+            force=force,
+            block=block,
+            delay=delay,
+            wait_for=wait_for,
+            notifier=notifier,
+            idle_after=idle_after,
+        )
+
+        if block:
+            self.last_cleared = time.time()
+            self.last_cleared_by = "readout"
+
+        return wbuf
+
+    def get_flush_state(self) -> dict[str, Any]:
+        """Returns the time since the detectors were cleared and the idle flushing.
+
+        ``since_cleared`` is the time, in seconds, since the last readout or
+        flush, or `None` if the detectors have not been cleared since the actor
+        started.
+
+        """
+
+        since_cleared: float | None = None
+        if self.last_cleared is not None:
+            since_cleared = round(time.time() - self.last_cleared, 1)
+
+        return {
+            "autoflush": self.auto_flush,
+            "since_cleared": since_cleared,
+            "cleared_by": self.last_cleared_by,
+        }
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: cryo.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import time
+
+from typing import Any, Mapping
+
+import numpy
+from astropy.time import Time
+
+
+__all__ = ["CryoHistory"]
+
+
+# Header keywords from which the samples of each quantity are taken. The depth
+# is the average of the three probes.
+DEFAULT_KEYS: dict[str, list[str]] = {
+    "depth": ["DEPTHA", "DEPTHB", "DEPTHC"],
+    "pressure": ["PRESSURE"],
+}
+
+# Value at which each quantity is considered to be at its limit: an empty LN2
+# reservoir [mm] or a cryostat that is warming up [torr].
+DEFAULT_LIMITS: dict[str, float] = {"depth": 0.0, "pressure": 1e-4}
+
+# Increase in a reading that is considered a fill. The history of the quantity
+# is reset when that happens.
+DEFAULT_FILL_JUMPS: dict[str, float | None] = {"depth": 5.0, "pressure": None}
+
+
+class CryoHistory:
+    """A compact history of cryostat readings with a running linear fit.
+
+    Each series (one per CCD and quantity) is stored in a fixed-size ring buffer.
+    The sums needed for a least-squares linear fit of the value versus time are
+    updated as samples are added and removed from the buffer, so the fits for all
+    the series are calculated at once from a small array of sums.
+
+    Parameters
+    ----------
+    capacity
+        The maximum number of samples kept for each series.
+    min_samples
+        The minimum number of samples needed to forecast a series.
+    keys
+        A mapping of quantity to the header keywords from which it's measured.
+    limits
+        A mapping of quantity to the value at which the limit is reached.
+    fill_jumps
+        A mapping of quantity to the increase between consecutive samples that
+        indicates a fill, after which the history of the series is discarded.
+
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        min_samples: int = 5,
+        keys: Mapping[str, list[str]] = DEFAULT_KEYS,
+        limits: Mapping[str, float] = DEFAULT_LIMITS,
+        fill_jumps: Mapping[str, float | None] = DEFAULT_FILL_JUMPS,
+    ):
+        self.capacity = capacity
+        self.min_samples = min_samples
+
+        self.keys = dict(keys)
+        self.limits = dict(limits)
+        self.fill_jumps = dict(fill_jumps)
+
+        # Times are stored in hours since the first sample to keep the sums small.
+        self.t_ref: float | None = None
+
+        self.series: list[tuple[str, str]] = []
+        self._rows: dict[tuple[str, str], int] = {}
+
+        self.times = numpy.zeros((0, capacity), dtype=numpy.float64)
+        self.values = numpy.zeros((0, capacity), dtype=numpy.float64)
+        self.counts = numpy.zeros(0, dtype=numpy.int64)
+        self.positions = numpy.zeros(0, dtype=numpy.int64)
+
+        # Running n, sum(t), sum(y), sum(t^2), sum(t*y) for each series.
+        self.sums = numpy.zeros((0, 5), dtype=numpy.float64)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]):
+        """Creates a history from the ``cryo`` configuration section."""
+
+        return cls(
+            capacity=config.get("capacity", 1024),
+            min_samples=config.get("min_samples", 5),
+            keys=config.get("keys", DEFAULT_KEYS),
+            limits={**DEFAULT_LIMITS, **config.get("limits", {})},
+            fill_jumps={**DEFAULT_FILL_JUMPS, **config.get("fill_jumps", {})},
+        )
+
+    def _get_row(self, ccd: str, quantity: str) -> int:
+        """Returns the row for a series, adding it if needed."""
+
+        key = (ccd, quantity)
+        if key in self._rows:
+            return self._rows[key]
+
+        row = len(self.series)
+        self.series.append(key)
+        self._rows[key] = row
+
+        zeros = numpy.zeros((1, self.capacity), dtype=numpy.float64)
+        self.times = numpy.vstack([self.times, zeros])
+        self.values = numpy.vstack([self.values, zeros])
+        self.counts = numpy.append(self.counts, 0)
+        self.positions = numpy.append(self.positions, 0)
+        self.sums = numpy.vstack([self.sums, numpy.zeros((1, 5))])
+
+        return row
+
+    def _contribution(self, t: float, value: float):
+        """Returns the contribution of a sample to the running sums."""
+
+        return numpy.array([1.0, t, value, t * t, t * value])
+
+    def reset(self, ccd: str, quantity: str):
+        """Discards the history of a series."""
+
+        row = self._get_row(ccd, quantity)
+
+        self.counts[row] = 0
+        self.positions[row] = 0
+        self.sums[row] = 0.0
+
+    def add(self, ccd: str, quantity: str, value: float, t: float | None = None):
+        """Adds a sample.
+
+        Parameters
+        ----------
+        ccd
+            The CCD (cryostat) to which the sample belongs.
+        quantity
+            The quantity measured, e.g., ``depth`` or ``pressure``.
+        value
+            The value of the sample.
+        t
+            The UNIX time of the sample. Defaults to now.
+
+        """
+
+        if value is None or not numpy.isfinite(value):
+            return
+
+        t_unix = time.time() if t is None else t
+        if self.t_ref is None:
+            self.t_ref = t_unix
+        th = (t_unix - self.t_ref) / 3600.0
+
+        row = self._get_row(ccd, quantity)
+        count = int(self.counts[row])
+        pos = int(self.positions[row])
+
+        fill_jump = self.fill_jumps.get(quantity, None)
+        if count > 0 and fill_jump is not None:
+            last = self.values[row, (pos - 1) % self.capacity]
+            if value - last > fill_jump:
+                self.reset(ccd, quantity)
+                count = pos = 0
+
+        if count == self.capacity:
+            old = self._contribution(self.times[row, pos], self.values[row, pos])
+            self.sums[row] -= old
+            count -= 1
+
+        self.times[row, pos] = th
+        self.values[row, pos] = value
+        self.sums[row] += self._contribution(th, value)
+
+        self.counts[row] = count + 1
+        self.positions[row] = (pos + 1) % self.capacity
+
+    def add_header_values(
+        self,
+        ccd: str,
+        header_values: Mapping[str, Any],
+        t: float | None = None,
+    ):
+        """Adds samples from the header values of a CCD.
+
+        ``header_values`` is a mapping of header keyword to value or to a tuple of
+        value and comment. Quantities measured from several keywords use the mean.
+
+        """
+
+        for quantity, keys in self.keys.items():
+            samples = []
+            for key in keys:
+                value = header_values.get(key, None)
+                if isinstance(value, (tuple, list)):
+                    value = value[0]
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    samples.append(float(value))
+
+            samples = [sample for sample in samples if numpy.isfinite(sample)]
+            if len(samples) > 0:
+                self.add(ccd, quantity, float(numpy.mean(samples)), t=t)
+
+    def forecast(self, now: float | None = None) -> dict[str, dict[str, Any]]:
+        """Returns the forecast for each series.
+
+        Returns
+        -------
+        forecast
+            A nested mapping of CCD to quantity to a dictionary with the current
+            fitted ``value``, the ``rate`` of change per hour, the number of
+            samples, the ``limit``, the hours until the limit is reached
+            (``time_to_limit``), and the ISO date at which that happens
+            (``limit_time``). Values that cannot be calculated are `None`.
+
+        """
+
+        result: dict[str, dict[str, Any]] = {}
+
+        if len(self.series) == 0 or self.t_ref is None:
+            return result
+
+        now_unix = time.time() if now is None else now
+        t_now = (now_unix - self.t_ref) / 3600.0
+
+        n, st, sy, stt, sty = self.sums.T
+        limits = numpy.array(
+            [self.limits.get(quantity, numpy.nan) for _, quantity in self.series]
+        )
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            denom = n * stt - st**2
+            slope = (n * sty - st * sy) / denom
+            intercept = (sy - slope * st) / n
+            fitted = intercept + slope * t_now
+            time_to_limit = (limits - fitted) / slope
+
+        enough = (n >= self.min_samples) & (denom > 0)
+        slope = numpy.where(enough, slope, numpy.nan)
+        fitted = numpy.where(enough, fitted, numpy.nan)
+        time_to_limit = numpy.where(enough & (time_to_limit >= 0), time_to_limit, -1)
+
+        for row, (ccd, quantity) in enumerate(self.series):
+            ttl = float(time_to_limit[row])
+            limit_time = None
+            if ttl >= 0:
+                limit_time = Time(now_unix + ttl * 3600, format="unix").isot
+
+            result.setdefault(ccd, {})[quantity] = {
+                "value": _to_float(fitted[row]),
+                "rate": _to_float(slope[row]),
+                "n_samples": int(self.counts[row]),
+                "limit": _to_float(limits[row]),
+                "time_to_limit": round(ttl, 2) if ttl >= 0 else None,
+                "limit_time": limit_time,
+            }
+
+        return result
+
+
+def _to_float(value: Any) -> float | None:
+    """Converts a value to float, replacing NaNs with `None`."""
+
+    value = float(value)
+
+    return value if numpy.isfinite(value) else None
@@ -9,27 +9,51 @@
 from __future__ import annotations
 
 import asyncio
+import os
 import time
+from dataclasses import asdict
+from functools import partial
+from tempfile import NamedTemporaryFile
 
-from typing import TYPE_CHECKING, Any, Literal
+from typing import TYPE_CHECKING, Any, List, Literal
 
 import numpy
 from astropy.coordinates import EarthLocation
+from astropy.io import fits
 from astropy.time import Time
 from astropy.utils import iers
 from astropy.utils.iers import conf
 
 from archon.actor import ExposureDelegate
-from archon.controller import ControllerStatus
+from archon.controller import ArchonController, ControllerStatus
+from archon.exceptions import ArchonError
 from sdsstools.time import get_sjd
+from sdsstools.utils import cancel_task
 
 from lvmscp import __version__
+from lvmscp.header_sources import (
+    HeaderSource,
+    HeaderSourceReply,
+    get_header_values,
+    load_header_sources,
+)
+from lvmscp.hooks import get_file_context
+from lvmscp.standards import standards_to_cards, standards_to_table
+from lvmscp.tools import append_manifest, finalise_file
+from lvmscp.window import (
+    get_frame_shape,
+    get_readout_fraction,
+    get_window_sections,
+)
 
 
 if TYPE_CHECKING:
     from archon.actor.delegate import FetchDataDict
     from clu import Command
 
+    from lvmscp.controller import SCPController
+    from lvmscp.metrics import SCPMetrics
+
     from .actor import SCPActor
 
 
@@ -43,6 +67,10 @@ iers.earth_orientation_table.set(iers_a)
 
 EXPECTED_READOUT_TIME: float = 55
 
+# Minimum time to read a windowed frame. The controller takes a few seconds to
+# start filling the buffer, which is then polled every second.
+MIN_READOUT_TIME: float = 5
+
 
 class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
     """Expose delegate for LVM."""
@@ -53,12 +81,15 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
         self.use_shutter: bool = True
         self.shutter_failed: bool = False
 
-        # Header values to be collected during integration.
-        self.header_data: dict[str, Any] = {}
+        # The groups of header sources to run during the integration. None runs
+        # all of them.
+        self.cotasks: list[str] | None = None
+
+        # Replies from the header sources received during integration.
+        self.header_replies: list[HeaderSourceReply] = []
 
-        # Pressure and depth probe data. These data is per CCD/cryostat.
-        self.pressure_data: dict[str, float] = {}
-        self.depth_data: dict[str, float | str] = {}
+        # Table of standards for the current exposure.
+        self.standards: list[dict[str, Any]] | None = None
 
         # LCO
         self.location = EarthLocation.from_geodetic(
@@ -67,15 +98,203 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
             height=2282.0,
         )
 
+        # Whether the outcome of the current exposure has been added to the metrics.
+        self._outcome_recorded: bool = False
+        self._readout_t0: float | None = None
+
+        # Digests of the files written, calculated as the files are written.
+        self._checksums: dict[str, str] = {}
+
+        # Task that publishes the progress of the exposure and the current phase.
+        self._progress_task: asyncio.Task | None = None
+        self._progress_phase: str | None = None
+        self._progress_t0: float | None = None
+        self._progress_readout_t0: float | None = None
+
+        # The window preset used for the last exposure, if any.
+        self._window_preset: str | None = None
+
+        # Whether the header source replies have been saved for this exposure.
+        self._telemetry_saved: bool = False
+
+        # The flush state of each controller when the exposure started.
+        self._flush_state: dict[str, dict[str, Any]] = {}
+
+        self._check_compression()
+
+    def _check_compression(self):
+        """Checks that the compression mode is compatible with the file template."""
+
+        files_config = self.actor.config["files"]
+        compression = files_config.get("compression", "gzip")
+        template: str = files_config.get("template", "")
+
+        if compression not in ["gzip", "rice"]:
+            raise ValueError(f"Invalid compression mode {compression!r}.")
+
+        if compression == "rice" and template.endswith(".gz"):
+            raise ValueError(
+                "Rice tile compression cannot be used with a gzipped file template. "
+                "Use a template ending in .fits.fz."
+            )
+
+    @property
+    def metrics(self) -> SCPMetrics:
+        """Returns the metrics registry of the actor."""
+
+        return self.actor.metrics
+
     async def reset(self):
-        self.header_data = {}
-        self.pressure_data = {}
-        self.depth_data = {}
+        self.header_replies = []
+        self.standards = None
+        self._checksums = {}
 
         self.use_shutter = True
+        self.cotasks = None
+        self._telemetry_saved = False
+        self._flush_state = {}
+
+        await self._stop_progress()
 
         return await super().reset()
 
+    async def fail(self, message: str | None = None):
+        """Fails the command and marks the exposure progress as failed."""
+
+        if self._progress_phase is not None:
+            self._progress_phase = "failed"
+
+        return await super().fail(message)
+
+    async def pre_expose(self, controllers: List[ArchonController]):
+        """Starts publishing the exposure progress before integration begins."""
+
+        if self.expose_data and self._window_preset:
+            self.expose_data.window_mode = self._window_preset
+
+        await self.pre_flush(controllers)
+
+        self._start_progress()
+
+        return await super().pre_expose(controllers)
+
+    async def pre_flush(self, controllers: List[ArchonController]):
+        """Flushes the detectors before integrating, if needed.
+
+        The ACF flushes the detectors while idle, so usually there is no need to
+        flush them before an exposure. With ``pre_flush.mode: auto``, a controller
+        is only flushed if it was not idle flushing and it has not been read out
+        or flushed in the last ``pre_flush.window`` seconds, for example after the
+        actor restarts or an exposure is aborted. The mode can also be ``always``
+        or ``never``. The state of each controller is recorded in the header.
+
+        """
+
+        pre_flush_config = self.actor.config.get("pre_flush", None) or {}
+        mode = pre_flush_config.get("mode", "never")
+        window = pre_flush_config.get("window", 60.0)
+
+        self._flush_state = {}
+
+        to_flush: list[ArchonController] = []
+        for controller in controllers:
+            state = controller.get_flush_state()  # type: ignore
+            since_cleared = state["since_cleared"]
+
+            if mode == "always":
+                flush = True
+            elif mode == "auto":
+                recently_cleared = since_cleared is not None and since_cleared < window
+                flush = not (state["autoflush"] or recently_cleared)
+            else:
+                flush = False
+
+            self._flush_state[controller.name] = {**state, "pre_flush": flush}
+            self.metrics.pre_flushes.inc(
+                controller=controller.name,
+                outcome="flushed" if flush else "skipped",
+            )
+
+            if flush:
+                to_flush.append(controller)
+
+        if len(to_flush) == 0:
+            return
+
+        count = pre_flush_config.get("count", 1)
+        self.command.debug(text="Flushing detectors before the exposure.")
+
+        results = await asyncio.gather(
+            *[controller.flush(count=count) for controller in to_flush],
+            return_exceptions=True,
+        )
+        for controller, result in zip(to_flush, results):
+            if isinstance(result, Exception):
+                self._flush_state[controller.name]["pre_flush"] = False
+                self.command.warning(f"Failed flushing {controller.name}: {result}")
+
+    async def expose(
+        self,
+        command: Command[SCPActor],
+        controllers: List[ArchonController],
+        flavour: str = "object",
+        exposure_time: float | None = 1.0,
+        readout: bool = True,
+        window_mode: str | None = None,
+        window_params: dict = {},
+        seqno: int | None = None,
+        **readout_params,
+    ) -> bool:
+        """Exposes the controllers.
+
+        ``window_mode`` can be the name of one of the presets in ``window_modes``,
+        which are applied on top of the default window, so parameters not defined
+        in the preset take their full-frame values. After an exposure taken with a
+        preset, the default window is restored unless a new window is requested.
+
+        """
+
+        self._outcome_recorded = False
+
+        presets = self.actor.config.get("window_modes", None) or {}
+        if window_mode in presets:
+            default_window = controllers[0].default_window if controllers else {}
+            window_params = {**default_window, **presets[window_mode], **window_params}
+            self._window_preset = window_mode
+            window_mode = None
+        elif window_mode is None and not window_params:
+            if self._window_preset is not None:
+                window_mode = "default"
+            self._window_preset = None
+        else:
+            self._window_preset = None
+
+        result = await super().expose(
+            command,
+            controllers,
+            flavour=flavour,
+            exposure_time=exposure_time,
+            readout=readout,
+            window_mode=window_mode,
+            window_params=window_params,
+            seqno=seqno,
+            **readout_params,
+        )
+
+        if not result:
+            self._record_outcome(flavour, "failed")
+
+        return result
+
+    def _record_outcome(self, flavour: str, outcome: str):
+        """Records the outcome of an exposure in the metrics, only once."""
+
+        if self._outcome_recorded:
+            return
+
+        self.metrics.exposures.inc(flavour=flavour, outcome=outcome)
+        self._outcome_recorded = True
+
     async def check_expose(self) -> bool:
         """Performs a series of checks to confirm we can expose."""
 
@@ -123,6 +342,13 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
         results = await asyncio.gather(*jobs, return_exceptions=True)
 
         if not all(results):
+            for controller, result in zip(self.expose_data.controllers, results):
+                if result is not True:
+                    self.metrics.shutter_failures.inc(
+                        controller=controller.name,
+                        action=action,
+                    )
+
             self.shutter_failed = True
             if is_retry is False:
                 self.command.warning(text="Some shutters failed to close. Retrying.")
@@ -143,6 +369,101 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
 
         return True
 
+    async def fast_abort(
+        self,
+        command: Command[SCPActor],
+        flush: bool = False,
+        flush_count: int = 1,
+    ) -> dict[str, Any]:
+        """Aborts the current exposure and frees the controllers.
+
+        The exposure task and the cotasks are cancelled, then the shutters are
+        closed and the controllers aborted, all concurrently. Controllers that
+        were waiting for or in the middle of a readout are reset instead, which
+        discards the frame and turns autoflushing back on. Failed shutter moves
+        are reported but not retried. If ``flush=True``, the frame is discarded
+        with ``flush_count`` flushes instead of being read out. Finally, the
+        expose command is failed and the delegate reset.
+
+        Returns
+        -------
+        result
+            A dictionary with the time from the abort to the controllers being
+            idle (``latency``), whether all the shutters closed, and whether the
+            controllers were flushed.
+
+        """
+
+        t0 = time.perf_counter()
+
+        if self.expose_data:
+            controllers = self.expose_data.controllers
+            flavour = self.expose_data.flavour
+        else:
+            controllers = list(self.actor.controllers.values())
+            flavour = "unknown"
+
+        # Stop the exposure before moving the shutters, so it cannot reopen them.
+        self._current_task = await cancel_task(self._current_task)
+        self._expose_cotasks = await cancel_task(self._expose_cotasks)
+
+        # A cancelled readout leaves the controller reading or fetching, and with
+        # autoflush off, so it is reset. Controllers still exposing are aborted.
+        CS = ControllerStatus
+        readout_status = CS.READOUT_PENDING | CS.READING | CS.FETCHING
+
+        jobs = []
+        for controller in controllers:
+            if controller.status & CS.EXPOSING:
+                jobs.append(controller.abort(readout=False))
+            elif controller.status & readout_status:
+                jobs.append(controller.reset(autoflush=True))
+        if self.use_shutter:
+            jobs += [self.move_shutter(contr.name, "close") for contr in controllers]
+
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+
+        n_aborts = len(jobs) - (len(controllers) if self.use_shutter else 0)
+        for result in results[:n_aborts]:
+            if isinstance(result, BaseException):
+                command.warning(f"Failed aborting controller: {result}")
+
+        shutters_closed = True
+        for controller, result in zip(controllers, results[n_aborts:]):
+            if result is not True:
+                shutters_closed = False
+                command.error(f"Shutter {controller.name} failed to close.")
+                self.metrics.shutter_failures.inc(
+                    controller=controller.name,
+                    action="close",
+                )
+
+        self._record_outcome(flavour, "aborted")
+
+        if self._command is not None:
+            await self.fail("Exposure was aborted.")
+        else:
+            await self.reset()
+
+        if flush:
+            command.debug(text="Flushing controllers.")
+            try:
+                await asyncio.gather(
+                    *[contr.flush(count=flush_count) for contr in controllers]
+                )
+            except ArchonError as err:
+                command.warning(f"Failed flushing controllers: {err}")
+                flush = False
+
+        latency = time.perf_counter() - t0
+        self.metrics.abort_seconds.observe(latency, flushed=str(flush).lower())
+
+        return {
+            "latency": round(latency, 3),
+            "shutters_closed": shutters_closed,
+            "flushed": flush,
+        }
+
     async def readout(
         self,
         command: Command[SCPActor],
@@ -158,9 +479,444 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
                 "There may be contamination in the image."
             )
 
+        flavour = self.expose_data.flavour if self.expose_data else "unknown"
+
+        # Lets the commands waiting for this exposure (e.g., focus) know that the
+        # integration is done and the shutter is closed.
+        if self.expose_data and not self.shutter_failed:
+            command.debug(readout_started={"exposure_no": self.expose_data.exposure_no})
+
+        self._set_progress_phase("reading")
+
+        self._readout_t0 = time.perf_counter()
         read_result = await super().readout(command, extra_header, delay_readout, write)
+        self._readout_t0 = None
+
+        result = False if (self.shutter_failed or not read_result) else True
+        self._record_outcome(flavour, "success" if result else "failed")
+
+        return result
+
+    async def fetch_data(self, controller: ArchonController):
+        """Fetches the buffer and compiles the header."""
+
+        # fetch_data is called once the readout of all the controllers is complete.
+        if self._readout_t0 is not None:
+            self.metrics.readout_seconds.observe(time.perf_counter() - self._readout_t0)
+            self._readout_t0 = None
+
+        self._set_progress_phase("fetching")
+
+        t0 = time.perf_counter()
+        ccd_dict = await super().fetch_data(controller)
+        self.metrics.fetch_seconds.observe(
+            time.perf_counter() - t0,
+            controller=controller.name,
+        )
+
+        # Move the frames to the ring so that the fetched buffer can be released.
+        frame_ring = self.actor.frame_ring
+        if frame_ring is not None:
+            for ccd_data in ccd_dict:
+                full_frame_bytes = self._get_full_frame_bytes(controller, ccd_data)
+                if full_frame_bytes is not None:
+                    frame_ring.reserve(full_frame_bytes)
+
+                ccd_data["data"] = frame_ring.store(
+                    ccd_data["filename"],
+                    ccd_data["data"],
+                )
+
+        return ccd_dict
+
+    @staticmethod
+    def _is_default_window(controller: ArchonController) -> bool:
+        """Whether the controller is reading the default window."""
+
+        default_window = controller.default_window
+        current_window = controller.current_window
+
+        return all(
+            current_window.get(key, None) == default_window.get(key, None)
+            for key in default_window
+        )
+
+    def _get_full_frame_bytes(
+        self,
+        controller: ArchonController,
+        ccd_data: FetchDataDict,
+    ) -> int | None:
+        """Returns the size of a full frame of a CCD, if the default window is known."""
+
+        detectors = self.actor.config["controllers"][controller.name]["detectors"]
+        taps = detectors.get(ccd_data["ccd"], {}).get("taps", 4)
+
+        shape = get_frame_shape(controller.default_window, taps=taps)
+        if shape is None:
+            return None
+
+        return shape[0] * shape[1] * ccd_data["data"].itemsize
+
+    async def write_to_disk(  # type: ignore[override]
+        self,
+        ccd_data: FetchDataDict,
+        excluded_cameras: list[str] = [],
+        write_async: bool = True,
+        write_engine: str = "astropy",
+    ) -> str | None:
+        """Writes ccd data to disk and releases its slot in the frame ring.
+
+        The file is then queued for the post-write hooks and, if it's a bias or a
+        dark read with the default window, added to the master library, if enabled.
+
+        The slot is released even if the write fails, so that failed writes do
+        not use up the ring. Frames are only recovered from a persistent ring if
+        the actor stops before the write finishes.
+
+        """
+
+        frame_ring = self.actor.frame_ring
+
+        try:
+            result = await self._write_ccd_data(
+                ccd_data,
+                excluded_cameras=excluded_cameras,
+                write_async=write_async,
+                write_engine=write_engine,
+            )
+        finally:
+            if frame_ring is not None:
+                frame_ring.release(ccd_data["filename"])
+
+        if result is not None and self.actor.post_write is not None:
+            self.actor.post_write.submit(
+                get_file_context(
+                    result,
+                    exposure_no=ccd_data["exposure_no"],
+                    ccd=ccd_data["ccd"],
+                    controller=ccd_data["controller"],
+                    imagetyp=ccd_data["header"].get("IMAGETYP", [None])[0],
+                    checksum=self._checksums.get(os.path.realpath(result), None),
+                )
+            )
+
+        controller = self.actor.controllers.get(ccd_data["controller"], None)
+        full_frame = controller is None or self._is_default_window(controller)
+        if result is not None and self.actor.masters is not None and full_frame:
+            self.actor.masters.submit(
+                result,
+                ccd_data["ccd"],
+                ccd_data["header"].get("IMAGETYP", [None])[0],
+            )
+
+        return result
+
+    async def _write_ccd_data(
+        self,
+        ccd_data: FetchDataDict,
+        excluded_cameras: list[str] = [],
+        write_async: bool = True,
+        write_engine: str = "astropy",
+    ) -> str | None:
+        """Writes ccd data to disk.
+
+        The image is first written uncompressed (or Rice tile-compressed) to a
+        temporary file which is then streamed to its final location, gzipping it
+        if the template ends in ``.gz``. The checksum is calculated from the stream
+        as it's written, so the file does not need to be read again, and an entry
+        is appended to the manifest of the MJD directory.
+
+        """
+
+        self._set_progress_phase("writing")
+
+        ccd = ccd_data["ccd"]
+        if ccd in excluded_cameras:
+            return None
+
+        t0 = time.perf_counter()
+
+        file_path = ccd_data["filename"]
+        if os.path.exists(file_path):
+            raise ArchonError(f"Cannot overwrite file {file_path}.")
+
+        header = ccd_data["header"]
+        header["FILENAME"][0] = os.path.basename(file_path)
+        header["EXPOSURE"][0] = ccd_data["exposure_no"]
+
+        files_config = self.actor.config["files"]
+        compression = files_config.get("compression", "gzip")
+
+        if compression == "rice":
+            tile_shape = files_config.get("tile_shape", None)
+            if tile_shape is not None:
+                tile_shape = tuple(tile_shape)
+
+            if write_engine == "astropy":
+                writeto = partial(self._write_file_rice_astropy, ccd_data)
+            elif write_engine == "fitsio":
+                writeto = partial(self._write_file_rice_fitsio, ccd_data)
+            else:
+                raise ArchonError(f"Invalid write engine {write_engine!r}.")
+
+            writeto = partial(writeto, tile_shape=tile_shape)
+            suffix = ".fits.fz"
+
+        else:
+            if write_engine == "astropy":
+                writeto = partial(self._write_file_astropy, ccd_data)
+            elif write_engine == "fitsio":
+                writeto = partial(self._write_file_fitsio, ccd_data)
+            else:
+                raise ArchonError(f"Invalid write engine {write_engine!r}.")
+
+            suffix = ".fits"
+
+        # Only hash the stream if the checksum or the manifest are going to be used.
+        hash_mode: str | None = None
+        if self.actor.config["checksum"]["write"] or files_config.get("manifest"):
+            hash_mode = self.actor.config["checksum"].get("mode", "md5")
+            if hash_mode not in ["md5", "sha1"]:
+                raise ArchonError(f"Invalid checksum mode {hash_mode!r}.")
+
+        temp_file = NamedTemporaryFile(suffix=suffix, delete=True).name
+
+        finalise = partial(
+            finalise_file,
+            temp_file,
+            file_path,
+            compress=compression == "gzip" and file_path.endswith(".gz"),
+            hash_mode=hash_mode,
+            complevel=1,
+        )
+
+        try:
+            if write_async:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, writeto, temp_file)
+            else:
+                writeto(temp_file)
+
+            if not os.path.exists(temp_file):
+                raise ArchonError(f"Failed writing image {file_path!s} to disk.")
+
+            standards_config = self.actor.config.get("standards", {})
+            if self.standards is not None and standards_config.get("table", False):
+                append_table = partial(
+                    self._append_standards_table,
+                    temp_file,
+                    self.standards,
+                )
+                if write_async:
+                    await loop.run_in_executor(None, append_table)
+                else:
+                    append_table()
+
+            if write_async:
+                digest, size = await loop.run_in_executor(None, finalise)
+            else:
+                digest, size = finalise()
+
+        except ArchonError:
+            raise
+        except Exception as err:
+            raise ArchonError(f"Failed writing image {file_path!s} to disk: {err}")
+
+        if digest is not None:
+            self._checksums[os.path.realpath(file_path)] = digest
+
+        self._update_manifest(ccd_data, file_path, size, hash_mode, digest)
+
+        index = self.actor.get_exposure_index()
+        if index is not None:
+            index_insert = partial(
+                index.insert,
+                file_path,
+                {
+                    key: value[0] if isinstance(value, (list, tuple)) else value
+                    for key, value in header.items()
+                },
+                checksum=digest,
+            )
+            try:
+                if write_async:
+                    await asyncio.get_running_loop().run_in_executor(None, index_insert)
+                else:
+                    index_insert()
+            except Exception as err:
+                self.command.warning(f"Failed adding {file_path} to the index: {err}")
+
+        self.metrics.write_seconds.observe(time.perf_counter() - t0, ccd=ccd)
+        self.metrics.bytes_written.inc(size, sjd=str(get_sjd("LCO")))
+
+        return file_path
+
+    @staticmethod
+    def _append_standards_table(file_path: str, standards: list[dict[str, Any]]):
+        """Appends the table of standards as a binary table extension."""
+
+        hdu = standards_to_table(standards)
+        hdu.add_checksum()
+
+        with fits.open(file_path, mode="append") as hdul:
+            hdul.append(hdu)
+
+    def _update_manifest(
+        self,
+        ccd_data: FetchDataDict,
+        file_path: str,
+        size: int,
+        hash_mode: str | None,
+        digest: str | None,
+    ):
+        """Appends an entry for a newly written file to the MJD manifest."""
 
-        return False if (self.shutter_failed or not read_result) else True
+        manifest: str | None = self.actor.config["files"].get("manifest", None)
+        if not manifest:
+            return
+
+        dirname = os.path.dirname(os.path.realpath(file_path))
+        manifest_path = os.path.join(
+            dirname,
+            manifest.format(MJD=os.path.basename(dirname)),
+        )
+
+        entry: dict[str, Any] = {
+            "filename": os.path.basename(file_path),
+            "size": size,
+            "exposure_no": ccd_data["exposure_no"],
+            "write_time": Time.now().isot,
+        }
+        if hash_mode is not None:
+            entry[hash_mode] = digest
+
+        try:
+            append_manifest(manifest_path, entry)
+        except Exception as err:
+            self.command.warning(f"Failed updating manifest {manifest_path}: {err}")
+
+    def _save_telemetry(self, fdata: FetchDataDict):
+        """Appends the header source replies of the exposure to the night sidecar.
+
+        The replies are saved once per exposure so that the header values can be
+        recomputed later with ``lvmscp reheader``.
+
+        """
+
+        telemetry: str | None = self.actor.config["files"].get("telemetry", None)
+        if not telemetry or self._telemetry_saved:
+            return
+
+        self._telemetry_saved = True
+
+        dirname = os.path.dirname(os.path.realpath(fdata["filename"]))
+        telemetry_path = os.path.join(
+            dirname,
+            telemetry.format(MJD=os.path.basename(dirname)),
+        )
+
+        entry: dict[str, Any] = {
+            "exposure_no": fdata["exposure_no"],
+            "spec": fdata["controller"],
+            "flavour": self.expose_data.flavour if self.expose_data else None,
+            "time": Time.now().isot,
+            "replies": [asdict(reply) for reply in self.header_replies],
+        }
+
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            append_manifest(telemetry_path, entry)
+        except Exception as err:
+            self.command.warning(f"Failed saving telemetry to {telemetry_path}: {err}")
+
+    async def _generate_checksum(  # type: ignore[override]
+        self,
+        checksum_file: str,
+        filenames: list[str],
+        mode: str = "md5",
+    ):
+        """Adds the checksums of the images written to disk to the checksum file.
+
+        Uses the digests calculated while the files were written and only falls
+        back to hashing the file if the digest is not available.
+
+        """
+
+        for filename in filenames:
+            realpath = os.path.realpath(str(filename))
+            digest = self._checksums.pop(realpath, None)
+
+            if digest is None:
+                await ExposureDelegate._generate_checksum(
+                    checksum_file,
+                    [filename],
+                    mode=mode,
+                )
+                continue
+
+            dirname = os.path.dirname(realpath)
+            basename = os.path.basename(realpath)
+
+            # Same format as md5sum/sha1sum.
+            with open(os.path.join(dirname, checksum_file), "a") as fd:
+                fd.write(f"{digest}  {basename}\n")
+
+    @staticmethod
+    def _write_file_rice_astropy(
+        data: FetchDataDict,
+        file_path: str,
+        tile_shape: tuple[int, int] | None = None,
+    ):
+        """Writes a Rice tile-compressed image using astropy."""
+
+        header = fits.Header()
+        for key, value in data["header"].items():
+            header[key] = tuple(value) if isinstance(value, (list, tuple)) else value
+
+        image = data["data"]
+        tile_shape = tile_shape or (1, image.shape[1])
+
+        hdu = fits.CompImageHDU(
+            image,
+            header=header,
+            compression_type="RICE_1",
+            tile_shape=tile_shape,
+        )
+
+        hdul = fits.HDUList([fits.PrimaryHDU(), hdu])
+        hdul.writeto(file_path, checksum=True, overwrite=True)
+
+    @staticmethod
+    def _write_file_rice_fitsio(
+        data: FetchDataDict,
+        file_path: str,
+        tile_shape: tuple[int, int] | None = None,
+    ):
+        """Writes a Rice tile-compressed image using fitsio."""
+
+        import fitsio
+
+        header = []
+        for key, value in data["header"].items():
+            if isinstance(value, (list, tuple)):
+                header.append({"name": key, "value": value[0], "comment": value[1]})
+            else:
+                header.append({"name": key, "value": value, "comment": ""})
+
+        image = data["data"]
+        tile_shape = tile_shape or (1, image.shape[1])
+
+        with fitsio.FITS(file_path, "rw", clobber=True) as fits_:
+            fits_.write(image, header=header, compress="RICE", tile_dims=tile_shape)
+            fits_[-1].write_checksum()
+
+    def get_header_sources(self) -> list[HeaderSource]:
+        """Returns the header sources defined in the configuration."""
+
+        return load_header_sources(
+            self.actor.config.get("header_sources", {}),
+            self.actor.config,
+        )
 
     async def expose_cotasks(self):
         """Grab sensor data when the exposure begins to save time.
@@ -170,6 +926,11 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
         very short exposures or biases, the cotasks may take longer than the
         exposure itself and readout will have already begun.
 
+        The commands to send and how their replies map to header keywords are
+        defined in ``header_sources``. All the sources that apply to the exposure
+        flavour (and to the groups in `.cotasks`, if set) run concurrently, each
+        one with its own timeout.
+
         """
 
         self.command.debug("Grabbing sensor data and system status.")
@@ -177,21 +938,82 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
         assert self.expose_data
 
         # We expect only on controller in lvmscp.
-        controller = self.expose_data.controllers[0]
-
-        tasks = [
-            self.get_hartmann_status(controller.name),
-            self.get_sensors(controller.name),
-            self.get_bench_temperature(),
-            self.get_lamps(),
-            self.get_pressure(controller.name),
-            self.read_depth_probes(),
-            self.get_telescope_info(),
+        controller: SCPController = self.expose_data.controllers[0]  # type: ignore
+        context = {
+            "spec": controller.name,
+            "lvmieb": controller.lvmieb,
+            "lvmnps": self.actor.config.get("lvmnps", "lvmnps"),
+        }
+
+        sources = [
+            source
+            for source in self.get_header_sources()
+            if source.applies_to(self.expose_data.flavour)
+            and (self.cotasks is None or source.group in self.cotasks)
         ]
+        sources.sort(key=lambda source: source.priority, reverse=True)
+
+        await asyncio.gather(
+            *[self._run_header_source(source, context) for source in sources]
+        )
+
+    async def _run_header_source(self, source: HeaderSource, context: dict[str, str]):
+        """Sends the command for a header source and stores its replies."""
+
+        actor = source.format(source.actor, **context)
+        command_string = source.format(source.command, **context)
+
+        try:
+            cmd = await asyncio.wait_for(
+                self._send_command(
+                    actor,
+                    command_string,
+                    internal=source.internal,
+                    time_limit=source.timeout,
+                ),
+                timeout=source.timeout,
+            )
+        except asyncio.TimeoutError:
+            self.command.warning(f"Timed out retrieving {source.name} values.")
+            return
+        except Exception as err:
+            self.command.warning(
+                f"Failed retrieving {source.name} header values: {err}"
+            )
+            return
+
+        if cmd.status.did_fail:
+            self.command.warning(f"Failed retrieving {source.name} values.")
+            return
+
+        message: dict[str, Any] = {}
+        for reply in reversed(cmd.replies):
+            message.update(reply.message)
+
+        self.header_replies.append(
+            HeaderSourceReply(
+                source=source.name,
+                context={**context, **source.context},
+                message=message,
+            )
+        )
+
+    async def readout_cotasks(self):
+        """Waits until the expose cotasks are done.
+
+        Runs concurrently with the readout so that the header sources of short
+        exposures have time to finish without adding dead time.
+
+        """
 
-        await asyncio.gather(*tasks)
+        task = self._expose_cotasks
+        if task is None or task.done():
+            return
 
-        return
+        try:
+            await task
+        except Exception as err:
+            self.command.warning(f"Failed running exposure cotasks: {err}")
 
     async def post_process(self, fdata: FetchDataDict):
         """Post-process images."""
@@ -207,17 +1029,57 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
         header["LMST"][0] = round(sideral_time, 6)
 
         # Update header with values collected during integration.
-        for key in self.header_data:
-            header[key][0] = self.header_data[key]
+        header_values = get_header_values(
+            self.get_header_sources(),
+            self.header_replies,
+            ccd=ccd,
+        )
+        for key, (value, comment) in header_values.items():
+            if key in header:
+                header[key][0] = value
+            else:
+                header[key] = [value, comment]
+
+        self.actor.cryo.add_header_values(ccd, header_values)
+        self._save_telemetry(fdata)
+
+        standards_config = self.actor.config.get("standards", {})
+        if self.standards is not None and standards_config.get("cards", True):
+            for key, (value, comment) in standards_to_cards(self.standards).items():
+                if key in header:
+                    header[key][0] = value
+                else:
+                    header[key] = [value, comment]
+
+        flush_state = self._flush_state.get(fdata["controller"], None)
+        if flush_state is not None:
+            header["PREFLUSH"] = [
+                flush_state["pre_flush"],
+                "Detector flushed before the exposure",
+            ]
+            header["AUTOFLSH"] = [
+                flush_state["autoflush"],
+                "Detector idle flushing before the exposure",
+            ]
+            header["CLEARAGE"] = [
+                flush_state["since_cleared"],
+                "[s] Time since detector was read out or flushed",
+            ]
+            header["CLEARBY"] = [
+                flush_state["cleared_by"],
+                "How the detector was last cleared",
+            ]
+
+        # Update the data and overscan sections for windowed or binned readouts.
+        controller = self.actor.controllers.get(fdata["controller"], None)
+        if controller is not None:
+            sections = get_window_sections(self.get_window(controller))
+            for key, section in (sections or {}).items():
+                if key in header:
+                    header[key][0] = section
 
         # Add SDSS MJD.
         header["SMJD"][0] = get_sjd("LCO")
-        header["PRESSURE"][0] = self.pressure_data.get(f"{ccd}_pressure", numpy.nan)
-
-        depth_camera = self.depth_data.get("camera", "")
-        for ch in ["A", "B", "C"]:
-            depth = self.depth_data[ch] if ccd == depth_camera else numpy.nan
-            header[f"DEPTH{ch}"][0] = depth
 
         # Replace NaNs in headers. FITS does not support NaNs.
         for key, value in header.items():
@@ -227,12 +1089,33 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
             except Exception:
                 continue
 
+    async def _send_command(self, target: str, command_string: str, **kwargs):
+        """Sends a command to a downstream actor and records its latency."""
+
+        t0 = time.perf_counter()
+
+        cmd = await self.command.send_command(target, command_string, **kwargs)
+        await cmd
+
+        elapsed = time.perf_counter() - t0
+
+        self.metrics.cotask_seconds.observe(elapsed, actor=target)
+        if cmd.status.did_fail:
+            self.metrics.cotask_failures.inc(actor=target)
+
+        if self.actor.traffic_recorder is not None:
+            try:
+                self.actor.traffic_recorder.record(target, command_string, elapsed, cmd)
+            except Exception as err:
+                self.actor.log.warning(f"Failed recording traffic: {err}")
+
+        return cmd
+
     async def get_shutter_status(self, spec: str) -> dict | Literal[False]:
         """Returns the status of the shutter for a spectrograph."""
 
         lvmieb = self.actor.controllers[spec].lvmieb
-        cmd = await self.command.send_command(lvmieb, f"shutter status {spec}")
-        await cmd
+        cmd = await self._send_command(lvmieb, f"shutter status {spec}")
 
         if cmd.status.did_fail:
             return False
@@ -246,173 +1129,43 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
         """Opens/closes a shutter."""
 
         lvmieb = self.actor.controllers[spec].lvmieb
-        cmd = await self.command.send_command(lvmieb, f"shutter {action} {spec}")
-        await cmd
+        cmd = await self._send_command(lvmieb, f"shutter {action} {spec}")
 
         return cmd.status.did_succeed
 
-    async def get_hartmann_status(self, spec: str):
-        """Returns the status of the hartmann doors."""
+    def get_window(self, controller: ArchonController) -> dict[str, Any]:
+        """Returns the window parameters of the current exposure for a controller."""
 
-        lvmieb = self.actor.controllers[spec].lvmieb
+        window = dict(controller.current_window)
+        if self.expose_data is not None:
+            window.update(self.expose_data.window_params)
 
-        cmd = await self.command.send_command(
-            lvmieb,
-            f"hartmann status {spec}",
-            time_limit=5,
-        )
+        return window
 
-        try:
-            left = 0 if cmd.replies.get(f"{spec}_hartmann_left")["open"] else 1
-            right = 0 if cmd.replies.get(f"{spec}_hartmann_right")["open"] else 1
-            self.header_data["HARTMANN"] = f"{int(left)} {int(right)}"
-        except KeyError:
-            self.command.warning(f"{spec}: failed retrieving hartmann door status.")
+    def get_readout_time(self) -> float:
+        """Returns the expected readout time for the window of the current exposure.
 
-    async def get_sensors(self, spec: str):
-        """Returns the spectrograph temperatures and RHs."""
-
-        lvmieb = self.actor.controllers[spec].lvmieb
-        cmd = await self.command.send_command(
-            lvmieb,
-            f"wago status {spec}",
-            time_limit=5,
-        )
-
-        try:
-            sensors = cmd.replies.get(f"{spec}_sensors")
-            self.header_data["LABTEMP"] = sensors.get("t3", numpy.nan)
-            self.header_data["LABHUMID"] = sensors.get("rh3", numpy.nan)
-        except KeyError:
-            self.command.warning(f"{spec}: failed retrieving sensor values.")
-
-    async def get_bench_temperature(self):
-        """Gets the science telescope bench temperature."""
-
-        cmd = await self.command.send_command(
-            "lvm.sci.telemetry",
-            "status",
-            time_limit=5,
-        )
-
-        try:
-            sensor2 = cmd.replies.get("sensor2")
-            self.header_data["TEMPSCI"] = sensor2["temperature"]
-        except KeyError:
-            self.command.warning("Failed retrieving bench temperature.")
+        The full-frame readout time is scaled by the fraction of pixels read.
 
-    async def get_pressure(self, spec: str):
-        """Returns the cryostat pressures."""
-
-        lvmieb = self.actor.controllers[spec].lvmieb
-        cmd = await self.command.send_command(
-            lvmieb,
-            f"transducer status {spec}",
-            time_limit=5,
-        )
-
-        try:
-            self.pressure_data = cmd.replies.get("transducer")
-        except KeyError:
-            self.command.warning(f"{spec}: failed retrieving pressure status.")
-
-    async def read_depth_probes(self):
-        """Returns the depth probe measurements."""
+        """
 
-        spec_config = list(self.actor.config["controllers"].values())[0]
-        lvmieb_name = spec_config.get("lvmieb", "lvmieb")
+        edata = self.expose_data
+        if edata is None or not edata.controllers:
+            return EXPECTED_READOUT_TIME
 
-        cmd = await self.command.send_command(
-            lvmieb_name,
-            "depth status",
-            time_limit=5,
+        controller = edata.controllers[0]
+        fraction = get_readout_fraction(
+            self.get_window(controller),
+            controller.default_window,
         )
 
-        try:
-            self.depth_data = cmd.replies.get("depth")
-        except KeyError:
-            pass
-
-    async def get_lamps(self):
-        """Retrieves lamp information."""
-
-        lvmnps = self.actor.config.get("lvmnps", "lvmnps")
-        cmd = await self.command.send_command(lvmnps, "status", time_limit=10)
-
-        # The config file includes the names of the lamps that should be present.
-        lamps = self.actor.config.get("lamps", [])
-
-        try:
-            outlets = cmd.replies.get("outlets")
-            for outlet in outlets:
-                if outlet["name"] in lamps:
-                    state = "ON" if outlet["state"] else "OFF"
-                    self.header_data[outlet["name"].upper()] = state
-        except Exception as err:
-            self.command.warning(f"Failed retrieving lamp status: {err}")
-
-    async def get_telescope_info(self):
-        """Retrieve telescope information."""
-
-        telescopes = ["sci", "skye", "skyw", "spec"]
-
-        for telescope in telescopes:
-            pwi_cmd = await self.command.send_command(
-                f"lvm.{telescope}.pwi",
-                "status",
-                internal=True,
-                time_limit=5,
-            )
-            if pwi_cmd.status.did_fail:
-                self.command.warning(f"Failed getting {telescope} PWI status.")
-            else:
-                pwi_status = pwi_cmd.replies[-1].body
-
-                ra_h: float = pwi_status.get("ra_j2000_hours", numpy.nan)
-                if ra_h > 0:
-                    ra_d = ra_h * 15.0
-                else:
-                    ra_d = ra_h
-                self.header_data[f"TE{telescope.upper()}RA"] = numpy.round(ra_d, 6)
-
-                dec = pwi_status.get("dec_j2000_degs", numpy.nan)
-                self.header_data[f"TE{telescope.upper()}DE"] = numpy.round(dec, 6)
-
-                alt = pwi_status.get("altitude_degs", None)
-                if alt is not None:
-                    airm = numpy.round(1 / numpy.cos(numpy.radians(90 - alt)), 3)
-                    self.header_data[f"TE{telescope.upper()}AM"] = airm
-
-            if telescope != "spec":
-                km_cmd = await self.command.send_command(
-                    f"lvm.{telescope}.km",
-                    "status",
-                    internal=True,
-                    time_limit=5,
-                )
-                if km_cmd.status.did_fail:
-                    self.command.warning(f"Failed getting {telescope} k-mirror status.")
-                else:
-                    km_position = numpy.round(km_cmd.replies.get("Position"), 2)
-                    self.header_data[f"TE{telescope.upper()}KM"] = km_position
-
-            foc_cmd = await self.command.send_command(
-                f"lvm.{telescope}.foc",
-                "status",
-                internal=True,
-                time_limit=5,
-            )
-            if foc_cmd.status.did_fail:
-                self.command.warning(f"Failed getting {telescope} focus status.")
-            else:
-                foc_position = numpy.round(foc_cmd.replies.get("Position"), 2)
-                self.header_data[f"TE{telescope.upper()}FO"] = foc_position
+        return round(max(MIN_READOUT_TIME, EXPECTED_READOUT_TIME * fraction), 1)
 
     def get_etr(self):
         """Returns the estimated time remaining including readout, or null if idle."""
 
         edata = self.expose_data
-        readout_time = EXPECTED_READOUT_TIME
+        readout_time = self.get_readout_time()
 
         if edata is None or edata.controllers is None:
             return None
@@ -443,3 +1196,114 @@ class LVMExposeDelegate(ExposureDelegate["SCPActor"]):
             return round(max(0, readout_time - elapsed), 1)
 
         return None
+
+    def get_progress(self) -> dict[str, Any] | None:
+        """Returns the progress of the current exposure, or `None` if idle.
+
+        The progress includes the phase of the exposure (``integrating``,
+        ``reading``, ``fetching``, ``writing``, and ``done`` or ``failed`` once
+        the exposure is complete), the time elapsed since the exposure began, the
+        estimated time remaining, the expected total time, the fraction of the
+        readout that has been completed, and the percentage completed.
+
+        """
+
+        if self._progress_t0 is None or self._progress_phase is None:
+            return None
+
+        phase = self._progress_phase
+        now = time.time()
+
+        edata = self.expose_data
+        if edata is not None:
+            exposure_time = edata.exposure_time or 0.0
+            exposure_no = edata.exposure_no
+        else:
+            exposure_time = 0.0
+            exposure_no = self.last_exposure_no
+        readout_time = self.get_readout_time()
+        total_time = exposure_time + readout_time
+
+        if phase == "integrating":
+            integrated = now - self._progress_t0
+            etr = max(0.0, exposure_time - integrated) + readout_time
+            readout = 0.0
+        elif phase == "reading":
+            reading = now - (self._progress_readout_t0 or now)
+            readout = min(0.99, reading / readout_time)
+            etr = readout_time * (1 - readout)
+        else:
+            readout = 1.0 if phase != "failed" else 0.0
+            etr = 0.0
+
+        if phase == "done":
+            percent = 100.0
+        else:
+            percent = max(0.0, min(100.0, 100 * (1 - etr / total_time)))
+
+        return {
+            "phase": phase,
+            "exposure_no": exposure_no,
+            "elapsed": round(now - self._progress_t0, 1),
+            "etr": round(etr, 1),
+            "total_time": round(total_time, 1),
+            "readout": round(readout, 2),
+            "percent": round(percent, 1),
+        }
+
+    def _set_progress_phase(self, phase: str):
+        """Updates the phase of the exposure and publishes the progress."""
+
+        if self._progress_phase is None or self._progress_phase == phase:
+            return
+
+        if phase == "reading":
+            self._progress_readout_t0 = time.time()
+
+        self._progress_phase = phase
+        self._write_progress()
+
+    def _write_progress(self):
+        """Broadcasts the ``exposure_progress`` keyword."""
+
+        progress = self.get_progress()
+        if progress is None:
+            return
+
+        self.actor.write("i", exposure_progress=progress, broadcast=True)
+
+    def _start_progress(self):
+        """Starts the task that publishes the progress of the exposure."""
+
+        progress_config = self.actor.config.get("exposure_progress", {})
+        if not progress_config.get("enabled", True):
+            return
+
+        self._progress_t0 = time.time()
+        self._progress_readout_t0 = None
+        self._progress_phase = "integrating"
+
+        cadence = progress_config.get("cadence", 1.0)
+        self._progress_task = asyncio.create_task(self._publish_progress(cadence))
+
+    async def _publish_progress(self, cadence: float):
+        """Publishes the progress of the exposure every ``cadence`` seconds."""
+
+        while True:
+            self._write_progress()
+            await asyncio.sleep(cadence)
+
+    async def _stop_progress(self):
+        """Stops publishing the progress and outputs the final progress message."""
+
+        if self._progress_task is None:
+            return
+
+        self._progress_task = await cancel_task(self._progress_task)
+
+        if self._progress_phase != "failed":
+            self._progress_phase = "done"
+        self._write_progress()
+
+        self._progress_t0 = None
+        self._progress_phase = None
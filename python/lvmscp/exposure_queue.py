@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: exposure_queue.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import pathlib
+from dataclasses import asdict, dataclass, field
+
+from typing import TYPE_CHECKING, Any, Mapping
+
+from astropy.time import Time
+
+from clu import Command
+from sdsstools.utils import cancel_task
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+
+
+__all__ = ["ExposureJob", "ExposureQueue"]
+
+
+# The error with which archon fails an exposure if the delegate is already running
+# one. A client command can take the delegate between wait_until_free and the
+# start of the job, in which case the job is queued again.
+DELEGATE_LOCKED_ERROR = "The expose delegate is locked."
+
+
+@dataclass
+class ExposureJob:
+    """An exposure waiting in, or run from, the exposure queue.
+
+    Parameters
+    ----------
+    job_id
+        The unique identifier of the job.
+    command_string
+        The arguments of the ``expose`` command for the job.
+    priority
+        Jobs with higher priority run first. Jobs with the same priority run in
+        the order in which they were submitted.
+    status
+        One of ``queued``, ``running``, ``done``, ``failed``, or ``cancelled``.
+    submitted
+        The time at which the job was submitted.
+    started
+        The time at which the exposure started.
+    finished
+        The time at which the job finished or was cancelled.
+    filenames
+        The files written by the exposure.
+    error
+        The error message if the job failed.
+
+    """
+
+    job_id: int
+    command_string: str
+    priority: int = 0
+    status: str = "queued"
+    submitted: str = field(default_factory=lambda: Time.now().isot)
+    started: str | None = None
+    finished: str | None = None
+    filenames: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def sort_key(self):
+        """The key to sort queued jobs in the order in which they will run."""
+
+        return (-self.priority, self.job_id)
+
+    @property
+    def active(self) -> bool:
+        """Whether the job is queued or running."""
+
+        return self.status in ["queued", "running"]
+
+
+class ExposureQueue:
+    """A queue of exposures run by the actor as soon as the controllers are free.
+
+    The jobs are ``expose`` commands that are submitted with a priority and run in
+    order of priority. Each job is started by the actor as soon as the expose
+    delegate is released by the previous exposure, without waiting for a client
+    to send the next command. If a client exposure takes the delegate before the
+    job starts, the job is queued again and waits for the delegate to be free.
+    If ``path`` is set the queue is saved to that JSON file after each change and
+    reloaded when the queue starts, so queued jobs survive a restart of the actor.
+
+    Parameters
+    ----------
+    actor
+        The actor that runs the exposures.
+    path
+        The JSON file in which the queue is saved. If `None`, the queue is only
+        kept in memory.
+    history
+        The number of finished jobs to keep.
+
+    """
+
+    def __init__(
+        self,
+        actor: SCPActor,
+        path: str | os.PathLike | None = None,
+        history: int = 50,
+    ):
+        self.actor = actor
+        self.path = pathlib.Path(path).expanduser() if path else None
+        self.history = history
+
+        self.jobs: list[ExposureJob] = []
+        self.paused: bool = False
+
+        self._next_id: int = 1
+        self._changed = asyncio.Event()
+        self._runner: asyncio.Task | None = None
+
+    @classmethod
+    def from_config(cls, actor: SCPActor, config: Mapping[str, Any]):
+        """Creates a queue from the ``exposure_queue`` configuration section."""
+
+        path = config.get("path", None)
+        if path:
+            path = path.format(actor=actor.name)
+
+        return cls(actor, path=path, history=config.get("history", 50))
+
+    @property
+    def running(self) -> ExposureJob | None:
+        """The job currently running, if any."""
+
+        for job in self.jobs:
+            if job.status == "running":
+                return job
+
+        return None
+
+    @property
+    def queued(self) -> list[ExposureJob]:
+        """The queued jobs, in the order in which they will run."""
+
+        return sorted(
+            [job for job in self.jobs if job.status == "queued"],
+            key=lambda job: job.sort_key,
+        )
+
+    def get_job(self, job_id: int) -> ExposureJob:
+        """Returns a job. Raises `KeyError` if the job does not exist."""
+
+        for job in self.jobs:
+            if job.job_id == job_id:
+                return job
+
+        raise KeyError(f"Job {job_id} not found.")
+
+    def submit(self, command_string: str, priority: int = 0) -> ExposureJob:
+        """Adds an exposure to the queue and returns the job."""
+
+        job = ExposureJob(self._next_id, command_string, priority=priority)
+        self._next_id += 1
+
+        self.jobs.append(job)
+        self._update(job)
+
+        return job
+
+    def cancel(self, job_id: int) -> ExposureJob:
+        """Cancels a queued job.
+
+        Raises `KeyError` if the job does not exist and `ValueError` if it is not
+        queued. Running exposures must be stopped with ``abort``.
+
+        """
+
+        job = self.get_job(job_id)
+        if job.status != "queued":
+            raise ValueError(f"Job {job_id} is {job.status} and cannot be cancelled.")
+
+        job.status = "cancelled"
+        job.finished = Time.now().isot
+        self._update(job)
+
+        return job
+
+    def set_priority(self, job_id: int, priority: int) -> ExposureJob:
+        """Changes the priority of a queued job."""
+
+        job = self.get_job(job_id)
+        if job.status != "queued":
+            raise ValueError(f"Job {job_id} is {job.status} and cannot be changed.")
+
+        job.priority = priority
+        self._update(job)
+
+        return job
+
+    def pause(self, paused: bool = True):
+        """Pauses or resumes the queue. A running job is not affected."""
+
+        self.paused = paused
+        self._update()
+
+    def get_status(self) -> dict[str, Any]:
+        """Returns the ``exposure_queue`` keyword."""
+
+        running = self.running
+
+        return {
+            "paused": self.paused,
+            "running": running.job_id if running else None,
+            "queued": [job.job_id for job in self.queued],
+            "jobs": [asdict(job) for job in self.jobs],
+        }
+
+    def _update(self, job: ExposureJob | None = None):
+        """Saves the queue, outputs the job, and wakes up the runner."""
+
+        finished = [jj for jj in self.jobs if not jj.active]
+        if len(finished) > self.history:
+            for old_job in finished[: len(finished) - self.history]:
+                self.jobs.remove(old_job)
+
+        self.save()
+
+        if job is not None:
+            self.actor.write("i", exposure_queue_job=asdict(job), broadcast=True)
+
+        self._changed.set()
+
+    def save(self):
+        """Writes the queue to ``path``, if set."""
+
+        if self.path is None:
+            return
+
+        data = {
+            "paused": self.paused,
+            "next_id": self._next_id,
+            "jobs": [asdict(job) for job in self.jobs],
+        }
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(self.path.suffix + ".part")
+            temp_path.write_text(json.dumps(data, indent=2))
+            os.replace(temp_path, self.path)
+        except OSError as err:
+            self.actor.log.warning(f"Failed saving the exposure queue: {err}")
+
+    def load(self):
+        """Loads the queue saved in ``path``.
+
+        A job that was running when the queue was saved is marked as failed.
+
+        """
+
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            data = json.loads(self.path.read_text())
+            jobs = [ExposureJob(**job) for job in data["jobs"]]
+        except (ValueError, KeyError, TypeError) as err:
+            self.actor.log.warning(f"Failed loading the exposure queue: {err}")
+            return
+
+        for job in jobs:
+            if job.status == "running":
+                job.status = "failed"
+                job.error = "Interrupted by a restart of the actor."
+                job.finished = Time.now().isot
+
+        self.jobs = jobs
+        self.paused = data.get("paused", False)
+        self._next_id = max([data.get("next_id", 1)] + [job.job_id + 1 for job in jobs])
+
+    def start(self):
+        """Loads the saved queue and starts running the jobs."""
+
+        self.load()
+
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+        return self
+
+    async def stop(self):
+        """Stops running jobs. The queued jobs are kept."""
+
+        self._runner = await cancel_task(self._runner)
+
+    async def wait_until_free(self):
+        """Waits until the expose delegate is not running an exposure."""
+
+        async with self.actor.exposure_delegate.lock:
+            pass
+
+    async def execute(self, job: ExposureJob) -> Command:
+        """Runs the ``expose`` command for a job and returns the finished command."""
+
+        command = Command(
+            f"expose {job.command_string}",
+            command_id=job.job_id,
+            commander_id=self.actor.name,
+            actor=self.actor,
+        ).parse()
+
+        await command
+
+        return command
+
+    async def _run(self):
+        """Runs the queued jobs as soon as the expose delegate is free."""
+
+        while True:
+            self._changed.clear()
+
+            if self.paused or len(self.queued) == 0:
+                await self._changed.wait()
+                continue
+
+            await self.wait_until_free()
+
+            # The queue may have changed while we were waiting.
+            if self.paused or len(self.queued) == 0:
+                continue
+
+            job = self.queued[0]
+            job.status = "running"
+            job.started = Time.now().isot
+            self._update(job)
+
+            try:
+                command = await self.execute(job)
+                for reply in command.replies:
+                    job.filenames += reply.message.get("filenames", [])
+                if command.status.did_fail:
+                    errors = [
+                        str(reply.message["error"])
+                        for reply in command.replies
+                        if "error" in reply.message
+                    ]
+                    if errors and errors[-1] == DELEGATE_LOCKED_ERROR:
+                        self.actor.log.info(
+                            f"Job {job.job_id} did not start because the expose "
+                            "delegate is locked. Queuing it again."
+                        )
+                        job.status = "queued"
+                        job.started = None
+                        self._update(job)
+                        continue
+
+                    job.status = "failed"
+                    job.error = errors[-1] if errors else "The expose command failed."
+                else:
+                    job.status = "done"
+            except Exception as err:
+                job.status = "failed"
+                job.error = str(err)
+
+            job.finished = Time.now().isot
+            self._update(job)
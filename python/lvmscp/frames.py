@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: frames.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+
+from typing import Any, Mapping
+
+import numpy
+
+
+__all__ = ["FrameRing"]
+
+
+class FrameRing:
+    """A fixed ring of preallocated buffers for the fetched frames.
+
+    Each CCD frame is copied into a free slot of the ring after it's fetched and
+    the slot is released once the frame has been written to disk. The memory used
+    by the frames waiting to be written is therefore fixed, regardless of how many
+    exposures are taken. If no slot is free, or the frame does not fit in a slot,
+    the frame is kept in its own array and counted in ``overflows``.
+
+    If ``directory`` is set, the slots are memory-mapped files in that directory
+    and each slot in use has a JSON file with the file name, shape, and data type
+    of the frame. Because the pages of the mapped files belong to the kernel, the
+    frames survive a crash of the actor and can be recovered with `.pending`.
+
+    Parameters
+    ----------
+    n_slots
+        The number of slots in the ring.
+    slot_size
+        The size of each slot, in bytes. If `None`, the slots are allocated with
+        the size set with `.reserve` (the full frame), of existing slot files, or
+        of the first frame stored.
+    directory
+        The directory for the memory-mapped slot files. If `None`, the slots are
+        allocated in memory.
+
+    """
+
+    def __init__(
+        self,
+        n_slots: int = 6,
+        slot_size: int | None = None,
+        directory: str | os.PathLike | None = None,
+    ):
+        if n_slots < 1:
+            raise ValueError("The ring must have at least one slot.")
+
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+
+        # Whether the slot size was set explicitly and cannot be changed.
+        self._fixed_size = slot_size is not None
+        self.directory = pathlib.Path(directory) if directory else None
+
+        self.slots: list[numpy.ndarray] = []
+        self.frames: list[dict[str, Any] | None] = [None] * n_slots
+
+        self.overflows: int = 0
+        self._next: int = 0
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_slots()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]):
+        """Creates a ring from the ``frame_ring`` configuration section."""
+
+        return cls(
+            n_slots=config.get("slots", 6),
+            slot_size=config.get("slot_size", None),
+            directory=config.get("directory", None),
+        )
+
+    @property
+    def persistent(self) -> bool:
+        """Whether the slots are backed by files."""
+
+        return self.directory is not None
+
+    @property
+    def in_use(self) -> int:
+        """The number of slots holding a frame not yet written."""
+
+        return sum(frame is not None for frame in self.frames)
+
+    def _get_paths(self, slot: int) -> tuple[pathlib.Path, pathlib.Path]:
+        """Returns the data and metadata files of a slot."""
+
+        assert self.directory is not None
+
+        return (
+            self.directory / f"slot{slot}.dat",
+            self.directory / f"slot{slot}.json",
+        )
+
+    def _load_slots(self):
+        """Maps the existing slot files and loads the frames they hold."""
+
+        data_file, _ = self._get_paths(0)
+        if not data_file.exists():
+            return
+
+        if self.slot_size is None:
+            self.slot_size = data_file.stat().st_size
+
+        self._allocate()
+
+        for slot in range(self.n_slots):
+            _, meta_file = self._get_paths(slot)
+            if not meta_file.exists():
+                continue
+
+            try:
+                self.frames[slot] = json.loads(meta_file.read_text())
+            except ValueError:
+                meta_file.unlink()
+
+    def _allocate(self):
+        """Allocates the slots."""
+
+        assert self.slot_size is not None
+
+        for slot in range(self.n_slots):
+            if self.directory is None:
+                buffer = numpy.empty(self.slot_size, dtype=numpy.uint8)
+            else:
+                data_file, meta_file = self._get_paths(slot)
+                exists = data_file.exists()
+                if exists and data_file.stat().st_size != self.slot_size:
+                    data_file.unlink()
+                    meta_file.unlink(missing_ok=True)
+                    exists = False
+                buffer = numpy.memmap(
+                    data_file,
+                    dtype=numpy.uint8,
+                    mode="r+" if exists else "w+",
+                    shape=(self.slot_size,),
+                )
+
+            self.slots.append(buffer)
+
+    def _get_view(self, slot: int, frame: Mapping[str, Any]) -> numpy.ndarray:
+        """Returns the array of a frame stored in a slot."""
+
+        dtype = numpy.dtype(frame["dtype"])
+        shape = tuple(frame["shape"])
+        n_bytes = int(numpy.prod(shape)) * dtype.itemsize
+
+        return self.slots[slot][:n_bytes].view(dtype).reshape(shape)
+
+    def _find_free(self) -> int | None:
+        """Returns the next free slot, starting after the last one used."""
+
+        for ii in range(self.n_slots):
+            slot = (self._next + ii) % self.n_slots
+            if self.frames[slot] is None:
+                return slot
+
+        return None
+
+    def reserve(self, slot_size: int):
+        """Makes sure that the slots can hold frames of ``slot_size`` bytes.
+
+        Called with the size of a full frame before storing frames, so that the
+        size of the slots does not depend on the first frame stored, which may be
+        windowed or binned. Smaller slots are only reallocated while they are all
+        free. Does nothing if the slot size was set explicitly.
+
+        """
+
+        if self._fixed_size:
+            return
+
+        if self.slot_size is not None and self.slot_size >= slot_size:
+            return
+
+        if len(self.slots) > 0 and self.in_use > 0:
+            return
+
+        self.slot_size = slot_size
+
+        if len(self.slots) > 0:
+            self.slots = []
+            self._allocate()
+
+    def store(self, filename: str, data: numpy.ndarray) -> numpy.ndarray:
+        """Copies a frame into a free slot.
+
+        Parameters
+        ----------
+        filename
+            The file to which the frame will be written. Used to release the slot.
+        data
+            The frame data.
+
+        Returns
+        -------
+        data
+            A view of the frame in the ring, or the original array if the frame
+            could not be stored.
+
+        """
+
+        if self.slot_size is None:
+            self.slot_size = data.nbytes
+
+        if len(self.slots) == 0:
+            self._allocate()
+
+        slot = self._find_free()
+        if slot is None or data.nbytes > self.slot_size:
+            self.overflows += 1
+            return data
+
+        frame = {
+            "filename": str(filename),
+            "shape": list(data.shape),
+            "dtype": data.dtype.str,
+        }
+
+        view = self._get_view(slot, frame)
+        view[:] = data
+
+        self.frames[slot] = frame
+        self._next = (slot + 1) % self.n_slots
+
+        if self.directory is not None:
+            _, meta_file = self._get_paths(slot)
+            meta_file.write_text(json.dumps(frame))
+
+        return view
+
+    def release(self, filename: str):
+        """Frees the slot holding the frame for a file, if any."""
+
+        for slot, frame in enumerate(self.frames):
+            if frame is None or frame["filename"] != str(filename):
+                continue
+
+            self.frames[slot] = None
+
+            if self.directory is not None:
+                _, meta_file = self._get_paths(slot)
+                meta_file.unlink(missing_ok=True)
+
+    def pending(self) -> list[tuple[str, numpy.ndarray]]:
+        """Returns the file name and data of the frames not yet released."""
+
+        return [
+            (frame["filename"], self._get_view(slot, frame))
+            for slot, frame in enumerate(self.frames)
+            if frame is not None
+        ]
@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: header_sources.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass, field
+
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy
+
+
+__all__ = [
+    "HeaderKey",
+    "HeaderSource",
+    "HeaderSourceReply",
+    "TRANSFORMS",
+    "load_header_sources",
+    "resolve_path",
+    "get_header_values",
+]
+
+
+def _hours_to_degrees(value: float, **_) -> float:
+    """Converts hours to degrees. Negative values are considered invalid."""
+
+    return value * 15.0 if value > 0 else value
+
+
+def _airmass(altitude: float, **_) -> float:
+    """Returns the airmass from the altitude in degrees."""
+
+    return 1 / numpy.cos(numpy.radians(90 - altitude))
+
+
+def _hartmann(open_status: list[bool], **_) -> str:
+    """Returns the Hartmann door status as ``'<left> <right>'`` (0=open, 1=closed)."""
+
+    return " ".join("0" if is_open else "1" for is_open in open_status)
+
+
+def _outlet_state(outlets: list[dict], name: str = "", **_) -> str:
+    """Returns ``ON`` or ``OFF`` for the outlet called ``name``."""
+
+    for outlet in outlets:
+        if outlet["name"] == name:
+            return "ON" if outlet["state"] else "OFF"
+
+    raise KeyError(f"Outlet {name!r} not found.")
+
+
+#: Transforms that can be applied to reply values. They receive the value
+#: and the arguments for the key as keyword arguments.
+TRANSFORMS: dict[str, Callable[..., Any]] = {
+    "hours_to_degrees": _hours_to_degrees,
+    "airmass": _airmass,
+    "hartmann": _hartmann,
+    "outlet_state": _outlet_state,
+}
+
+
+@dataclass
+class HeaderKey:
+    """A header keyword whose value is taken from the reply to a source command.
+
+    Parameters
+    ----------
+    key
+        The header keyword.
+    path
+        The path to the value in the reply, as the keyword followed by nested
+        keys separated by dots. It can be a list of paths, in which case the
+        transform receives a list of values. Paths can include the placeholders
+        of the source and ``{ccd}``, which makes the value specific to each CCD.
+    transform
+        The name of a function in `.TRANSFORMS` to apply to the value.
+    args
+        Keyword arguments for the transform. Strings are formatted with the
+        placeholders of the source.
+    round
+        Number of decimals to which the value is rounded.
+    comment
+        The comment for the keyword, if it's not already in the header.
+    ccd_from
+        A path to a value in the reply with the name of the only CCD to which
+        the value applies.
+    context
+        Additional placeholder values (e.g., the lamp of a repeated key).
+
+    """
+
+    key: str
+    path: str | list[str]
+    transform: str | None = None
+    args: dict[str, Any] = field(default_factory=dict)
+    round: int | None = None
+    comment: str = ""
+    ccd_from: str | None = None
+    context: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, key: str, config: str | list | Mapping[str, Any]):
+        """Creates a header key from its configuration."""
+
+        if isinstance(config, (str, list)):
+            return cls(key=key, path=config)
+
+        return cls(key=key, **config)
+
+
+@dataclass
+class HeaderSource:
+    """A command whose replies are used to populate header keywords.
+
+    Parameters
+    ----------
+    name
+        A unique name for the source.
+    actor
+        The actor to command. Can include placeholders.
+    command
+        The command string. Can include placeholders.
+    keys
+        The list of header keys populated with this source.
+    group
+        The group to which the source belongs. The groups can be used to select
+        which sources are run for an exposure. Defaults to the name.
+    timeout
+        Maximum time to wait for the command to finish.
+    priority
+        Sources with higher priority are started first and, if several sources
+        set the same keyword, the value from the one with higher priority is used.
+    flavours
+        The image types for which the source is used. `None` for all.
+    internal
+        Whether to send the command as internal.
+    context
+        Additional placeholder values (e.g., the telescope of a repeated source).
+
+    """
+
+    name: str
+    actor: str
+    command: str
+    keys: list[HeaderKey]
+    group: str = ""
+    timeout: float = 5.0
+    priority: int = 0
+    flavours: list[str] | None = None
+    internal: bool = False
+    context: dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.group = self.group or self.name
+
+    def applies_to(self, flavour: str | None) -> bool:
+        """Returns whether the source must be used for an image type."""
+
+        return self.flavours is None or flavour is None or flavour in self.flavours
+
+    def format(self, value: str, **context) -> str:
+        """Formats a string with the placeholders of the source."""
+
+        return value.format(**{**context, **self.context})
+
+
+@dataclass
+class HeaderSourceReply:
+    """The replies received for a source.
+
+    Parameters
+    ----------
+    source
+        The name of the source.
+    context
+        The placeholder values used when sending the command.
+    message
+        The keywords in the replies. If a keyword was output more than once,
+        the first value is used.
+
+    """
+
+    source: str
+    context: dict[str, str]
+    message: dict[str, Any]
+
+
+def _expand_repeat(
+    repeat_config: Mapping[str, str | list[str]],
+    config: Mapping[str, Any],
+) -> list[tuple[tuple[str, ...], dict[str, str]]]:
+    """Returns the combinations of values and placeholders for a ``repeat``."""
+
+    repeat: dict[str, list[str]] = {}
+    for rkey, rvalues in repeat_config.items():
+        if isinstance(rvalues, str):
+            rvalues = config.get(rvalues, [])
+        repeat[rkey] = list(rvalues)
+
+    expanded: list[tuple[tuple[str, ...], dict[str, str]]] = []
+    for combination in itertools.product(*repeat.values()):
+        context: dict[str, str] = {}
+        for rkey, rvalue in zip(repeat, combination):
+            context[rkey] = rvalue
+            context[rkey.upper()] = rvalue.upper()
+        expanded.append((combination, context))
+
+    return expanded
+
+
+def _load_header_keys(
+    keys_config: Mapping[str, Any],
+    context: dict[str, str],
+    config: Mapping[str, Any],
+) -> list[HeaderKey]:
+    """Creates the header keys of a source, expanding the repeated keys."""
+
+    keys: list[HeaderKey] = []
+
+    for key, key_config in keys_config.items():
+        if not isinstance(key_config, Mapping) or "repeat" not in key_config:
+            keys.append(HeaderKey.from_config(key.format(**context), key_config))
+            continue
+
+        key_config = dict(key_config)
+        for _, key_context in _expand_repeat(key_config.pop("repeat"), config):
+            full_context = {**context, **key_context}
+            hkey = HeaderKey.from_config(key.format(**full_context), key_config)
+            hkey.context = key_context
+            keys.append(hkey)
+
+    return keys
+
+
+def load_header_sources(
+    sources_config: Mapping[str, Mapping[str, Any]],
+    config: Mapping[str, Any] = {},
+) -> list[HeaderSource]:
+    """Creates the header sources from the configuration.
+
+    Sources with a ``repeat`` mapping are expanded to one source per combination
+    of the repeated values. The values can be a list or the name of a list in the
+    main configuration. Each value is available as a placeholder with the name of
+    the repeat key and, in uppercase, with the key in uppercase. Keys can also
+    have a ``repeat`` mapping, in which case they are expanded to one key per
+    combination within the same source, so that a single command is sent.
+
+    """
+
+    sources: list[HeaderSource] = []
+
+    for name, source_config in sources_config.items():
+        source_config = dict(source_config)
+
+        repeat = _expand_repeat(source_config.pop("repeat", {}), config)
+        keys_config = source_config.pop("keys", {})
+        group = source_config.pop("group", name)
+
+        for combination, context in repeat:
+            source_name = name
+            if len(context) > 0:
+                source_name += "[" + ",".join(combination) + "]"
+
+            keys = _load_header_keys(keys_config, context, config)
+
+            sources.append(
+                HeaderSource(
+                    name=source_name,
+                    keys=keys,
+                    context=context,
+                    group=group,
+                    **source_config,
+                )
+            )
+
+    return sources
+
+
+def resolve_path(message: Mapping[str, Any], path: str) -> Any:
+    """Returns the value at a path in a reply message.
+
+    The path is the keyword followed by nested keys or list indices separated by
+    dots. Raises `KeyError` if the path does not exist.
+
+    """
+
+    value: Any = message
+    for part in path.split("."):
+        if isinstance(value, Mapping):
+            value = value[part]
+        elif isinstance(value, (list, tuple)) and part.lstrip("-").isdigit():
+            try:
+                value = value[int(part)]
+            except IndexError:
+                raise KeyError(path)
+        else:
+            raise KeyError(path)
+
+    return value
+
+
+def get_header_values(
+    sources: Iterable[HeaderSource],
+    replies: Iterable[HeaderSourceReply],
+    ccd: str | None = None,
+) -> dict[str, tuple[Any, str]]:
+    """Returns the header values for a CCD from the replies of the sources.
+
+    This function does not do any I/O and can be used to recompute a header
+    from stored replies.
+
+    Parameters
+    ----------
+    sources
+        The header sources.
+    replies
+        The replies received for each source.
+    ccd
+        The CCD for which the values are calculated.
+
+    Returns
+    -------
+    values
+        A mapping of header keyword to value and comment. Keywords whose value
+        could not be determined are not included.
+
+    """
+
+    sources_by_name = {source.name: source for source in sources}
+    values: dict[str, tuple[Any, str]] = {}
+
+    # Process the replies in order of increasing priority so that the values
+    # from the sources with higher priority take precedence.
+    replies = sorted(
+        [reply for reply in replies if reply.source in sources_by_name],
+        key=lambda reply: sources_by_name[reply.source].priority,
+    )
+
+    for reply in replies:
+        source = sources_by_name[reply.source]
+
+        for hkey in source.keys:
+            context = {**reply.context, **hkey.context, "ccd": ccd or ""}
+
+            try:
+                if hkey.ccd_from is not None:
+                    ccd_path = source.format(hkey.ccd_from, **context)
+                    if resolve_path(reply.message, ccd_path) != ccd:
+                        continue
+
+                if isinstance(hkey.path, str):
+                    value = resolve_path(
+                        reply.message,
+                        source.format(hkey.path, **context),
+                    )
+                else:
+                    value = [
+                        resolve_path(reply.message, source.format(path, **context))
+                        for path in hkey.path
+                    ]
+
+                if value is None:
+                    continue
+
+                if hkey.transform is not None:
+                    args = {
+                        akey: source.format(avalue, **context)
+                        if isinstance(avalue, str)
+                        else avalue
+                        for akey, avalue in hkey.args.items()
+                    }
+                    value = TRANSFORMS[hkey.transform](value, **args)
+
+                if hkey.round is not None:
+                    value = numpy.round(value, hkey.round)
+
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            values[hkey.key] = (value, hkey.comment)
+
+    return values
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: hooks.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import shlex
+import shutil
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+
+from typing import TYPE_CHECKING, Any, ClassVar, Mapping, Sequence
+
+from sdsstools.utils import cancel_task
+
+
+if TYPE_CHECKING:
+    from lvmscp.metrics import SCPMetrics
+
+
+__all__ = [
+    "PostWriteHook",
+    "CopyHook",
+    "CommandHook",
+    "SocketHook",
+    "load_hooks",
+    "get_file_context",
+    "PostWritePipeline",
+]
+
+
+@dataclass
+class PostWriteHook(abc.ABC):
+    """A step run after a file has been written.
+
+    The string options of the hooks can include placeholders for the values in
+    the context of the file: ``{filename}``, ``{basename}``, ``{dirname}``,
+    ``{mjd}``, ``{exposure_no}``, ``{ccd}``, ``{controller}``, ``{imagetyp}``,
+    and ``{checksum}``.
+
+    Parameters
+    ----------
+    name
+        The name of the hook, used in the log and metrics.
+    timeout
+        The maximum time for each attempt, in seconds.
+    retries
+        The number of times a failed hook is retried.
+    retry_delay
+        The time to wait before retrying, in seconds.
+
+    """
+
+    TYPE: ClassVar[str] = ""
+
+    name: str
+    timeout: float = 60.0
+    retries: int = 2
+    retry_delay: float = 5.0
+
+    @abc.abstractmethod
+    async def run(self, context: Mapping[str, Any]):
+        """Runs the hook for a file. Raises an exception if the hook fails."""
+
+
+@dataclass
+class CopyHook(PostWriteHook):
+    """Copies the file to a directory.
+
+    The file is copied with a temporary name and renamed once complete, so that
+    processes watching the directory never see a partial file.
+
+    Parameters
+    ----------
+    destination
+        The directory to which the file is copied. It's created if needed.
+
+    """
+
+    TYPE: ClassVar[str] = "copy"
+
+    destination: str = ""
+
+    def _copy(self, filename: str, destination: str) -> str:
+        """Copies the file. Runs in an executor."""
+
+        os.makedirs(destination, exist_ok=True)
+
+        dest_path = os.path.join(destination, os.path.basename(filename))
+        temp_path = dest_path + ".part"
+
+        shutil.copy2(filename, temp_path)
+        os.replace(temp_path, dest_path)
+
+        return dest_path
+
+    async def run(self, context: Mapping[str, Any]):
+        destination = self.destination.format(**context)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._copy, context["filename"], destination)
+
+
+@dataclass
+class CommandHook(PostWriteHook):
+    """Runs a program with the file as argument.
+
+    Parameters
+    ----------
+    command
+        The command to run. It's split into arguments before the placeholders are
+        replaced and it's not run in a shell. The hook fails if the command
+        returns a non-zero exit code.
+
+    """
+
+    TYPE: ClassVar[str] = "command"
+
+    command: str = ""
+
+    async def run(self, context: Mapping[str, Any]):
+        args = [arg.format(**context) for arg in shlex.split(self.command)]
+
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        try:
+            _, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            with suppress(ProcessLookupError):
+                process.kill()
+            await process.wait()
+            raise
+
+        if process.returncode != 0:
+            message = stderr.decode(errors="replace").strip()
+            raise RuntimeError(
+                f"{args[0]!r} exited with code {process.returncode}: {message}"
+            )
+
+
+@dataclass
+class SocketHook(PostWriteHook):
+    """Sends the context of the file as a line of JSON to a local socket.
+
+    Parameters
+    ----------
+    path
+        The path of a Unix socket.
+    host
+        The host of a TCP socket, if ``path`` is not set.
+    port
+        The port of the TCP socket.
+
+    """
+
+    TYPE: ClassVar[str] = "socket"
+
+    path: str | None = None
+    host: str = "127.0.0.1"
+    port: int | None = None
+
+    async def run(self, context: Mapping[str, Any]):
+        if self.path:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        elif self.port:
+            _, writer = await asyncio.open_connection(self.host, self.port)
+        else:
+            raise ValueError("The socket hook requires a path or a port.")
+
+        try:
+            writer.write(json.dumps(dict(context)).encode() + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+
+HOOK_TYPES: dict[str, type[PostWriteHook]] = {
+    hook_class.TYPE: hook_class for hook_class in [CopyHook, CommandHook, SocketHook]
+}
+
+
+def load_hooks(hooks_config: Sequence[Mapping[str, Any]]) -> list[PostWriteHook]:
+    """Creates the hooks from the ``post_write.hooks`` configuration."""
+
+    hooks: list[PostWriteHook] = []
+
+    for hook_config in hooks_config:
+        hook_config = dict(hook_config)
+
+        hook_type = hook_config.pop("type", None)
+        if hook_type not in HOOK_TYPES:
+            raise ValueError(f"Invalid post-write hook type {hook_type!r}.")
+
+        hook_config.setdefault("name", hook_type)
+        hooks.append(HOOK_TYPES[hook_type](**hook_config))
+
+    return hooks
+
+
+def get_file_context(filename: str, **kwargs) -> dict[str, Any]:
+    """Returns the placeholder values for a file."""
+
+    dirname = os.path.dirname(os.path.realpath(filename))
+
+    return {
+        "filename": filename,
+        "basename": os.path.basename(filename),
+        "dirname": dirname,
+        "mjd": os.path.basename(dirname),
+        **kwargs,
+    }
+
+
+class PostWritePipeline:
+    """Runs the post-write hooks from a bounded queue of workers.
+
+    Written files are added to the queue with `.submit`, which never waits, and
+    the hooks are run for each file, in order, by ``workers`` background tasks.
+    Failed hooks are retried and then skipped, and the following hooks still run.
+    If more than ``max_size`` files are waiting the new files are dropped, so a
+    slow hook never delays the exposures.
+
+    Parameters
+    ----------
+    hooks
+        The hooks to run for each file.
+    workers
+        The number of files processed at the same time.
+    max_size
+        The maximum number of files waiting to be processed.
+    metrics
+        If set, the duration and failures of each hook and the dropped files are
+        recorded.
+    log
+        The logger for the hook failures.
+
+    """
+
+    def __init__(
+        self,
+        hooks: Sequence[PostWriteHook],
+        workers: int = 2,
+        max_size: int = 100,
+        metrics: SCPMetrics | None = None,
+        log: logging.Logger | None = None,
+    ):
+        self.hooks = list(hooks)
+        self.n_workers = workers
+        self.metrics = metrics
+        self.log = log or logging.getLogger("lvmscp.hooks")
+
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=max_size)
+        self.workers: list[asyncio.Task] = []
+
+        self.dropped: int = 0
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], **kwargs):
+        """Creates a pipeline from the ``post_write`` configuration section."""
+
+        return cls(
+            load_hooks(config.get("hooks", None) or []),
+            workers=config.get("workers", 2),
+            max_size=config.get("max_size", 100),
+            **kwargs,
+        )
+
+    def start(self):
+        """Starts the workers."""
+
+        if len(self.workers) == 0:
+            self.workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.n_workers)
+            ]
+
+        return self
+
+    async def stop(self, timeout: float | None = None):
+        """Stops the workers, waiting up to ``timeout`` for the queue to empty."""
+
+        if timeout and len(self.workers) > 0:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.queue.join(), timeout)
+
+        for worker in self.workers:
+            await cancel_task(worker)
+
+        self.workers = []
+
+    async def join(self):
+        """Waits until all the submitted files have been processed."""
+
+        await self.queue.join()
+
+    def submit(self, context: Mapping[str, Any]) -> bool:
+        """Queues a file. Returns `False` if the queue is full and it was dropped.
+
+        ``context`` must include the ``filename`` and the values used in the
+        placeholders of the hooks (see `.get_file_context`).
+
+        """
+
+        if len(self.hooks) == 0:
+            return True
+
+        self.start()
+
+        try:
+            self.queue.put_nowait(dict(context))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self.log.warning(f"Post-write queue full. Dropping {context['filename']}.")
+            return False
+
+        return True
+
+    async def run_hook(self, hook: PostWriteHook, context: Mapping[str, Any]) -> bool:
+        """Runs a hook with retries. Returns `False` if all the attempts failed."""
+
+        for attempt in range(hook.retries + 1):
+            t0 = time.perf_counter()
+
+            try:
+                await asyncio.wait_for(hook.run(context), hook.timeout)
+            except Exception as err:
+                if isinstance(err, asyncio.TimeoutError):
+                    err = TimeoutError(f"timed out after {hook.timeout} s.")
+
+                if self.metrics:
+                    self.metrics.post_write_failures.inc(hook=hook.name)
+
+                if attempt < hook.retries:
+                    await asyncio.sleep(hook.retry_delay)
+                    continue
+
+                self.log.warning(
+                    f"Post-write hook {hook.name!r} failed for "
+                    f"{context['filename']}: {err}"
+                )
+                return False
+
+            if self.metrics:
+                elapsed = time.perf_counter() - t0
+                self.metrics.post_write_seconds.observe(elapsed, hook=hook.name)
+
+            return True
+
+        return False
+
+    async def _worker(self):
+        """Runs the hooks for the queued files."""
+
+        while True:
+            context = await self.queue.get()
+
+            try:
+                for hook in self.hooks:
+                    await self.run_hook(hook, context)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: index.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import os
+import pathlib
+import sqlite3
+
+from typing import Any, Iterable, Mapping
+
+
+__all__ = [
+    "ExposureIndex",
+    "row_from_header",
+    "parse_header_filters",
+    "DEFAULT_HEADER_KEYS",
+]
+
+
+# Header keywords stored by default in addition to the indexed columns.
+DEFAULT_HEADER_KEYS: list[str] = [
+    "OBJECT",
+    "HARTMANN",
+    "CCDTEMP1",
+    "LABTEMP",
+    "TESCIRA",
+    "TESCIDE",
+]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exposure (
+    pk INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    exposure_no INTEGER,
+    mjd INTEGER,
+    controller TEXT,
+    ccd TEXT,
+    flavour TEXT,
+    exptime REAL,
+    start_time TEXT,
+    end_time TEXT,
+    checksum TEXT
+);
+
+CREATE TABLE IF NOT EXISTS header (
+    exposure_pk INTEGER NOT NULL REFERENCES exposure(pk) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (exposure_pk, key)
+);
+
+CREATE INDEX IF NOT EXISTS exposure_no_idx ON exposure (exposure_no);
+CREATE INDEX IF NOT EXISTS exposure_mjd_idx ON exposure (mjd, flavour, controller);
+CREATE INDEX IF NOT EXISTS exposure_ccd_idx ON exposure (ccd, mjd);
+CREATE INDEX IF NOT EXISTS header_key_value_idx ON header (key, value);
+"""
+
+COLUMNS = [
+    "path",
+    "exposure_no",
+    "mjd",
+    "controller",
+    "ccd",
+    "flavour",
+    "exptime",
+    "start_time",
+    "end_time",
+    "checksum",
+]
+
+
+def _to_text(value: Any) -> str | None:
+    """Converts a header value to the text stored in the index."""
+
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "T" if value else "F"
+
+    return str(value)
+
+
+def row_from_header(
+    path: str | os.PathLike,
+    header: Mapping[str, Any],
+    checksum: str | None = None,
+) -> dict[str, Any]:
+    """Returns the index row for a file from its header.
+
+    Parameters
+    ----------
+    path
+        The path to the file.
+    header
+        A mapping of header keyword to value.
+    checksum
+        The checksum of the file, if known.
+
+    """
+
+    mjd = header.get("SMJD", None) or header.get("MJD", None)
+
+    exposure_no = header.get("EXPOSURE", None)
+    exptime = header.get("EXPTIME", None)
+
+    return {
+        "path": os.path.realpath(str(path)),
+        "exposure_no": int(exposure_no) if exposure_no is not None else None,
+        "mjd": int(mjd) if mjd is not None else None,
+        "controller": header.get("SPEC", None),
+        "ccd": header.get("CCD", None),
+        "flavour": header.get("IMAGETYP", None),
+        "exptime": float(exptime) if exptime is not None else None,
+        "start_time": header.get("INTSTART", None) or header.get("OBSTIME", None),
+        "end_time": header.get("INTEND", None),
+        "checksum": checksum,
+    }
+
+
+def parse_header_filters(values: Iterable[str]) -> dict[str, str]:
+    """Parses a list of ``KEY=VALUE`` header filters."""
+
+    filters: dict[str, str] = {}
+
+    for value in values:
+        if "=" not in value:
+            raise ValueError(f"Invalid header filter {value!r}. Use KEY=VALUE.")
+        key, hvalue = value.split("=", 1)
+        filters[key.strip().upper()] = hvalue.strip()
+
+    return filters
+
+
+class ExposureIndex:
+    """A local SQLite index of the exposures written to disk.
+
+    Each file has a row with the exposure number, MJD, controller, CCD, flavour,
+    exposure time, start and end time, path, and checksum. A selection of other
+    header keywords is stored in a key-value table. All the columns used for
+    queries are indexed so that lookups do not depend on the size of the index.
+
+    A new connection is opened for each operation, so the index can be used from
+    executor threads and from other processes at the same time as the actor.
+
+    Parameters
+    ----------
+    path
+        The path to the SQLite database. Created if it does not exist.
+    header_keys
+        The header keywords to store for each file.
+
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        header_keys: Iterable[str] | None = None,
+    ):
+        self.path = pathlib.Path(path).expanduser()
+        self.header_keys = list(header_keys or DEFAULT_HEADER_KEYS)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self.connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def connect(self) -> sqlite3.Connection:
+        """Returns a connection to the database."""
+
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+
+        return conn
+
+    def insert(
+        self,
+        path: str | os.PathLike,
+        header: Mapping[str, Any],
+        checksum: str | None = None,
+    ):
+        """Adds or replaces a file in the index.
+
+        Parameters
+        ----------
+        path
+            The path to the file.
+        header
+            A mapping of header keyword to value.
+        checksum
+            The checksum of the file, if known.
+
+        """
+
+        self.insert_many([(path, header, checksum)])
+
+    def insert_many(
+        self,
+        files: Iterable[tuple[str | os.PathLike, Mapping[str, Any], str | None]],
+    ):
+        """Adds or replaces several files in the index in a single transaction."""
+
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        sql = f"INSERT OR REPLACE INTO exposure ({', '.join(COLUMNS)}) "
+        sql += f"VALUES ({placeholders})"
+
+        conn = self.connect()
+        try:
+            with conn:
+                for path, header, checksum in files:
+                    row = row_from_header(path, header, checksum=checksum)
+                    cursor = conn.execute(sql, [row[col] for col in COLUMNS])
+
+                    conn.executemany(
+                        "INSERT INTO header (exposure_pk, key, value) VALUES (?, ?, ?)",
+                        [
+                            (cursor.lastrowid, key, _to_text(header[key]))
+                            for key in self.header_keys
+                            if key in header
+                        ],
+                    )
+        finally:
+            conn.close()
+
+    def has_path(self, path: str | os.PathLike) -> bool:
+        """Returns whether a file is already in the index."""
+
+        conn = self.connect()
+        try:
+            cursor = conn.execute(
+                "SELECT 1 FROM exposure WHERE path = ?",
+                (os.path.realpath(str(path)),),
+            )
+            return cursor.fetchone() is not None
+        finally:
+            conn.close()
+
+    def query(
+        self,
+        exposure_no: int | None = None,
+        mjd: int | None = None,
+        min_mjd: int | None = None,
+        max_mjd: int | None = None,
+        controller: str | None = None,
+        ccd: str | None = None,
+        flavour: str | None = None,
+        header: Mapping[str, Any] | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Queries the index.
+
+        All the conditions are combined with ``AND``. ``header`` is a mapping of
+        header keyword to value; the values are compared as text. The results
+        are sorted by exposure number, newest first, and include the stored
+        header keywords.
+
+        """
+
+        conditions: list[str] = []
+        params: list[Any] = []
+
+        for column, value in [
+            ("exposure_no", exposure_no),
+            ("mjd", mjd),
+            ("controller", controller),
+            ("ccd", ccd),
+            ("flavour", flavour),
+        ]:
+            if value is not None:
+                conditions.append(f"e.{column} = ?")
+                params.append(value)
+
+        if min_mjd is not None:
+            conditions.append("e.mjd >= ?")
+            params.append(min_mjd)
+
+        if max_mjd is not None:
+            conditions.append("e.mjd <= ?")
+            params.append(max_mjd)
+
+        for key, value in (header or {}).items():
+            conditions.append(
+                "EXISTS (SELECT 1 FROM header h WHERE h.exposure_pk = e.pk "
+                "AND h.key = ? AND h.value = ?)"
+            )
+            params += [key.upper(), _to_text(value)]
+
+        sql = f"SELECT e.pk, {', '.join('e.' + col for col in COLUMNS)} FROM exposure e"
+        if len(conditions) > 0:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY e.exposure_no DESC, e.ccd"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        conn = self.connect()
+        try:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+
+            for row in rows:
+                pk = row.pop("pk")
+                row["header"] = {
+                    hrow["key"]: hrow["value"]
+                    for hrow in conn.execute(
+                        "SELECT key, value FROM header WHERE exposure_pk = ?",
+                        (pk,),
+                    )
+                }
+        finally:
+            conn.close()
+
+        return rows
+
+    def backfill(
+        self,
+        directory: str | os.PathLike,
+        pattern: str = "**/sdR-*.fits*",
+        overwrite: bool = False,
+    ) -> int:
+        """Adds existing files to the index.
+
+        Parameters
+        ----------
+        directory
+            The directory to search for files. Usually the data directory or
+            an MJD directory.
+        pattern
+            The glob pattern used to find files, relative to ``directory``.
+        overwrite
+            If `False`, files already in the index are skipped.
+
+        Returns
+        -------
+        n_files
+            The number of files added to the index.
+
+        """
+
+        from astropy.io import fits
+
+        files: list[tuple[str, Mapping[str, Any], str | None]] = []
+        checksums: dict[str, str] = {}
+
+        # Use the checksum files in the MJD directories, if present.
+        for checksum_file in pathlib.Path(directory).glob("**/*sum"):
+            with open(checksum_file, "r") as fd:
+                for line in fd:
+                    if len(parts := line.split()) == 2:
+                        fpath = os.path.realpath(checksum_file.parent / parts[1])
+                        checksums[fpath] = parts[0]
+
+        for path in sorted(pathlib.Path(directory).glob(pattern)):
+            if path.suffix == ".part" or not path.is_file():
+                continue
+
+            if not overwrite and self.has_path(path):
+                continue
+
+            # Rice-compressed files store the header in the first extension.
+            ext = 1 if path.name.endswith(".fz") else 0
+
+            try:
+                header = fits.getheader(path, ext)
+            except Exception:
+                continue
+
+            files.append((str(path), header, checksums.get(os.path.realpath(path))))
+
+        self.insert_many(files)
+
+        return len(files)
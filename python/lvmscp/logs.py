@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: logs.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from logging.handlers import BaseRotatingHandler, QueueHandler
+
+from typing import Iterable
+
+
+__all__ = ["BatchingQueueHandler"]
+
+
+class BatchingQueueHandler(QueueHandler):
+    """A logging handler that writes records from a background thread.
+
+    Records are added to a bounded queue without blocking. A background thread
+    takes the records from the queue in batches and passes them to the wrapped
+    handlers. Stream and file handlers write each batch with a single write and
+    flush. If the queue is full the record is dropped and counted in `.dropped`.
+
+    Parameters
+    ----------
+    handlers
+        The handlers that output the records.
+    max_size
+        The maximum number of records waiting to be written.
+    batch_size
+        The maximum number of records written at once.
+    flush_interval
+        Maximum time, in seconds, that the background thread waits for more
+        records before writing a batch.
+
+    """
+
+    def __init__(
+        self,
+        handlers: Iterable[logging.Handler],
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+    ):
+        super().__init__(queue.Queue(maxsize=max_size))
+
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.dropped: int = 0
+        self.written: int = 0
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def install(
+        cls, log: logging.Logger, handlers: Iterable[logging.Handler], **kwargs
+    ):
+        """Moves handlers of a logger behind a new queue handler and starts it."""
+
+        handlers = [handler for handler in handlers if handler is not None]
+        for handler in handlers:
+            log.removeHandler(handler)
+
+        queue_handler = cls(handlers, **kwargs)
+        log.addHandler(queue_handler)
+        queue_handler.start()
+
+        return queue_handler
+
+    def uninstall(self, log: logging.Logger):
+        """Stops the handler and restores the wrapped handlers in a logger."""
+
+        log.removeHandler(self)
+        self.stop()
+
+        for handler in self.handlers:
+            log.addHandler(handler)
+
+    def enqueue(self, record: logging.LogRecord):
+        """Adds a record to the queue or drops it if the queue is full."""
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        """Starts the background thread."""
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="lvmscp-log-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0):
+        """Writes the pending records and stops the background thread."""
+
+        self._stop_event.set()
+
+        # Wake up the thread if it's waiting for records.
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        # Write anything that was added after the thread finished.
+        self._flush_queue()
+
+    def close(self):
+        """Stops the thread and closes the wrapped handlers."""
+
+        self.stop()
+
+        for handler in self.handlers:
+            handler.close()
+
+        super().close()
+
+    def _get_batch(self, block: bool = True) -> list[logging.LogRecord]:
+        """Returns the next batch of records."""
+
+        batch: list[logging.LogRecord] = []
+
+        try:
+            if block:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        # Remove the markers used to wake up the thread.
+        return [record for record in batch if record is not None]
+
+    def _run(self):
+        """Writes batches of records until the handler is stopped."""
+
+        while not self._stop_event.is_set():
+            batch = self._get_batch()
+            if len(batch) > 0:
+                self.write_batch(batch)
+
+        self._flush_queue()
+
+    def _flush_queue(self):
+        """Writes all the records in the queue."""
+
+        while not self.queue.empty():
+            batch = self._get_batch(block=False)
+            if len(batch) > 0:
+                self.write_batch(batch)
+
+    def write_batch(self, records: list[logging.LogRecord]):
+        """Outputs a batch of records to each of the wrapped handlers."""
+
+        for handler in self.handlers:
+            selected = [
+                record
+                for record in records
+                if record.levelno >= handler.level and handler.filter(record)
+            ]
+            if len(selected) == 0:
+                continue
+
+            if not isinstance(handler, logging.StreamHandler):
+                for record in selected:
+                    handler.handle(record)
+                continue
+
+            handler.acquire()
+            try:
+                if isinstance(handler, BaseRotatingHandler):
+                    if handler.shouldRollover(selected[0]):
+                        handler.doRollover()
+
+                if handler.stream is None and isinstance(handler, logging.FileHandler):
+                    handler.stream = handler._open()
+
+                handler.stream.write(
+                    "".join(
+                        handler.format(record) + handler.terminator
+                        for record in selected
+                    )
+                )
+                handler.flush()
+            except Exception:
+                handler.handleError(selected[0])
+            finally:
+                handler.release()
+
+        self.written += len(records)
@@ -0,0 +1,551 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: masters.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from typing import TYPE_CHECKING, Any, Mapping, Sequence
+
+import numpy
+from astropy.io import fits
+from numpy.lib.format import open_memmap
+
+
+if TYPE_CHECKING:
+    from lvmscp.metrics import SCPMetrics
+
+
+__all__ = [
+    "parse_section",
+    "robust_std",
+    "combine_stack",
+    "update_master",
+    "MasterLibrary",
+]
+
+
+FLAVOURS = ["bias", "dark"]
+
+# Number of rows of the stack combined at once, to limit the memory used.
+CHUNK_ROWS: int = 256
+
+SECTION_RE = re.compile(r"\[\s*(\d+):(\d+)\s*,\s*(\d+):(\d+)\s*\]")
+
+
+def parse_section(section: str) -> tuple[slice, slice]:
+    """Converts a FITS section (``[x0:x1, y0:y1]``) to numpy slices."""
+
+    match = SECTION_RE.match(section)
+    if not match:
+        raise ValueError(f"Invalid section {section!r}.")
+
+    x0, x1, y0, y1 = map(int, match.groups())
+
+    return (slice(y0 - 1, y1), slice(x0 - 1, x1))
+
+
+def robust_std(values: numpy.ndarray, sigma: float = 5.0) -> float:
+    """Returns the standard deviation of the values after rejecting outliers.
+
+    The outliers (cosmic rays, hot pixels) are rejected using the median absolute
+    deviation, which is not used as the estimate itself because it's quantised
+    for integer data with a noise of a few counts.
+
+    """
+
+    values = numpy.asarray(values, dtype=numpy.float32).ravel()
+
+    median = numpy.median(values)
+    deviation = numpy.abs(values - median)
+    mad = 1.4826 * numpy.median(deviation)
+    if mad > 0:
+        values = values[deviation <= sigma * mad]
+
+    return float(numpy.std(values))
+
+
+def combine_stack(
+    stack: numpy.ndarray,
+    method: str = "median",
+    sigma: float = 3.0,
+) -> numpy.ndarray:
+    """Combines a stack of frames into a master frame.
+
+    Parameters
+    ----------
+    stack
+        An array of shape ``(n_frames, rows, columns)``. It can be memory-mapped;
+        the rows are combined in chunks.
+    method
+        ``median``, or ``mean`` for a sigma-clipped mean in which the pixels
+        deviating more than ``sigma`` times the robust standard deviation from
+        the median are rejected. With fewer than three frames the median is used.
+    sigma
+        The rejection threshold for the ``mean`` method.
+
+    """
+
+    if method not in ["median", "mean"]:
+        raise ValueError(f"Invalid combine method {method!r}.")
+
+    n_frames, n_rows, n_cols = stack.shape
+    master = numpy.empty((n_rows, n_cols), dtype=numpy.float32)
+
+    for row0 in range(0, n_rows, CHUNK_ROWS):
+        block = numpy.asarray(stack[:, row0 : row0 + CHUNK_ROWS], dtype=numpy.float32)
+        median = numpy.median(block, axis=0)
+
+        if method == "median" or n_frames < 3:
+            master[row0 : row0 + CHUNK_ROWS] = median
+            continue
+
+        deviation = numpy.abs(block - median)
+        mad = 1.4826 * numpy.median(deviation, axis=0)
+        keep = deviation <= sigma * numpy.where(mad > 0, mad, numpy.inf)
+
+        n_keep = keep.sum(axis=0)
+        mean = numpy.where(keep, block, 0).sum(axis=0) / numpy.maximum(n_keep, 1)
+
+        master[row0 : row0 + CHUNK_ROWS] = numpy.where(n_keep > 0, mean, median)
+
+    return master
+
+
+def _read_frame(filename: str) -> tuple[numpy.ndarray, fits.Header]:
+    """Reads the image and header of a file, compressed or not."""
+
+    with fits.open(filename) as hdul:
+        hdu = hdul[1] if hdul[0].data is None and len(hdul) > 1 else hdul[0]
+        return numpy.asarray(hdu.data), hdu.header
+
+
+def _get_quadrants(
+    header: fits.Header,
+    shape: tuple[int, ...],
+) -> list[tuple[tuple, tuple]]:
+    """Returns the data and overscan sections of each quadrant.
+
+    Returns an empty list if the sections do not match the frame, for example if
+    the header was not updated for a windowed readout.
+
+    """
+
+    quadrants = []
+    for quad in range(1, 5):
+        trimsec = header.get(f"TRIMSEC{quad}", None)
+        biassec = header.get(f"BIASSEC{quad}", None)
+        if trimsec is None or biassec is None:
+            break
+
+        sections = (parse_section(trimsec), parse_section(biassec))
+        if any(
+            section[0].stop > shape[0] or section[1].stop > shape[1]
+            for section in sections
+        ):
+            return []
+
+        quadrants.append(sections)
+
+    return quadrants
+
+
+def _write_atomic(path: str, array: numpy.ndarray):
+    """Saves an array with a temporary name and renames it."""
+
+    temp_path = path + ".part.npy"
+    numpy.save(temp_path, array)
+    os.replace(temp_path, path)
+
+
+def update_master(
+    path: str,
+    ccd: str,
+    flavour: str,
+    filename: str,
+    stack_size: int = 10,
+    method: str = "median",
+    sigma: float = 3.0,
+    gain: Sequence[float] | None = None,
+) -> dict[str, Any]:
+    """Adds a bias or dark to the stack of a CCD and recalculates its master.
+
+    Meant to run in a worker process. The stack is a memory-mapped file in
+    ``path`` with the last ``stack_size`` frames (``uint16`` raw counts for
+    biases, ``float32`` count rates for darks), and the master is saved as a
+    ``float32`` array next to it. Darks are bias-subtracted with the master bias,
+    or with the overscan if there is no master bias, and divided by the exposure
+    time. Frames smaller than the stack (e.g., windowed readouts) are skipped, and
+    the stack is restarted if a larger frame is received.
+
+    Returns
+    -------
+    stats
+        A dictionary with the number of frames in the stack, the median level of
+        each quadrant of the frame and of the master, and, for biases, the read
+        noise of each quadrant in electrons (or ADU, if ``gain`` is not set).
+        ``skipped`` is set to the reason if the frame was not added.
+
+    """
+
+    if flavour not in FLAVOURS:
+        raise ValueError(f"Invalid flavour {flavour!r}.")
+
+    os.makedirs(path, exist_ok=True)
+
+    data, header = _read_frame(filename)
+    quadrants = _get_quadrants(header, data.shape)
+    gain = list(gain or [1.0] * len(quadrants))
+
+    stats: dict[str, Any] = {
+        "ccd": ccd,
+        "flavour": flavour,
+        "filename": filename,
+        "skipped": None,
+    }
+
+    state_path = os.path.join(path, f"{ccd}_{flavour}.json")
+    stack_path = os.path.join(path, f"{ccd}_{flavour}_stack.npy")
+    master_path = os.path.join(path, f"{ccd}_{flavour}.npy")
+
+    state: dict[str, Any] = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r") as fd:
+            state = json.load(fd)
+
+    # Frames smaller than the stack (windowed or binned) are skipped. A larger
+    # frame means that the stack was started with one of those, so it's restarted.
+    count = state.get("count", 0)
+    same_shape = state.get("shape", None) == list(data.shape)
+    if count > 0 and not same_shape:
+        if data.size <= numpy.prod(state.get("shape", [0])):
+            stats["skipped"] = f"shape {data.shape} does not match the stack."
+            return stats
+
+    same_stack = (
+        same_shape
+        and state.get("stack_size", None) == stack_size
+        and os.path.exists(stack_path)
+    )
+
+    if flavour == "dark":
+        exptime = float(header.get("EXPTIME", 0) or 0)
+        if exptime <= 0:
+            stats["skipped"] = "exposure time is zero."
+            return stats
+
+        frame = data.astype(numpy.float32)
+
+        bias_path = os.path.join(path, f"{ccd}_bias.npy")
+        master_bias = numpy.load(bias_path) if os.path.exists(bias_path) else None
+        if master_bias is not None and master_bias.shape == frame.shape:
+            frame -= master_bias
+        else:
+            for data_sec, bias_sec in quadrants:
+                frame[data_sec] -= numpy.median(frame[bias_sec])
+
+        frame /= exptime
+        dtype = numpy.float32
+    else:
+        frame = data
+        dtype = numpy.uint16
+
+    if same_stack:
+        stack = open_memmap(stack_path, mode="r+")
+    else:
+        shape = (stack_size, *data.shape)
+        stack = open_memmap(stack_path, mode="w+", dtype=dtype, shape=shape)
+        count = 0
+        state = {"shape": list(data.shape), "stack_size": stack_size, "next": 0}
+
+    # The read noise is measured against the master of the previous frames, which
+    # removes the fixed pattern, or in the overscan for the first frame.
+    if flavour == "bias":
+        readnoise = []
+        previous = numpy.load(master_path) if count > 0 else None
+        for quad, (data_sec, bias_sec) in enumerate(quadrants):
+            if previous is not None:
+                diff = frame[data_sec].astype(numpy.float32) - previous[data_sec]
+                noise = robust_std(diff) / numpy.sqrt(1 + 1 / count)
+            else:
+                noise = robust_std(frame[bias_sec])
+            readnoise.append(round(float(noise * gain[quad]), 3))
+        stats["readnoise"] = readnoise
+
+    index = state.get("next", 0)
+    stack[index] = numpy.clip(frame, 0, 65535) if flavour == "bias" else frame
+    stack.flush()
+
+    count = min(count + 1, stack_size)
+    master = combine_stack(stack[:count], method=method, sigma=sigma)
+    _write_atomic(master_path, master)
+
+    del stack
+
+    stats["nframes"] = count
+    stats["level"] = [
+        round(float(numpy.median(frame[data_sec])), 3) for data_sec, _ in quadrants
+    ]
+    stats["master_level"] = [
+        round(float(numpy.median(master[data_sec])), 3) for data_sec, _ in quadrants
+    ]
+
+    state.update(
+        {
+            "count": count,
+            "next": (index + 1) % stack_size,
+            "filenames": (state.get("filenames", []) + [filename])[-stack_size:],
+            "updated": time.time(),
+            "stats": stats,
+        }
+    )
+
+    temp_path = state_path + ".part"
+    with open(temp_path, "w") as fd:
+        json.dump(state, fd)
+    os.replace(temp_path, state_path)
+
+    return stats
+
+
+class MasterLibrary:
+    """A per-CCD library of master biases and dark rates.
+
+    Biases and darks are added with `.submit` as they are written, and the stack
+    and master of the CCD are updated by `.update_master` in a process pool, so
+    the combination never blocks the event loop. The updates of each stack are
+    run in order.
+
+    Parameters
+    ----------
+    path
+        The directory where the stacks and masters are stored.
+    detectors
+        The configuration of each CCD, with its ``gain`` and ``readnoise`` per
+        quadrant.
+    stack_size
+        The number of frames combined for each master.
+    method
+        The combine method, ``median`` or sigma-clipped ``mean``.
+    sigma
+        The rejection threshold for the ``mean`` method.
+    workers
+        The number of worker processes.
+    readnoise_tolerance
+        The maximum difference, in electrons, between the measured read noise and
+        the configuration before it's flagged.
+    metrics
+        If set, the duration of the updates is recorded.
+    log
+        The logger for the failed updates.
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        detectors: Mapping[str, Mapping[str, Any]] = {},
+        stack_size: int = 10,
+        method: str = "median",
+        sigma: float = 3.0,
+        workers: int = 1,
+        readnoise_tolerance: float = 0.5,
+        metrics: SCPMetrics | None = None,
+        log: logging.Logger | None = None,
+    ):
+        if method not in ["median", "mean"]:
+            raise ValueError(f"Invalid combine method {method!r}.")
+
+        self.path = path
+        self.detectors = dict(detectors)
+        self.stack_size = stack_size
+        self.method = method
+        self.sigma = sigma
+        self.readnoise_tolerance = readnoise_tolerance
+        self.metrics = metrics
+        self.log = log or logging.getLogger("lvmscp.masters")
+
+        self.n_workers = workers
+        self.executor: ProcessPoolExecutor | None = None
+
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], actor_config: Mapping, **kwargs):
+        """Creates the library from the ``masters`` configuration section."""
+
+        detectors = {
+            ccd: detector
+            for controller in actor_config.get("controllers", {}).values()
+            for ccd, detector in controller.get("detectors", {}).items()
+        }
+
+        path = config.get("path", "masters")
+        actor_name = actor_config.get("actor", {}).get("name", "lvmscp")
+
+        return cls(
+            path.format(actor=actor_name),
+            detectors=detectors,
+            stack_size=config.get("stack_size", 10),
+            method=config.get("method", "median"),
+            sigma=config.get("sigma", 3.0),
+            workers=config.get("workers", 1),
+            readnoise_tolerance=config.get("readnoise_tolerance", 0.5),
+            **kwargs,
+        )
+
+    async def stop(self):
+        """Waits for the pending updates and shuts down the worker processes."""
+
+        await self.join()
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def join(self):
+        """Waits until all the submitted frames have been added."""
+
+        if len(self._tasks) > 0:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def submit(self, filename: str, ccd: str, flavour: str) -> asyncio.Task | None:
+        """Adds a bias or dark to the library in the background.
+
+        Returns the task running the update, or `None` if the flavour is not
+        a bias or a dark.
+
+        """
+
+        if flavour not in FLAVOURS:
+            return None
+
+        task = asyncio.create_task(self.update(filename, ccd, flavour))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return task
+
+    async def update(self, filename: str, ccd: str, flavour: str) -> dict | None:
+        """Updates the stack and master of a CCD with a file."""
+
+        lock = self._locks.setdefault((ccd, flavour), asyncio.Lock())
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.n_workers)
+
+        async with lock:
+            t0 = time.perf_counter()
+
+            try:
+                stats = await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    update_master,
+                    self.path,
+                    ccd,
+                    flavour,
+                    filename,
+                    self.stack_size,
+                    self.method,
+                    self.sigma,
+                    self.detectors.get(ccd, {}).get("gain", None),
+                )
+            except Exception as err:
+                self.log.warning(f"Failed adding {filename} to the masters: {err}")
+                return None
+
+            if self.metrics:
+                elapsed = time.perf_counter() - t0
+                self.metrics.master_update_seconds.observe(elapsed, flavour=flavour)
+
+        if stats["skipped"]:
+            self.log.info(f"{filename} not added to the masters: {stats['skipped']}")
+
+        return stats
+
+    def get_master(self, ccd: str, flavour: str = "bias") -> numpy.ndarray | None:
+        """Returns the master of a CCD as a read-only memory-mapped array.
+
+        Returns `None` if there is no master for the CCD. Use for quick-look
+        reductions of the frames.
+
+        """
+
+        master_path = os.path.join(self.path, f"{ccd}_{flavour}.npy")
+        if not os.path.exists(master_path):
+            return None
+
+        return numpy.load(master_path, mmap_mode="r")
+
+    def get_stats(self, ccd: str, flavour: str = "bias") -> dict[str, Any] | None:
+        """Returns the statistics of the last frame added for a CCD."""
+
+        state_path = os.path.join(self.path, f"{ccd}_{flavour}.json")
+        if not os.path.exists(state_path):
+            return None
+
+        with open(state_path, "r") as fd:
+            state = json.load(fd)
+
+        return {**state.get("stats", {}), "updated": state.get("updated", None)}
+
+    def get_drift(self, ccd: str) -> dict[str, Any] | None:
+        """Compares the bias level and read noise of a CCD with its master.
+
+        The level drift is the difference between the median level of the last
+        bias and of the master, per quadrant, in ADU. The read noise drift is the
+        difference between the measured read noise and the ``readnoise`` of the
+        detector in the configuration, in electrons.
+
+        """
+
+        stats = self.get_stats(ccd, "bias")
+        if stats is None or "readnoise" not in stats:
+            return None
+
+        expected = list(self.detectors.get(ccd, {}).get("readnoise", []))
+        readnoise = stats["readnoise"]
+
+        level_drift = [
+            round(level - master, 3)
+            for level, master in zip(stats["level"], stats["master_level"])
+        ]
+
+        readnoise_drift: list[float] | None = None
+        ok = True
+        if len(expected) == len(readnoise):
+            readnoise_drift = [
+                round(measured - value, 3)
+                for measured, value in zip(readnoise, expected)
+            ]
+            ok = all(
+                abs(drift) <= self.readnoise_tolerance for drift in readnoise_drift
+            )
+
+        dark = self.get_stats(ccd, "dark")
+
+        return {
+            "ccd": ccd,
+            "nframes": stats["nframes"],
+            "updated": stats["updated"],
+            "level": stats["level"],
+            "master_level": stats["master_level"],
+            "level_drift": level_drift,
+            "readnoise": readnoise,
+            "expected_readnoise": expected,
+            "readnoise_drift": readnoise_drift,
+            "dark_rate": dark["master_level"] if dark else None,
+            "ok": ok,
+        }
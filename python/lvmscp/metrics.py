@@ -0,0 +1,567 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: metrics.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import bisect
+import os
+import resource
+import sys
+import time
+from contextlib import suppress
+
+from typing import Callable, Sequence, TypeVar
+
+from lvmscp import log
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "SCPMetrics",
+    "MetricsServer",
+    "get_rss",
+]
+
+
+LabelsType = tuple[tuple[str, str], ...]
+Metric_T = TypeVar("Metric_T", bound="Metric")
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+
+def _format_labels(labels: LabelsType, extra: dict[str, str] = {}) -> str:
+    """Formats a set of labels in Prometheus text format."""
+
+    items = list(labels) + list(extra.items())
+    if len(items) == 0:
+        return ""
+
+    parts = []
+    for key, value in items:
+        value = str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+        parts.append(f'{key}="{value}"')
+
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Formats a sample value."""
+
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value))
+
+
+class Metric(abc.ABC):
+    """Base class for a metric with optional labels.
+
+    Parameters
+    ----------
+    name
+        The name of the metric, as it will be exposed.
+    help
+        A short description of the metric.
+    labelnames
+        The names of the labels that must be passed when the metric is updated.
+
+    """
+
+    type: str = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> LabelsType:
+        """Returns the hashable key for a set of label values."""
+
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name!r} requires labels {self.labelnames!r}, "
+                f"got {tuple(labels)!r}."
+            )
+
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self) -> list[str]:
+        """Returns the sample lines for this metric."""
+
+    def render(self) -> str:
+        """Renders the metric in Prometheus text format."""
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines += self.samples()
+
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A monotonically increasing counter."""
+
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._values: dict[LabelsType, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        """Increases the counter."""
+
+        if amount < 0:
+            raise ValueError("Counters can only be increased.")
+
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Returns the current value of the counter."""
+
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        return [
+            f"{self.name}{_format_labels(key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    """A value that can go up and down.
+
+    If ``callback`` is passed, it is called each time the metric is rendered and
+    the returned value is used as the value of the (label-less) gauge.
+
+    """
+
+    type = "gauge"
+
+    def __init__(self, *args, callback: Callable[[], float] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.callback = callback
+        self._values: dict[LabelsType, float] = {}
+
+    def set(self, value: float, **labels: str):
+        """Sets the value of the gauge."""
+
+        self._values[self._key(labels)] = float(value)
+
+    def get(self, **labels: str) -> float | None:
+        """Returns the current value of the gauge."""
+
+        if self.callback is not None:
+            return self.callback()
+
+        return self._values.get(self._key(labels), None)
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                return [f"{self.name} {_format_value(self.callback())}"]
+            except Exception:
+                return []
+
+        return [
+            f"{self.name}{_format_labels(key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    """A histogram of observed values with cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.buckets = tuple(sorted(buckets))
+
+        # For each set of labels we store the per-bucket counts (with an extra
+        # bucket for +Inf), the sum of the observations, and their count.
+        self._values: dict[LabelsType, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        """Adds an observation to the histogram."""
+
+        key = self._key(labels)
+        if key not in self._values:
+            self._values[key] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+
+        counts, totals = self._values[key]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def get_count(self, **labels: str) -> int:
+        """Returns the number of observations."""
+
+        key = self._key(labels)
+        if key not in self._values:
+            return 0
+
+        return int(self._values[key][1][1])
+
+    def get_sum(self, **labels: str) -> float:
+        """Returns the sum of the observations."""
+
+        key = self._key(labels)
+        if key not in self._values:
+            return 0.0
+
+        return self._values[key][1][0]
+
+    def samples(self):
+        lines = []
+        for key, (counts, (total, count)) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = {"le": _format_value(bound)}
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {int(count)}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """A collection of metrics that can be rendered together."""
+
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric_T) -> Metric_T:
+        """Adds a metric to the registry."""
+
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+
+        self.metrics[metric.name] = metric
+
+        return metric
+
+    def render(self) -> str:
+        """Renders all the metrics in Prometheus text format."""
+
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+def get_rss() -> int:
+    """Returns the resident set size of the current process, in bytes."""
+
+    try:
+        with open("/proc/self/statm", "r") as fd:
+            rss_pages = int(fd.read().split()[1])
+        return rss_pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        # Fall back to the peak RSS. On macOS ru_maxrss is in bytes, in Linux in kB.
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class SCPMetrics(MetricsRegistry):
+    """The metrics collected by lvmscp."""
+
+    def __init__(self):
+        super().__init__()
+
+        self.exposures = self.register(
+            Counter(
+                "lvmscp_exposures_total",
+                "Number of exposures by flavour and outcome.",
+                ["flavour", "outcome"],
+            )
+        )
+
+        self.readout_seconds = self.register(
+            Histogram(
+                "lvmscp_readout_seconds",
+                "Time to read out the controllers.",
+            )
+        )
+
+        self.fetch_seconds = self.register(
+            Histogram(
+                "lvmscp_fetch_seconds",
+                "Time to fetch the buffer from a controller.",
+                ["controller"],
+            )
+        )
+
+        self.write_seconds = self.register(
+            Histogram(
+                "lvmscp_write_seconds",
+                "Time to write a CCD image to disk.",
+                ["ccd"],
+            )
+        )
+
+        self.cotask_seconds = self.register(
+            Histogram(
+                "lvmscp_cotask_seconds",
+                "Latency of the commands sent to downstream actors.",
+                ["actor"],
+            )
+        )
+
+        self.cotask_failures = self.register(
+            Counter(
+                "lvmscp_cotask_failures_total",
+                "Number of failed commands sent to downstream actors.",
+                ["actor"],
+            )
+        )
+
+        self.coalesced_commands = self.register(
+            Counter(
+                "lvmscp_coalesced_commands_total",
+                "Number of commands to downstream actors that shared a result.",
+                ["actor"],
+            )
+        )
+
+        self.shutter_failures = self.register(
+            Counter(
+                "lvmscp_shutter_failures_total",
+                "Number of failed shutter moves.",
+                ["controller", "action"],
+            )
+        )
+
+        self.event_loop_lag = self.register(
+            Histogram(
+                "lvmscp_event_loop_lag_seconds",
+                "Delay of the event loop with respect to a scheduled wake-up.",
+                buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+            )
+        )
+
+        self.rss_bytes = self.register(
+            Gauge(
+                "lvmscp_resident_memory_bytes",
+                "Resident memory size of the actor process.",
+                callback=get_rss,
+            )
+        )
+
+        # The callback is set by the actor if the log queue is enabled.
+        self.log_records_dropped = self.register(
+            Gauge(
+                "lvmscp_log_records_dropped",
+                "Log records dropped because the log queue was full.",
+            )
+        )
+
+        # The callbacks are set by the actor if the frame ring is enabled.
+        self.frame_ring_in_use = self.register(
+            Gauge(
+                "lvmscp_frame_ring_slots_in_use",
+                "Slots of the frame ring holding frames not yet written.",
+            )
+        )
+
+        self.frame_ring_overflows = self.register(
+            Gauge(
+                "lvmscp_frame_ring_overflows",
+                "Frames that could not be stored in the frame ring.",
+            )
+        )
+
+        self.post_write_seconds = self.register(
+            Histogram(
+                "lvmscp_post_write_hook_seconds",
+                "Time to run a post-write hook for a file.",
+                ["hook"],
+            )
+        )
+
+        self.post_write_failures = self.register(
+            Counter(
+                "lvmscp_post_write_hook_failures_total",
+                "Number of failed attempts to run a post-write hook.",
+                ["hook"],
+            )
+        )
+
+        # The callbacks are set by the actor if the post-write hooks are enabled.
+        self.post_write_pending = self.register(
+            Gauge(
+                "lvmscp_post_write_pending",
+                "Files waiting for the post-write hooks.",
+            )
+        )
+
+        self.post_write_dropped = self.register(
+            Gauge(
+                "lvmscp_post_write_dropped",
+                "Files dropped because the post-write queue was full.",
+            )
+        )
+
+        self.pre_flushes = self.register(
+            Counter(
+                "lvmscp_pre_flushes_total",
+                "Number of pre-exposure flushes run or skipped.",
+                ["controller", "outcome"],
+            )
+        )
+
+        self.abort_seconds = self.register(
+            Histogram(
+                "lvmscp_abort_seconds",
+                "Time from a fast abort to the controllers being idle.",
+                ["flushed"],
+                buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+            )
+        )
+
+        self.master_update_seconds = self.register(
+            Histogram(
+                "lvmscp_master_update_seconds",
+                "Time to add a bias or dark to the master library.",
+                ["flavour"],
+            )
+        )
+
+        self.bytes_written = self.register(
+            Counter(
+                "lvmscp_bytes_written_total",
+                "Bytes written to disk per SJD.",
+                ["sjd"],
+            )
+        )
+
+    async def monitor_event_loop(self, interval: float = 1.0):
+        """Measures the event loop lag by scheduling periodic wake-ups."""
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(interval)
+            self.event_loop_lag.observe(max(0.0, loop.time() - t0 - interval))
+
+
+class MetricsServer:
+    """A minimal HTTP server that exposes a registry in Prometheus text format.
+
+    Parameters
+    ----------
+    registry
+        The `.MetricsRegistry` to expose.
+    host
+        The host on which the server will listen.
+    port
+        The port on which the server will listen.
+
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port=9150):
+        self.registry = registry
+        self.host = host
+        self.port = port
+
+        self._server: asyncio.Server | None = None
+
+    async def start(self):
+        """Starts the server."""
+
+        self._server = await asyncio.start_server(
+            self._handle_request,
+            self.host,
+            self.port,
+        )
+
+        # Update the port in case we passed port=0.
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info(f"Metrics server listening on {self.host}:{self.port}.")
+
+        return self
+
+    async def stop(self):
+        """Stops the server."""
+
+        if self._server:
+            self._server.close()
+            with suppress(Exception):
+                await self._server.wait_closed()
+
+        self._server = None
+
+    async def _handle_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        """Handles an HTTP request."""
+
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+
+            # Consume the headers.
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else ""
+
+            if len(parts) > 0 and parts[0] == "GET" and path in ["/", "/metrics"]:
+                t0 = time.perf_counter()
+                body = self.registry.render()
+                body += f"# Rendered in {time.perf_counter() - t0:.6f} s\n"
+                status = "200 OK"
+            else:
+                body = "Not found.\n"
+                status = "404 Not Found"
+
+            payload = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+
+        except Exception as err:
+            log.warning(f"Failed handling metrics request: {err}")
+
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
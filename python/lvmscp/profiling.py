@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: profiling.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import collections
+import os
+import pathlib
+import sys
+import threading
+import time
+import tracemalloc
+
+from typing import TYPE_CHECKING, Any, Mapping
+
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+
+__all__ = ["SamplingProfiler", "MemoryProfiler", "get_reports_dir"]
+
+
+def get_reports_dir(log_dir: str | os.PathLike | None) -> pathlib.Path:
+    """Returns the directory where the profiling reports are written."""
+
+    if log_dir is None:
+        log_dir = os.environ.get("TMPDIR", "/tmp")
+
+    path = pathlib.Path(log_dir).expanduser() / "profiling"
+    path.mkdir(parents=True, exist_ok=True)
+
+    return path
+
+
+def _format_frame(frame: FrameType) -> str:
+    """Returns a compact representation of a frame."""
+
+    code = frame.f_code
+    filename = code.co_filename
+
+    # Shorten the path to make the reports more readable.
+    for path in sys.path:
+        if path and filename.startswith(path):
+            filename = filename[len(path) :].lstrip(os.sep)
+            break
+
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """A statistical CPU profiler that samples the stack of a thread.
+
+    A background thread wakes up every ``interval`` seconds and records the stack
+    of the target thread (by default the thread that creates the profiler, which
+    for the actor is the thread running the event loop). Because the target thread
+    is not instrumented, the overhead is bounded by the sampling rate and does
+    not depend on the amount of Python code executed.
+
+    Parameters
+    ----------
+    interval
+        The sampling interval, in seconds. Limited to a minimum of 1 ms.
+    max_duration
+        Maximum duration of the profiling session, in seconds. After that the
+        sampler stops on its own. Samples are preserved until `.stop` is called.
+    max_depth
+        Maximum number of frames recorded per sample.
+    thread_id
+        The identifier of the thread to sample.
+
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        max_duration: float = 600.0,
+        max_depth: int = 64,
+        thread_id: int | None = None,
+    ):
+        self.interval = max(interval, 0.001)
+        self.max_duration = max_duration
+        self.max_depth = max_depth
+        self.thread_id = thread_id or threading.get_ident()
+
+        self.n_samples: int = 0
+        self.self_counts: collections.Counter[str] = collections.Counter()
+        self.total_counts: collections.Counter[str] = collections.Counter()
+        self.stacks: collections.Counter[tuple[str, ...]] = collections.Counter()
+
+        self.start_time: float | None = None
+        self.end_time: float | None = None
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self):
+        """Whether the profiler is sampling."""
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts sampling."""
+
+        if self.running:
+            raise RuntimeError("The profiler is already running.")
+
+        self._stop_event.clear()
+        self.start_time = time.time()
+        self.end_time = None
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="lvmscp-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling."""
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self.end_time is None:
+            self.end_time = time.time()
+
+    def _run(self):
+        """Sampling loop."""
+
+        assert self.start_time is not None
+
+        while not self._stop_event.wait(self.interval):
+            if time.time() - self.start_time > self.max_duration:
+                break
+
+            frame = sys._current_frames().get(self.thread_id, None)
+            if frame is None:
+                break
+
+            self._add_sample(frame)
+
+        self.end_time = time.time()
+
+    def _add_sample(self, frame: FrameType | None):
+        """Records the stack of a frame."""
+
+        stack: list[str] = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(_format_frame(frame))
+            frame = frame.f_back
+
+        if len(stack) == 0:
+            return
+
+        self.n_samples += 1
+        self.self_counts[stack[0]] += 1
+        self.total_counts.update(set(stack))
+        self.stacks[tuple(reversed(stack))] += 1
+
+    def top(self, n: int = 10, cumulative: bool = False) -> list[dict[str, Any]]:
+        """Returns the ``n`` frames with the most samples."""
+
+        counts = self.total_counts if cumulative else self.self_counts
+        n_samples = max(self.n_samples, 1)
+
+        return [
+            {
+                "frame": frame,
+                "samples": count,
+                "percent": round(100 * count / n_samples, 2),
+            }
+            for frame, count in counts.most_common(n)
+        ]
+
+    def write_report(self, path: str | os.PathLike, n: int = 50):
+        """Writes a text report and a file with the folded stacks.
+
+        The folded stacks (``<path>.folded``) can be converted to a flame graph with
+        the usual tools (e.g., ``flamegraph.pl``).
+
+        """
+
+        path = pathlib.Path(path)
+        duration = (self.end_time or time.time()) - (self.start_time or time.time())
+
+        lines = [
+            f"Samples: {self.n_samples}",
+            f"Duration: {duration:.1f} s",
+            f"Interval: {self.interval} s",
+            "",
+            "Self samples:",
+        ]
+        for row in self.top(n):
+            lines.append(f"{row['samples']:8d} {row['percent']:6.2f}% {row['frame']}")
+
+        lines += ["", "Cumulative samples:"]
+        for row in self.top(n, cumulative=True):
+            lines.append(f"{row['samples']:8d} {row['percent']:6.2f}% {row['frame']}")
+
+        path.write_text("\n".join(lines) + "\n")
+
+        with open(str(path) + ".folded", "w") as fd:
+            for stack, count in self.stacks.items():
+                fd.write(";".join(stack) + f" {count}\n")
+
+        return path
+
+
+class MemoryProfiler:
+    """Takes `tracemalloc` snapshots and compares them.
+
+    Tracing starts with the first snapshot and continues until `.stop` is called or
+    for at most ``max_duration`` seconds, after which the profiler stops on its own
+    and discards the snapshots. While tracing, every allocation in the process is
+    slower and a traceback of up to ``nframes`` frames is stored for each live
+    memory block, so both the CPU and the memory overhead grow with ``nframes``.
+    Taking a snapshot copies all the traces, and filtering and grouping them can
+    take seconds for a large process; the actor does it in an executor so that the
+    event loop is only blocked while the traces are copied.
+
+    The methods can be called from different threads.
+
+    Parameters
+    ----------
+    nframes
+        Number of frames to store for each allocation. Limited to the range
+        1 to ``max_nframes``.
+    max_nframes
+        The maximum traceback depth.
+    max_duration
+        Maximum time, in seconds, that allocations are traced after the first
+        snapshot. If `None`, tracing continues until `.stop` is called.
+
+    """
+
+    def __init__(
+        self,
+        nframes: int = 5,
+        max_nframes: int = 25,
+        max_duration: float | None = 600.0,
+    ):
+        self.nframes = min(max(nframes, 1), max_nframes)
+        self.max_duration = max_duration
+        self.snapshots: list[tuple[float, tracemalloc.Snapshot]] = []
+
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]):
+        """Creates an instance from the ``memory_profiler`` configuration section."""
+
+        return cls(
+            nframes=config.get("nframes", 5),
+            max_nframes=config.get("max_nframes", 25),
+            max_duration=config.get("max_duration", 600.0),
+        )
+
+    @property
+    def tracing(self):
+        """Whether tracemalloc is tracing allocations."""
+
+        return tracemalloc.is_tracing()
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        """Takes a snapshot. Starts tracing if it's not already."""
+
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.nframes)
+                self._start_timer()
+
+            snapshot = tracemalloc.take_snapshot()
+
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+
+        # Only keep the first snapshot, which is the baseline, and the last one.
+        with self._lock:
+            self.snapshots = self.snapshots[:1] + [(time.time(), snapshot)]
+
+        return snapshot
+
+    def stop(self):
+        """Stops tracing and discards the snapshots."""
+
+        with self._lock:
+            self._stop()
+
+    def _stop(self):
+        """Stops tracing. Must be called with the lock held."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        tracemalloc.stop()
+        self.snapshots = []
+
+    def _start_timer(self):
+        """Schedules the end of tracing after ``max_duration`` seconds."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self.max_duration is None:
+            return
+
+        timer = threading.Timer(self.max_duration, lambda: self._expire(timer))
+        timer.name = "lvmscp-memory-profiler"
+        timer.daemon = True
+
+        self._timer = timer
+        self._timer.start()
+
+    def _expire(self, timer: threading.Timer):
+        """Stops tracing if the timer has not been cancelled or replaced."""
+
+        with self._lock:
+            if self._timer is timer:
+                self._stop()
+
+    def top(self, n: int = 10) -> list[dict[str, Any]]:
+        """Returns the top allocation sites in the last snapshot."""
+
+        if len(self.snapshots) == 0:
+            raise RuntimeError("No snapshots available.")
+
+        stats = self.snapshots[-1][1].statistics("lineno")
+
+        return [
+            {
+                "site": str(stat.traceback[0]),
+                "size": stat.size,
+                "count": stat.count,
+            }
+            for stat in stats[:n]
+        ]
+
+    def diff(self, n: int = 10) -> list[dict[str, Any]]:
+        """Compares a new snapshot with the baseline snapshot."""
+
+        if len(self.snapshots) == 0:
+            raise RuntimeError("No baseline snapshot. Take a snapshot first.")
+
+        baseline = self.snapshots[0][1]
+        current = self.snapshot()
+
+        stats = current.compare_to(baseline, "lineno")
+
+        return [
+            {
+                "site": str(stat.traceback[0]),
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size,
+            }
+            for stat in stats[:n]
+        ]
+
+    def write_report(self, path: str | os.PathLike, rows: list[dict[str, Any]]):
+        """Writes a list of statistics to a file."""
+
+        path = pathlib.Path(path)
+
+        traced, peak = tracemalloc.get_traced_memory()
+        lines = [f"Traced memory: {traced} bytes (peak {peak} bytes)", ""]
+        for row in rows:
+            lines.append(" ".join(f"{key}={value}" for key, value in row.items()))
+
+        path.write_text("\n".join(lines) + "\n")
+
+        return path
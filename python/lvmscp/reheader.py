@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: reheader.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from tempfile import NamedTemporaryFile
+
+from typing import Any, Iterable, Mapping
+
+import numpy
+from astropy.io import fits
+from astropy.time import Time
+
+from lvmscp.header_sources import (
+    HeaderSource,
+    HeaderSourceReply,
+    get_header_values,
+    load_header_sources,
+)
+from lvmscp.tools import CHUNK_SIZE, append_manifest, finalise_file
+
+
+__all__ = ["ReheaderResult", "read_telemetry", "reheader_file", "reheader"]
+
+
+# Telemetry and header sources used by the worker processes. Set by _init_worker.
+_TELEMETRY: dict[tuple[str, int], list[HeaderSourceReply]] = {}
+_SOURCES: list[HeaderSource] = []
+
+
+@dataclass
+class ReheaderResult:
+    """The result of updating the header of a file.
+
+    Parameters
+    ----------
+    filename
+        The path to the file.
+    updated
+        The header keywords updated.
+    digest
+        The new checksum of the file, if the file was changed and the checksum
+        was requested.
+    size
+        The new size of the file, if it was changed.
+    error
+        The error message if the file could not be updated.
+
+    """
+
+    filename: str
+    updated: list[str] = field(default_factory=list)
+    digest: str | None = None
+    size: int | None = None
+    error: str | None = None
+
+
+def read_telemetry(path: str | os.PathLike) -> dict[tuple[str, int], list[Any]]:
+    """Reads a telemetry sidecar file.
+
+    Returns a mapping of spectrograph and exposure number to the replies of the
+    header sources. If an exposure has several entries their replies are merged.
+    Incomplete lines are ignored.
+
+    """
+
+    telemetry: dict[tuple[str, int], list[HeaderSourceReply]] = {}
+
+    with open(path, "r") as fd:
+        for line in fd:
+            try:
+                entry = json.loads(line)
+                key = (entry["spec"], int(entry["exposure_no"]))
+                replies = [HeaderSourceReply(**reply) for reply in entry["replies"]]
+            except (ValueError, KeyError, TypeError):
+                continue
+
+            telemetry.setdefault(key, []).extend(replies)
+
+    return telemetry
+
+
+def _get_image_hdu(filename: str) -> int:
+    """Returns the index of the HDU with the image header."""
+
+    return 1 if filename.endswith(".fz") else 0
+
+
+def _hash_file(filename: str, mode: str) -> tuple[str, int]:
+    """Returns the digest and size of a file."""
+
+    hash = hashlib.new(mode)
+    size = 0
+
+    with open(filename, "rb") as fd:
+        while chunk := fd.read(CHUNK_SIZE):
+            hash.update(chunk)
+            size += len(chunk)
+
+    return hash.hexdigest(), size
+
+
+def _update_header(filename: str, ext: int, values: Mapping[str, tuple[Any, str]]):
+    """Updates header cards in place.
+
+    The checksums are recomputed, which `astropy` only does by default for
+    uncompressed HDUs.
+
+    """
+
+    with fits.open(filename, mode="update", checksum=True) as hdul:
+        header = hdul[ext].header
+        for key, (value, comment) in values.items():
+            if key in header:
+                header[key] = value
+            else:
+                header[key] = (value, comment)
+
+
+def reheader_file(
+    filename: str,
+    replies: Iterable[HeaderSourceReply],
+    sources: Iterable[HeaderSource],
+    overwrite: bool = False,
+    hash_mode: str | None = None,
+    dry_run: bool = False,
+) -> ReheaderResult:
+    """Recomputes the header values of a file from the header source replies.
+
+    The values are calculated with `.get_header_values`, as in the delegate
+    post-process. Uncompressed and Rice-compressed files are updated in place;
+    gzipped files must be decompressed and compressed again.
+
+    Parameters
+    ----------
+    filename
+        The file to update.
+    replies
+        The replies of the header sources for the exposure.
+    sources
+        The header sources.
+    overwrite
+        If `False`, only keywords that are missing or null are updated.
+    hash_mode
+        If set, the checksum of the updated file is calculated with this algorithm.
+    dry_run
+        If `True`, returns the keywords that would be updated without changing
+        the file.
+
+    """
+
+    ext = _get_image_hdu(filename)
+    header = fits.getheader(filename, ext=ext)
+
+    values = get_header_values(sources, replies, ccd=header.get("CCD", None))
+
+    changes: dict[str, tuple[Any, str]] = {}
+    for key, (value, comment) in values.items():
+        if value is None:
+            continue
+        if isinstance(value, float) and not numpy.isfinite(value):
+            continue
+        if not overwrite and header.get(key, None) is not None:
+            continue
+        if key in header and header[key] == value:
+            continue
+        changes[key] = (value, comment)
+
+    result = ReheaderResult(filename=filename, updated=sorted(changes))
+    if len(changes) == 0 or dry_run:
+        return result
+
+    if filename.endswith(".gz"):
+        temp_file = NamedTemporaryFile(suffix=".fits", delete=False).name
+        try:
+            with gzip.open(filename, "rb") as src, open(temp_file, "wb") as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            _update_header(temp_file, ext, changes)
+            result.digest, result.size = finalise_file(
+                temp_file,
+                filename,
+                compress=True,
+                hash_mode=hash_mode,
+            )
+        finally:
+            if os.path.exists(temp_file):
+                os.unlink(temp_file)
+    else:
+        _update_header(filename, ext, changes)
+        if hash_mode is not None:
+            result.digest, result.size = _hash_file(filename, hash_mode)
+        else:
+            result.size = os.path.getsize(filename)
+
+    return result
+
+
+def _init_worker(
+    telemetry: dict[tuple[str, int], list[HeaderSourceReply]],
+    sources: list[HeaderSource],
+):
+    """Sets the telemetry and header sources in a worker process."""
+
+    global _TELEMETRY, _SOURCES
+
+    _TELEMETRY = telemetry
+    _SOURCES = sources
+
+
+def _reheader_worker(filename: str, **kwargs) -> ReheaderResult | None:
+    """Updates a file using the telemetry loaded in the worker.
+
+    Returns `None` if there is no telemetry for the exposure of the file.
+
+    """
+
+    try:
+        header = fits.getheader(filename, ext=_get_image_hdu(filename))
+        key = (header.get("SPEC", None), int(header.get("EXPOSURE", -1) or -1))
+
+        replies = _TELEMETRY.get(key, None)
+        if replies is None:
+            return None
+
+        return reheader_file(filename, replies, _SOURCES, **kwargs)
+
+    except Exception as err:
+        return ReheaderResult(filename=filename, error=str(err))
+
+
+def _update_checksum_file(checksum_path: pathlib.Path, basename: str, digest: str):
+    """Replaces the checksum of a file in a checksum file."""
+
+    lines: list[str] = []
+    if checksum_path.exists():
+        lines = [
+            line
+            for line in checksum_path.read_text().splitlines()
+            if line.split()[-1:] != [basename]
+        ]
+    lines.append(f"{digest}  {basename}")
+
+    temp_path = checksum_path.with_suffix(checksum_path.suffix + ".part")
+    temp_path.write_text("\n".join(lines) + "\n")
+    os.replace(temp_path, checksum_path)
+
+
+def reheader(
+    config: Mapping[str, Any],
+    mjds: Iterable[int],
+    overwrite: bool = False,
+    dry_run: bool = False,
+    workers: int | None = None,
+) -> list[ReheaderResult]:
+    """Recomputes the headers of the files of one or more nights.
+
+    The replies of the header sources are read from the telemetry sidecar of each
+    MJD directory and the files are updated in parallel in a process pool. The
+    checksum file and the manifest are updated for the files that changed.
+
+    Parameters
+    ----------
+    config
+        The actor configuration.
+    mjds
+        The MJDs to process.
+    overwrite
+        If `False`, only keywords that are missing or null are updated.
+    dry_run
+        If `True`, returns the keywords that would be updated without changing
+        any file.
+    workers
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    results
+        The result for each file, excluding those with no telemetry.
+
+    """
+
+    files_config = config["files"]
+    telemetry_name: str | None = files_config.get("telemetry", None)
+    if not telemetry_name:
+        raise ValueError("files.telemetry is not defined in the configuration.")
+
+    data_dir = pathlib.Path(files_config["data_dir"])
+
+    checksum_config = config.get("checksum", {})
+    hash_mode: str | None = None
+    if checksum_config.get("write", False) or files_config.get("manifest", None):
+        hash_mode = checksum_config.get("mode", "md5")
+
+    sources = load_header_sources(config.get("header_sources", {}), config)
+
+    results: list[ReheaderResult] = []
+
+    for mjd in mjds:
+        mjd_dir = data_dir / str(mjd)
+        telemetry_path = mjd_dir / telemetry_name.format(MJD=mjd)
+        if not telemetry_path.exists():
+            continue
+
+        telemetry = read_telemetry(telemetry_path)
+        filenames = sorted(
+            str(path)
+            for pattern in ["*.fits", "*.fits.gz", "*.fits.fz"]
+            for path in mjd_dir.glob(pattern)
+        )
+        if len(filenames) == 0:
+            continue
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(telemetry, sources),
+        ) as executor:
+            worker = partial(
+                _reheader_worker,
+                overwrite=overwrite,
+                hash_mode=hash_mode,
+                dry_run=dry_run,
+            )
+            chunksize = max(1, len(filenames) // (4 * (workers or os.cpu_count() or 1)))
+            mjd_results = list(executor.map(worker, filenames, chunksize=chunksize))
+
+        for result in mjd_results:
+            if result is None:
+                continue
+
+            results.append(result)
+
+            if result.digest is None or len(result.updated) == 0:
+                continue
+
+            basename = os.path.basename(result.filename)
+
+            if checksum_config.get("write", False):
+                checksum_file = checksum_config.get("file", f"{{SJD}}.{hash_mode}sum")
+                _update_checksum_file(
+                    mjd_dir / checksum_file.format(SJD=mjd),
+                    basename,
+                    result.digest,
+                )
+
+            manifest: str | None = files_config.get("manifest", None)
+            if manifest:
+                append_manifest(
+                    mjd_dir / manifest.format(MJD=mjd),
+                    {
+                        "filename": basename,
+                        "size": result.size,
+                        hash_mode: result.digest,
+                        "write_time": Time.now().isot,
+                        "reheader": result.updated,
+                    },
+                )
+
+    return results
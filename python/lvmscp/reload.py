@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: reload.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import re
+
+from typing import Any, Mapping
+
+from lvmscp.header_sources import load_header_sources
+
+
+__all__ = ["RELOADABLE_SECTIONS", "validate_config", "get_changed_sections"]
+
+
+# Configuration sections that can be changed without restarting the actor. They
+# are read when each exposure or command starts. Other sections (controllers,
+# ACF files, file templates, the frame ring, etc.) require a restart.
+RELOADABLE_SECTIONS: list[str] = [
+    "header",
+    "lamps",
+    "timeouts",
+    "header_sources",
+    "calib_batch",
+    "coalescing",
+    "window_modes",
+    "exposure_progress",
+    "standards",
+    "focus",
+    "status_delay",
+    "fast_abort",
+    "pre_flush",
+]
+
+
+def _validate_header(header: Any) -> list[str]:
+    """Checks the header template."""
+
+    if not isinstance(header, Mapping):
+        return ["header must be a mapping."]
+
+    errors: list[str] = []
+
+    for key, value in header.items():
+        if isinstance(value, Mapping):
+            if value.get("command", "").lower() not in ["status", "system"]:
+                errors.append(f"header.{key}: command must be status or system.")
+            for ccd, params in value.get("detectors", {}).items():
+                if not isinstance(params, (list, tuple)) or len(params) == 0:
+                    errors.append(f"header.{key}.detectors.{ccd} must be a list.")
+        elif isinstance(value, (list, tuple)):
+            if not 1 <= len(value) <= 3:
+                errors.append(
+                    f"header.{key} must have a value, comment, and precision."
+                )
+        elif value is not None and not isinstance(value, (str, int, float)):
+            errors.append(f"header.{key} has an invalid value.")
+
+    return errors
+
+
+def validate_config(config: Mapping[str, Any]) -> list[str]:
+    """Checks the reloadable sections of a configuration.
+
+    Only the checks that would otherwise fail in the middle of an exposure are
+    done: the header template and lamps are well formed, the timeouts are
+    numbers, the header sources can be loaded, and the coalescing patterns are
+    valid regular expressions.
+
+    Returns
+    -------
+    errors
+        A list of error messages. The configuration is valid if the list is empty.
+
+    """
+
+    errors = _validate_header(config.get("header", {}))
+
+    lamps = config.get("lamps", [])
+    if not isinstance(lamps, list) or not all(isinstance(ll, str) for ll in lamps):
+        errors.append("lamps must be a list of lamp names.")
+
+    timeouts = config.get("timeouts", None)
+    if not isinstance(timeouts, Mapping):
+        errors.append("timeouts must be a mapping.")
+    else:
+        for key, value in timeouts.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(f"timeouts.{key} must be a number.")
+            elif value < 0:
+                errors.append(f"timeouts.{key} must be positive.")
+
+    try:
+        load_header_sources(config.get("header_sources", {}), config)
+    except Exception as err:
+        errors.append(f"Invalid header_sources: {err}")
+
+    for pattern in config.get("coalescing", {}).get("patterns", []):
+        try:
+            re.compile(pattern)
+        except re.error as err:
+            errors.append(f"Invalid coalescing pattern {pattern!r}: {err}")
+
+    window_modes = config.get("window_modes", None) or {}
+    if not isinstance(window_modes, Mapping) or not all(
+        isinstance(window, Mapping) for window in window_modes.values()
+    ):
+        errors.append("window_modes must be a mapping of window parameters.")
+
+    return errors
+
+
+def get_changed_sections(
+    config: Mapping[str, Any],
+    new_config: Mapping[str, Any],
+) -> tuple[list[str], list[str]]:
+    """Compares two configurations.
+
+    Returns
+    -------
+    changed
+        A tuple with the reloadable sections that have changed and the other
+        changed sections, which require restarting the actor.
+
+    """
+
+    sections = sorted(set(config) | set(new_config))
+    changed = [
+        section
+        for section in sections
+        if config.get(section, None) != new_config.get(section, None)
+    ]
+
+    reloadable = [section for section in changed if section in RELOADABLE_SECTIONS]
+    restart = [section for section in changed if section not in RELOADABLE_SECTIONS]
+
+    return reloadable, restart
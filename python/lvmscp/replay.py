@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: replay.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import os
+import pathlib
+import queue
+import threading
+import time
+
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+import numpy
+
+from clu import Command, CommandStatus
+from clu.base import Reply
+
+
+if TYPE_CHECKING:
+    from archon.actor.delegate import ExposureDelegate
+
+
+__all__ = ["TrafficRecorder", "ReplayStub", "read_traffic", "measure_dead_time"]
+
+
+def _json_default(value: Any):
+    """Serialises values that the JSON encoder does not support."""
+
+    if isinstance(value, numpy.generic):
+        return value.item()
+    if isinstance(value, numpy.ndarray):
+        return value.tolist()
+
+    return str(value)
+
+
+class TrafficRecorder:
+    """Records the commands sent to downstream actors and their replies.
+
+    Each command is written as a JSON line with the target actor, the command
+    string, the time at which it was sent, the time it took to complete, the final
+    status, and the replies. The lines are added to a bounded queue and written
+    in batches by a background thread so that recording does not do any I/O in
+    the event loop. If the queue is full the record is dropped and counted in
+    `.dropped`.
+
+    Parameters
+    ----------
+    path
+        The file to which the traffic is appended.
+    max_size
+        The maximum number of records waiting to be written.
+    flush_interval
+        Maximum time, in seconds, that the background thread waits for more
+        records before writing a batch.
+
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        max_size: int = 10000,
+        flush_interval: float = 0.5,
+    ):
+        self.path = pathlib.Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.flush_interval = flush_interval
+
+        self.n_records: int = 0
+        self.dropped: int = 0
+
+        self.queue: queue.Queue[str | None] = queue.Queue(maxsize=max_size)
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """Starts the background thread."""
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="lvmscp-traffic-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0):
+        """Writes the pending records and stops the background thread."""
+
+        self._stop_event.set()
+
+        # Wake up the thread if it's waiting for records.
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        # Write anything that was added after the thread finished.
+        self._flush_queue()
+
+    def record(
+        self,
+        target: str,
+        command_string: str,
+        elapsed: float,
+        command: Command,
+        start_time: float | None = None,
+    ):
+        """Queues a command to be appended to the record file."""
+
+        entry = {
+            "target": target,
+            "command": command_string,
+            "start_time": start_time or time.time() - elapsed,
+            "elapsed": elapsed,
+            "status": command.status.name,
+            "replies": [
+                {"code": reply.message_code.value, "message": reply.message}
+                for reply in command.replies
+            ],
+        }
+
+        # Serialised here so that later changes to the replies are not recorded.
+        try:
+            self.queue.put_nowait(json.dumps(entry, default=_json_default) + "\n")
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        self.n_records += 1
+
+    def _get_batch(self, block: bool = True) -> list[str]:
+        """Returns the lines waiting in the queue."""
+
+        batch: list[str | None] = []
+
+        try:
+            if block:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+            while True:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        # Remove the markers used to wake up the thread.
+        return [line for line in batch if line is not None]
+
+    def _run(self):
+        """Writes batches of records until the recorder is stopped."""
+
+        while not self._stop_event.is_set():
+            batch = self._get_batch()
+            if len(batch) > 0:
+                self._write(batch)
+
+        self._flush_queue()
+
+    def _flush_queue(self):
+        """Writes all the records in the queue."""
+
+        batch = self._get_batch(block=False)
+        if len(batch) > 0:
+            self._write(batch)
+
+    def _write(self, lines: list[str]):
+        """Appends lines to the record file."""
+
+        with open(self.path, "a") as fd:
+            fd.write("".join(lines))
+
+
+def read_traffic(path: str | os.PathLike) -> list[dict[str, Any]]:
+    """Reads a traffic file written by `.TrafficRecorder`."""
+
+    records: list[dict[str, Any]] = []
+
+    with open(path, "r") as fd:
+        for line in fd:
+            if line.strip():
+                records.append(json.loads(line))
+
+    return records
+
+
+class ReplayStub:
+    """Serves recorded replies with the recorded latencies.
+
+    `.send_command` can be used in place of `clu.Command.send_command`. For each
+    target and command string, the replies of one of the recorded commands are
+    returned after a latency drawn from the latencies recorded for that command.
+
+    Parameters
+    ----------
+    records
+        The records, as returned by `.read_traffic`, or the path to the file.
+    speed
+        Factor by which the latencies are divided.
+    failure_rate
+        Fraction of the commands that fail (without replies) after their latency.
+    timeout_rate
+        Fraction of the commands that never complete. They fail after the time
+        limit of the command or, if there is no time limit, ``default_timeout``.
+    default_timeout
+        Time limit used for the commands that time out if none was specified.
+    seed
+        The seed for the random number generator.
+
+    """
+
+    def __init__(
+        self,
+        records: str | os.PathLike | Iterable[dict[str, Any]],
+        speed: float = 1.0,
+        failure_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        default_timeout: float = 30.0,
+        seed: int | None = None,
+    ):
+        if isinstance(records, (str, os.PathLike)):
+            records = read_traffic(records)
+
+        self.records: dict[tuple[str, str], list[dict[str, Any]]]
+        self.records = collections.defaultdict(list)
+        for record in records:
+            self.records[(record["target"], record["command"])].append(record)
+
+        self.speed = speed
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.default_timeout = default_timeout
+
+        self.rng = numpy.random.default_rng(seed)
+
+        # Commands received, as tuples of target, command string, and status.
+        self.calls: list[tuple[str, str, str]] = []
+
+    async def send_command(
+        self,
+        target: str,
+        command_string: str,
+        reply_callback: Callable[[Reply], Any] | None = None,
+        time_limit: float | None = None,
+        **kwargs,
+    ) -> Command:
+        """Returns a command with recorded replies after the recorded latency."""
+
+        command = Command(command_string)
+
+        records = self.records.get((target, command_string), [])
+        draw = self.rng.random()
+
+        if draw < self.timeout_rate:
+            await asyncio.sleep(time_limit or self.default_timeout)
+            command.set_status(CommandStatus.TIMEDOUT)
+
+        elif len(records) == 0:
+            command.set_status(CommandStatus.FAILED)
+
+        else:
+            record = records[self.rng.integers(len(records))]
+            latency = record["elapsed"] / self.speed
+
+            if time_limit is not None and latency > time_limit:
+                await asyncio.sleep(time_limit)
+                command.set_status(CommandStatus.TIMEDOUT)
+            else:
+                await asyncio.sleep(latency)
+
+                if draw < self.timeout_rate + self.failure_rate:
+                    command.set_status(CommandStatus.FAILED)
+                else:
+                    for rdata in record["replies"]:
+                        reply = Reply(rdata["code"], rdata["message"])
+                        command.replies.append(reply)
+                        if reply_callback is not None:
+                            reply_callback(reply)
+
+                    command.set_status(record["status"])
+
+        self.calls.append((target, command_string, command.status.name))
+
+        return command
+
+
+async def measure_dead_time(
+    delegate: ExposureDelegate,
+    command: Command,
+    controllers: list,
+    flavour: str = "object",
+    exposure_time: float = 0.0,
+    count: int = 1,
+) -> dict[str, float]:
+    """Takes exposures and measures the time spent in addition to the exposure time.
+
+    Parameters
+    ----------
+    delegate
+        The exposure delegate.
+    command
+        The command used to expose. Usually its ``send_command`` is replaced by
+        `.ReplayStub.send_command`.
+    controllers
+        The controllers to expose.
+    flavour
+        The image type.
+    exposure_time
+        The exposure time of each exposure.
+    count
+        The number of exposures to take.
+
+    Returns
+    -------
+    dead_time
+        A dictionary with the median, mean, and maximum dead time in seconds and
+        the number of exposures that failed.
+
+    """
+
+    dead_times: list[float] = []
+    n_failed: int = 0
+
+    for _ in range(count):
+        t0 = time.perf_counter()
+
+        result = await delegate.expose(
+            command,
+            controllers,
+            flavour=flavour,
+            exposure_time=exposure_time,
+            readout=True,
+        )
+
+        if not result:
+            n_failed += 1
+            continue
+
+        dead_times.append(time.perf_counter() - t0 - exposure_time)
+
+    if len(dead_times) == 0:
+        return {
+            "median": numpy.nan,
+            "mean": numpy.nan,
+            "max": numpy.nan,
+            "failed": count,
+        }
+
+    return {
+        "median": float(numpy.median(dead_times)),
+        "mean": float(numpy.mean(dead_times)),
+        "max": float(numpy.max(dead_times)),
+        "failed": n_failed,
+    }
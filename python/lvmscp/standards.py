@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: standards.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import Any
+
+import jsonschema
+import numpy
+from astropy.io import fits
+
+
+__all__ = [
+    "MAX_STANDARDS",
+    "STANDARDS_SCHEMA",
+    "validate_standards",
+    "standards_to_cards",
+    "standards_to_table",
+]
+
+
+# Number of standards that fit in the legacy STDn header cards.
+MAX_STANDARDS: int = 15
+
+STANDARDS_SCHEMA: dict[str, Any] = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": ["integer", "null"]},
+            "ra": {"type": ["number", "null"]},
+            "dec": {"type": ["number", "null"]},
+            "acquired": {"type": "boolean"},
+            "t0": {"type": ["string", "null"]},
+            "t1": {"type": ["string", "null"]},
+            "exptime": {"type": "number", "minimum": 0},
+            "fibre": {"type": ["string", "null"]},
+        },
+        "required": ["id"],
+        "additionalProperties": False,
+    },
+}
+
+# Suffix and comment of the legacy header cards for each column.
+CARDS: dict[str, tuple[str, str]] = {
+    "id": ("ID", "Standard {n} Gaia Source ID"),
+    "ra": ("RA", "Standard {n} RA"),
+    "dec": ("DE", "Standard {n} Dec"),
+    "acquired": ("ACQ", "Was standard {n} acquired?"),
+    "t0": ("T0", "Standard {n} open shutter date"),
+    "t1": ("T1", "Standard {n} close shutter date"),
+    "exptime": ("EXP", "Standard {n} exposure time [s]"),
+    "fibre": ("FIB", "Standard {n} fibre name"),
+}
+
+DEFAULTS: dict[str, Any] = {
+    "id": None,
+    "ra": None,
+    "dec": None,
+    "acquired": False,
+    "t0": None,
+    "t1": None,
+    "exptime": 0.0,
+    "fibre": None,
+}
+
+_validator = jsonschema.Draft7Validator(STANDARDS_SCHEMA)
+
+
+def validate_standards(
+    standards: Any,
+    max_standards: int | None = MAX_STANDARDS,
+) -> list[dict[str, Any]]:
+    """Validates a table of standards and fills out the missing columns.
+
+    Parameters
+    ----------
+    standards
+        A list of rows, each one a mapping with the columns ``id``, ``ra``,
+        ``dec``, ``acquired``, ``t0``, ``t1``, ``exptime``, and ``fibre``. Only
+        ``id`` is required.
+    max_standards
+        The maximum number of rows.
+
+    Returns
+    -------
+    standards
+        The list of rows with all the columns.
+
+    Raises
+    ------
+    ValueError
+        If the table is not valid. The message lists all the errors found.
+
+    """
+
+    errors = [
+        f"{'/'.join(map(str, error.absolute_path)) or 'standards'}: {error.message}"
+        for error in _validator.iter_errors(standards)
+    ]
+    if len(errors) > 0:
+        raise ValueError("Invalid standards: " + "; ".join(errors))
+
+    if max_standards is not None and len(standards) > max_standards:
+        raise ValueError(f"Too many standards. The maximum is {max_standards}.")
+
+    return [{**DEFAULTS, **row} for row in standards]
+
+
+def standards_to_cards(standards: list[dict[str, Any]]) -> dict[str, tuple[Any, str]]:
+    """Returns the legacy ``STDn`` header cards for a table of standards.
+
+    The values of the returned mapping are tuples of value and comment.
+
+    """
+
+    cards: dict[str, tuple[Any, str]] = {}
+
+    for nn, row in enumerate(standards):
+        for column, (suffix, comment) in CARDS.items():
+            cards[f"STD{nn + 1}{suffix}"] = (row[column], comment.format(n=nn + 1))
+
+    return cards
+
+
+def standards_to_table(standards: list[dict[str, Any]]) -> fits.BinTableHDU:
+    """Returns a binary table HDU with the standards.
+
+    Missing identifiers are stored as -1 and missing coordinates as NaN.
+
+    """
+
+    def _floats(column: str):
+        return numpy.array(
+            [numpy.nan if row[column] is None else row[column] for row in standards],
+            dtype=numpy.float64,
+        )
+
+    def _strings(column: str):
+        return [row[column] or "" for row in standards]
+
+    columns = [
+        fits.Column(
+            name="index",
+            format="I",
+            array=numpy.arange(1, len(standards) + 1, dtype=numpy.int16),
+        ),
+        fits.Column(
+            name="id",
+            format="K",
+            null=-1,
+            array=numpy.array(
+                [-1 if row["id"] is None else row["id"] for row in standards],
+                dtype=numpy.int64,
+            ),
+        ),
+        fits.Column(name="ra", format="D", unit="deg", array=_floats("ra")),
+        fits.Column(name="dec", format="D", unit="deg", array=_floats("dec")),
+        fits.Column(
+            name="acquired",
+            format="L",
+            array=numpy.array([row["acquired"] for row in standards], dtype=bool),
+        ),
+        fits.Column(name="t0", format="23A", array=_strings("t0")),
+        fits.Column(name="t1", format="23A", array=_strings("t1")),
+        fits.Column(name="exptime", format="D", unit="s", array=_floats("exptime")),
+        fits.Column(name="fibre", format="16A", array=_strings("fibre")),
+    ]
+
+    hdu = fits.BinTableHDU.from_columns(columns, name="STANDARDS")
+    hdu.header["NSTD"] = (len(standards), "Number of standards")
+
+    return hdu
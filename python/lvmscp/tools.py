@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: tools.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+from typing import Any
+
+
+__all__ = ["HashingWriter", "finalise_file", "append_manifest", "read_manifest"]
+
+
+# Size of the chunks used when streaming files.
+CHUNK_SIZE: int = 1024 * 1024
+
+
+class HashingWriter:
+    """A file-like wrapper that hashes the bytes written through it.
+
+    Parameters
+    ----------
+    fileobj
+        The underlying binary file object.
+    mode
+        The hashing algorithm to use (any algorithm supported by `hashlib`),
+        or `None` to only count the bytes.
+
+    """
+
+    def __init__(self, fileobj, mode: str | None = "md5"):
+        self.fileobj = fileobj
+        self.hash = hashlib.new(mode) if mode else None
+        self.size: int = 0
+
+    def write(self, data: bytes) -> int:
+        if self.hash is not None:
+            self.hash.update(data)
+        self.size += len(data)
+
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def hexdigest(self) -> str | None:
+        """Returns the digest of the bytes written so far."""
+
+        return self.hash.hexdigest() if self.hash is not None else None
+
+
+def finalise_file(
+    temp_file: str,
+    file_path: str,
+    compress: bool = False,
+    hash_mode: str | None = "md5",
+    complevel: int = 1,
+) -> tuple[str | None, int]:
+    """Moves a temporary file to its final location, hashing it as it is written.
+
+    The file is streamed to ``<file_path>.part`` in the destination directory,
+    optionally compressing it with gzip on the way, and then atomically renamed
+    to ``file_path``. The hash is computed on the bytes written to the final file,
+    so it is not necessary to read it again to generate its checksum. The temporary
+    file is removed on success.
+
+    Parameters
+    ----------
+    temp_file
+        The file to move.
+    file_path
+        The final path of the file.
+    compress
+        If `True`, the file is gzipped while it's being written.
+    hash_mode
+        The hashing algorithm. If `None`, no hash is calculated.
+    complevel
+        The gzip compression level.
+
+    Returns
+    -------
+    result
+        A tuple with the hex digest (or `None`) and size in bytes of the final file.
+
+    """
+
+    part_file = file_path + ".part"
+
+    try:
+        with open(temp_file, "rb") as src, open(part_file, "wb") as dst:
+            writer = HashingWriter(dst, hash_mode)
+            if compress:
+                with gzip.GzipFile(
+                    filename=os.path.basename(file_path).removesuffix(".gz"),
+                    fileobj=writer,  # type: ignore
+                    mode="wb",
+                    compresslevel=complevel,
+                ) as gz:
+                    shutil.copyfileobj(src, gz, CHUNK_SIZE)
+            else:
+                shutil.copyfileobj(src, writer, CHUNK_SIZE)  # type: ignore
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        os.replace(part_file, file_path)
+
+    except BaseException:
+        if os.path.exists(part_file):
+            os.unlink(part_file)
+        raise
+
+    os.unlink(temp_file)
+
+    return writer.hexdigest(), writer.size
+
+
+def append_manifest(manifest_path: str | os.PathLike, entry: dict[str, Any]):
+    """Appends an entry to a manifest file.
+
+    The manifest is a JSON Lines file with one entry per file. Each line is written
+    with a single append so that concurrent writers do not interleave lines.
+
+    """
+
+    line = (json.dumps(entry) + "\n").encode()
+
+    fd = os.open(manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def read_manifest(manifest_path: str | os.PathLike) -> list[dict[str, Any]]:
+    """Reads a manifest file. Incomplete lines are ignored."""
+
+    entries: list[dict[str, Any]] = []
+
+    with open(manifest_path, "r") as fd:
+        for line in fd:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    return entries
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: validation.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import re
+from numbers import Number
+
+from typing import Any, Callable, Iterable, Mapping
+
+import jsonschema
+import jsonschema.exceptions
+
+
+__all__ = ["compile_schema", "ReplyValidator"]
+
+
+CheckType = Callable[[Any], bool]
+
+
+# Validation keywords of draft 7 that are not compiled. Subschemas that use them
+# are checked with jsonschema. Keywords not listed here and not handled in
+# compile_schema (title, description, default, etc.) are annotations.
+FALLBACK_KEYWORDS = {
+    "$ref",
+    "additionalItems",
+    "allOf",
+    "const",
+    "contains",
+    "dependencies",
+    "enum",
+    "exclusiveMaximum",
+    "exclusiveMinimum",
+    "if",
+    "maxItems",
+    "maxLength",
+    "maxProperties",
+    "maximum",
+    "minItems",
+    "minLength",
+    "minProperties",
+    "minimum",
+    "multipleOf",
+    "not",
+    "pattern",
+    "propertyNames",
+    "uniqueItems",
+}
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return True
+    return isinstance(value, float) and value.is_integer()
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+# Same as the type checker of the clu models, in which tuples are also arrays.
+TYPE_CHECKS: dict[str, CheckType] = {
+    "array": lambda value: isinstance(value, (list, tuple)),
+    "boolean": lambda value: isinstance(value, bool),
+    "integer": _is_integer,
+    "null": lambda value: value is None,
+    "number": _is_number,
+    "object": lambda value: isinstance(value, dict),
+    "string": lambda value: isinstance(value, str),
+}
+
+
+def _always_valid(_: Any) -> bool:
+    return True
+
+
+def _compile_type(types: str | list[str]) -> CheckType:
+    """Compiles the ``type`` keyword."""
+
+    if isinstance(types, str):
+        return TYPE_CHECKS[types]
+
+    checks = [TYPE_CHECKS[type_] for type_ in types]
+
+    return lambda value: any(check(value) for check in checks)
+
+
+def _compile_object(
+    schema: Mapping[str, Any],
+    root: jsonschema.protocols.Validator,
+    skip: frozenset[str] = frozenset(),
+) -> CheckType:
+    """Compiles the object keywords.
+
+    The instance is iterated instead of the properties of the schema so the cost
+    of checking a reply grows with the number of keywords in the reply, not with
+    the number of keywords in the schema.
+
+    """
+
+    properties = {
+        key: _compile(subschema, root)
+        for key, subschema in schema.get("properties", {}).items()
+    }
+    patterns = [
+        (re.compile(pattern), _compile(subschema, root))
+        for pattern, subschema in schema.get("patternProperties", {}).items()
+    ]
+    additional = _compile(schema.get("additionalProperties", True), root)
+    required = list(schema.get("required", []))
+
+    def check(value: Any) -> bool:
+        if not isinstance(value, dict):
+            return True
+
+        for key in required:
+            if key not in value:
+                return False
+
+        for key, item in value.items():
+            if key in skip:
+                continue
+
+            prop_check = properties.get(key, None)
+            if prop_check is not None and not prop_check(item):
+                return False
+
+            matched = False
+            for pattern, pattern_check in patterns:
+                if pattern.search(key):
+                    matched = True
+                    if not pattern_check(item):
+                        return False
+
+            if prop_check is None and not matched and not additional(item):
+                return False
+
+        return True
+
+    return check
+
+
+def compile_schema(
+    schema: Mapping[str, Any] | bool,
+    validator_class: type[jsonschema.protocols.Validator] = jsonschema.Draft7Validator,
+    skip: Iterable[str] = (),
+) -> CheckType:
+    """Compiles a JSON schema into a function that returns whether a value is valid.
+
+    The keywords used by the actor schemas (``type``, ``properties``,
+    ``required``, ``additionalProperties``, ``patternProperties``, ``items``,
+    ``oneOf``, and ``anyOf``) are compiled into nested checks. Subschemas with
+    other validation keywords are checked with ``validator_class``, resolving
+    references such as ``#/definitions/...`` against ``schema``.
+
+    Parameters
+    ----------
+    schema
+        The schema to compile.
+    validator_class
+        The jsonschema validator class used for the subschemas that are not
+        compiled.
+    skip
+        Properties of the top-level object that are not checked.
+
+    """
+
+    root = validator_class(schema if isinstance(schema, bool) else dict(schema))
+
+    return _compile(schema, root, skip=skip)
+
+
+def _compile(
+    schema: Mapping[str, Any] | bool,
+    root: jsonschema.protocols.Validator,
+    skip: Iterable[str] = (),
+) -> CheckType:
+    """Compiles a subschema. ``root`` is the validator for the full schema."""
+
+    if schema is True or schema == {}:
+        return _always_valid
+    elif schema is False:
+        return lambda _: False
+
+    assert isinstance(schema, Mapping)
+
+    types = schema.get("type", [])
+    types = [types] if isinstance(types, str) else types
+    unknown_types = any(type_ not in TYPE_CHECKS for type_ in types)
+
+    if unknown_types or len(FALLBACK_KEYWORDS.intersection(schema)) > 0:
+        return root.evolve(schema=dict(schema)).is_valid
+
+    checks: list[CheckType] = []
+
+    if "type" in schema:
+        checks.append(_compile_type(schema["type"]))
+
+    object_keywords = ["properties", "patternProperties", "additionalProperties"]
+    if any(keyword in schema for keyword in object_keywords + ["required"]):
+        checks.append(_compile_object(schema, root, frozenset(skip)))
+
+    if "items" in schema:
+        if not isinstance(schema["items"], (Mapping, bool)):
+            return root.evolve(schema=dict(schema)).is_valid
+
+        item_check = _compile(schema["items"], root)
+        checks.append(
+            lambda value: (
+                not isinstance(value, (list, tuple))
+                or all(item_check(item) for item in value)
+            )
+        )
+
+    if "oneOf" in schema:
+        one_of = [_compile(sub, root) for sub in schema["oneOf"]]
+        checks.append(lambda value: sum(check(value) for check in one_of) == 1)
+
+    if "anyOf" in schema:
+        any_of = [_compile(sub, root) for sub in schema["anyOf"]]
+        checks.append(lambda value: any(check(value) for check in any_of))
+
+    if len(checks) == 0:
+        return _always_valid
+    elif len(checks) == 1:
+        return checks[0]
+
+    return lambda value: all(check(value) for check in checks)
+
+
+class ReplyValidator:
+    """A fast validator for the replies of the actor.
+
+    The schema is compiled once with `.compile_schema`. Valid replies, which are
+    the vast majority, are checked only with the compiled function. If a reply is
+    not valid, the full jsonschema validator is used to raise a detailed
+    `~jsonschema.exceptions.ValidationError`. Can replace the ``validator`` of a
+    clu `~clu.model.Model`.
+
+    Parameters
+    ----------
+    schema
+        The schema of the actor.
+    validator_class
+        The jsonschema validator class of the model.
+    skip
+        Keywords that are not validated. Use for trusted keywords that are output
+        at a high rate.
+
+    """
+
+    def __init__(
+        self,
+        schema: Mapping[str, Any],
+        validator_class: type[
+            jsonschema.protocols.Validator
+        ] = jsonschema.Draft7Validator,
+        skip: Iterable[str] = (),
+    ):
+        self.schema = schema
+        self.skip = frozenset(skip)
+
+        self.validator = validator_class(dict(schema))
+        self.check = compile_schema(schema, validator_class, skip=self.skip)
+
+    def is_valid(self, instance: Any) -> bool:
+        """Returns whether a reply is valid."""
+
+        return self.check(instance)
+
+    def validate(self, instance: Any):
+        """Raises a `~jsonschema.exceptions.ValidationError` if a reply is invalid."""
+
+        if self.check(instance):
+            return
+
+        if isinstance(instance, dict) and len(self.skip) > 0:
+            instance = {k: v for k, v in instance.items() if k not in self.skip}
+
+        # Raises the error. If jsonschema finds the reply valid, it's accepted.
+        self.validator.validate(instance)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: window.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import math
+
+from typing import Any, Mapping
+
+
+__all__ = [
+    "WINDOW_KEYS",
+    "get_window_sections",
+    "get_readout_fraction",
+    "get_frame_shape",
+]
+
+
+# Window parameters that define the size of the frame read out.
+WINDOW_KEYS: list[str] = [
+    "lines",
+    "pixels",
+    "overscanlines",
+    "overscanpixels",
+    "hbin",
+    "vbin",
+]
+
+# Number of unbinned columns at the end of each tap that contain only bias. The
+# first few overscan pixels defined in the ACF still contain charge.
+BIAS_PIXELS: int = 17
+
+
+def _tap_size(window: Mapping[str, Any]) -> tuple[int, int]:
+    """Returns the number of columns and rows read for each tap."""
+
+    hbin = int(window.get("hbin", 1)) or 1
+    vbin = int(window.get("vbin", 1)) or 1
+
+    pixelcount = (int(window["pixels"]) + int(window["overscanpixels"])) // hbin
+    linecount = (int(window["lines"]) + int(window["overscanlines"])) // vbin
+
+    return pixelcount, linecount
+
+
+def get_window_sections(window: Mapping[str, Any]) -> dict[str, str] | None:
+    """Returns the ``TRIMSEC`` and ``BIASSEC`` keywords for a readout window.
+
+    The frame is assembled from four taps, two in each direction, with the
+    overscan columns of the two left taps next to those of the two right taps.
+
+    Parameters
+    ----------
+    window
+        The window parameters, as passed to
+        `~archon.controller.ArchonController.set_window`.
+
+    Returns
+    -------
+    sections
+        A mapping of header keyword (``TRIMSEC1`` to ``TRIMSEC4`` and ``BIASSEC1``
+        to ``BIASSEC4``) to section. `None` if the window parameters are not known.
+
+    """
+
+    if any(key not in window for key in WINDOW_KEYS if key not in ["hbin", "vbin"]):
+        return None
+
+    hbin = int(window.get("hbin", 1)) or 1
+    vbin = int(window.get("vbin", 1)) or 1
+
+    width, height = _tap_size(window)
+    n_bias = min(width, math.ceil(BIAS_PIXELS / hbin))
+    n_data = width - n_bias
+    n_lines = min(height, int(window["lines"]) // vbin)
+
+    top = f"{height + 1}:{height + n_lines}"
+    bottom = f"1:{n_lines}"
+
+    left_data = f"1:{n_data}"
+    left_bias = f"{n_data + 1}:{width}"
+    right_bias = f"{width + 1}:{width + n_bias}"
+    right_data = f"{width + n_bias + 1}:{2 * width}"
+
+    return {
+        "TRIMSEC1": f"[{left_data}, {top}]",
+        "TRIMSEC2": f"[{right_data}, {top}]",
+        "TRIMSEC3": f"[{left_data}, {bottom}]",
+        "TRIMSEC4": f"[{right_data}, {bottom}]",
+        "BIASSEC1": f"[{left_bias}, {top}]",
+        "BIASSEC2": f"[{right_bias}, {top}]",
+        "BIASSEC3": f"[{left_bias}, {bottom}]",
+        "BIASSEC4": f"[{right_bias}, {bottom}]",
+    }
+
+
+def get_readout_fraction(
+    window: Mapping[str, Any],
+    default_window: Mapping[str, Any],
+) -> float:
+    """Returns the fraction of the full-frame pixels read with a window.
+
+    The readout time is dominated by the digitisation of the pixels, so this is
+    also approximately the fraction of the full-frame readout time. Returns 1 if
+    either window is not fully defined.
+
+    """
+
+    full_window = {**default_window, **window}
+
+    required = [key for key in WINDOW_KEYS if key not in ["hbin", "vbin"]]
+    if any(key not in default_window or key not in full_window for key in required):
+        return 1.0
+
+    width, height = _tap_size(full_window)
+    default_width, default_height = _tap_size(default_window)
+
+    if default_width <= 0 or default_height <= 0:
+        return 1.0
+
+    return min(1.0, (width * height) / (default_width * default_height))
+
+
+def get_frame_shape(
+    window: Mapping[str, Any],
+    taps: int = 4,
+) -> tuple[int, int] | None:
+    """Returns the shape of the CCD frame read with a window.
+
+    The taps are assembled in two rows if there is more than one. Returns `None`
+    if the window parameters are not known.
+
+    """
+
+    if any(key not in window for key in WINDOW_KEYS if key not in ["hbin", "vbin"]):
+        return None
+
+    width, height = _tap_size(window)
+    if width <= 0 or height <= 0:
+        return None
+
+    tap_rows = 2 if taps > 1 else 1
+
+    return (height * tap_rows, width * (taps // tap_rows))
@@ -6,13 +6,21 @@ from __future__ import annotations
 import os
 import pathlib
 
+from typing import TYPE_CHECKING
+
+import numpy
 import pytest as pytest
 from lvmscp.actor import SCPActor
 
 import clu.testing
+from clu import Command, Reply
 from sdsstools import read_yaml_file
 
 
+if TYPE_CHECKING:
+    from lvmscp.delegate import LVMExposeDelegate
+
+
 @pytest.fixture()
 def test_config():
     yield read_yaml_file(os.path.join(os.path.dirname(__file__), "test_lvmscp.yml"))
@@ -48,3 +56,131 @@ credentials:
 
     _actor.mock_replies.clear()
     await _actor.stop()
+
+
+@pytest.fixture()
+async def delegate(actor: SCPActor, monkeypatch, tmp_path: pathlib.Path, mocker):
+    mocker.patch.object(actor.controllers["sp1"], "set_window")
+    mocker.patch.object(actor.controllers["sp1"], "expose")
+    mocker.patch.object(actor.controllers["sp1"], "readout")
+
+    mocker.patch.object(
+        actor.controllers["sp1"],
+        "fetch",
+        return_value=(numpy.ones((2048, 6144)), 1),
+    )
+
+    # Do not query the telescopes.
+    for name in ["telescope_pwi", "telescope_km", "telescope_foc"]:
+        monkeypatch.delitem(actor.config["header_sources"], name)
+
+    mocker.patch.object(
+        actor.exposure_delegate,
+        "_get_ccd_data",
+        return_value=numpy.zeros((100, 100)),
+    )
+
+    mocker.patch.object(
+        actor.controllers["sp1"],
+        "get_device_status",
+        return_value={
+            "controller": "sp1",
+            "mod2/tempa": -110,
+            "mod2/tempb": -110,
+            "mod2/tempc": -110,
+            "mod12/tempa": -110,
+            "mod12/tempb": -110,
+            "mod12/tempc": -110,
+        },
+    )
+
+    files_data_dir = tmp_path / "archon"
+
+    monkeypatch.setitem(actor.config["files"], "data_dir", str(files_data_dir))
+
+    await actor.exposure_delegate.reset()
+
+    yield actor.exposure_delegate
+
+
+async def send_command_handler(actor: str, command_string: str, **kwargs):
+    _child_command = Command(command_string)
+
+    if actor == "lvmieb" and "shutter status" in command_string:
+        spec = command_string.split()[-1]
+        _child_command.replies.append(
+            Reply(
+                "i",
+                message={f"{spec}_shutter": {"invalid": False, "open": False}},
+            )
+        )
+    elif actor == "lvmieb" and "hartmann status" in command_string:
+        spec = command_string.split()[-1]
+        _child_command.replies.append(
+            Reply(
+                "i",
+                message={
+                    f"{spec}_hartmann_left": {
+                        "power": True,
+                        "open": True,
+                        "invalid": False,
+                        "bits": "01111111",
+                    },
+                    f"{spec}_hartmann_right": {
+                        "power": True,
+                        "open": True,
+                        "invalid": False,
+                        "bits": "10111111",
+                    },
+                },
+            )
+        )
+
+    elif actor == "lvmieb" and "wago status" in command_string:
+        spec = command_string.split()[-1]
+        _child_command.replies.append(
+            Reply("i", message={f"{spec}_sensors": {"t3": 12.5, "rh3": 30}})
+        )
+    elif actor == "lvmieb" and "transducer status" in command_string:
+        spec = command_string.split()[-1]
+        _child_command.replies.append(
+            Reply(
+                "i",
+                message={
+                    "transducer": {
+                        f"{camera}{spec[-1]}_pressure": 1e-6 for camera in "brz"
+                    }
+                },
+            )
+        )
+    elif actor == "lvmieb" and command_string == "depth status":
+        _child_command.replies.append(
+            Reply(
+                "i",
+                message={"depth": {"camera": "b1", "A": 1.1, "B": 1.2, "C": 1.3}},
+            )
+        )
+    elif actor == "lvmnps" and command_string == "status":
+        _child_command.replies.append(
+            Reply(
+                "i",
+                message={
+                    "outlets": [
+                        {"name": "Argon", "state": True},
+                        {"name": "Neon", "state": False},
+                    ]
+                },
+            )
+        )
+
+    _child_command.finish()
+
+    return _child_command
+
+
+@pytest.fixture()
+async def command(delegate: LVMExposeDelegate, mocker):
+    _command = Command("", actor=delegate.actor)
+    _command.send_command = send_command_handler  # type: ignore
+
+    yield _command
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_autoexp.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import pathlib
+
+import numpy
+import pytest
+from astropy.io import fits
+from lvmscp.autoexp import get_auto_exposure_time, get_line_levels, read_test_frames
+
+
+def _arc(peak: float, shape=(200, 300), background: float = 1000.0):
+    data = numpy.full(shape, background, dtype=numpy.float32)
+    data[99:102, 50:60] += peak
+    data[149:152, 70:80] += peak / 2
+
+    return data
+
+
+def test_get_line_levels():
+    levels = get_line_levels([_arc(5000), _arc(20000)], percentile=99.99)
+
+    numpy.testing.assert_allclose(levels.peak, [5000, 20000])
+    numpy.testing.assert_allclose(levels.background, [1000, 1000])
+    assert numpy.all(levels.high > 0)
+    assert numpy.all(levels.high <= levels.peak)
+
+
+def test_get_line_levels_different_shapes():
+    levels = get_line_levels([_arc(5000), _arc(8000, shape=(200, 100))])
+
+    numpy.testing.assert_allclose(levels.peak, [5000, 8000])
+
+
+def test_get_line_levels_hot_pixel():
+    data = _arc(5000)
+    data[10, 10] = 65535
+
+    levels = get_line_levels([data])
+    numpy.testing.assert_allclose(levels.peak, [5000])
+
+    # A single hot pixel in an empty frame is not a line.
+    empty = numpy.random.default_rng(0).normal(1000, 3, (200, 300))
+    empty[10, 10] = 65535
+
+    levels = get_line_levels([empty.astype(numpy.float32)])
+    assert levels.peak[0] < 20
+
+    with pytest.raises(ValueError, match="No lines detected"):
+        get_auto_exposure_time(
+            2.0,
+            levels.peak,
+            {},
+            backgrounds=levels.background,
+            noises=levels.noise,
+        )
+
+
+def test_get_line_levels_noise_frame():
+    rng = numpy.random.default_rng(0)
+    data = rng.normal(1000, 3, (200, 300)).round().astype(numpy.float32)
+
+    levels = get_line_levels([data])
+    assert levels.noise[0] == pytest.approx(3, rel=0.2)
+
+    with pytest.raises(ValueError, match="No lines detected"):
+        get_auto_exposure_time(
+            2.0,
+            levels.peak,
+            {"min_significance": 10},
+            backgrounds=levels.background,
+            noises=levels.noise,
+        )
+
+    # A faint line is still detected.
+    data[99:102, 50:60] += 200
+    levels = get_line_levels([data])
+
+    exptime, _ = get_auto_exposure_time(
+        2.0,
+        levels.peak,
+        {},
+        backgrounds=levels.background,
+        noises=levels.noise,
+    )
+    assert exptime == pytest.approx(300, rel=0.05)
+
+
+def test_read_test_frames_sections(tmp_path: pathlib.Path):
+    data = numpy.full((100, 240), 1000, dtype=numpy.float32)
+    data[50:53, 20:30] += 5000
+    data[:, 100:120] = 40000
+    data[:, 120:140] = 40000
+
+    header = fits.Header(
+        {
+            "CCD": "b1",
+            "TRIMSEC1": "[1:100, 1:100]",
+            "BIASSEC1": "[101:120, 1:100]",
+            "TRIMSEC2": "[141:240, 1:100]",
+            "BIASSEC2": "[121:140, 1:100]",
+        }
+    )
+    filename = str(tmp_path / "sdR-s-b1-00000001.fits")
+    fits.PrimaryHDU(data, header=header).writeto(filename)
+
+    frames = read_test_frames([filename])
+    assert [section.shape for section in frames["b1"]] == [(100, 100), (100, 100)]
+
+    # The overscan is not measured.
+    levels = get_line_levels([frames["b1"]])
+    numpy.testing.assert_allclose(levels.peak, [5000])
+
+
+@pytest.mark.parametrize(
+    "peaks,exptime,limited",
+    [
+        ([5000, 10000, 2000], 6.0, False),
+        ([100, 50, 20], 300.0, True),
+        ([1e6, 1000, 1000], 1.0, True),
+    ],
+)
+def test_get_auto_exposure_time(peaks: list[float], exptime: float, limited: bool):
+    config = {
+        "target_peak": 30000,
+        "saturation": 1e7,
+        "min_exptime": 1.0,
+        "max_exptime": 300.0,
+    }
+
+    assert get_auto_exposure_time(2.0, numpy.array(peaks), config) == (
+        exptime,
+        limited,
+    )
+
+
+def test_get_auto_exposure_time_saturation():
+    config = {"target_peak": 70000, "saturation": 60000}
+
+    assert get_auto_exposure_time(1.0, numpy.array([10000.0]), config) == (6.0, True)
+
+
+def test_get_auto_exposure_time_saturation_background():
+    config = {"target_peak": 70000, "saturation": 60000}
+
+    exptime = get_auto_exposure_time(
+        1.0,
+        numpy.array([10000.0, 5000.0]),
+        config,
+        backgrounds=numpy.array([1000.0, 20000.0]),
+    )
+
+    assert exptime == (5.9, True)
+
+
+@pytest.mark.parametrize("peaks", [[0, 0, 0], [numpy.nan, -10]])
+def test_get_auto_exposure_time_no_lines(peaks: list[float]):
+    with pytest.raises(ValueError, match="No lines detected"):
+        get_auto_exposure_time(2.0, numpy.array(peaks), {})
+
+
+def test_get_auto_exposure_time_saturated_test_frame():
+    with pytest.raises(ValueError, match="saturated"):
+        get_auto_exposure_time(
+            2.0,
+            numpy.array([5000.0, 59500.0]),
+            {"saturation": 60000},
+            backgrounds=numpy.array([1000.0, 1000.0]),
+        )
+
+
+def test_get_auto_exposure_time_bad_exptime():
+    with pytest.raises(ValueError):
+        get_auto_exposure_time(0.0, numpy.array([5000.0]), {})
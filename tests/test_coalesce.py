@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_coalesce.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+
+from lvmscp.coalesce import CommandCoalescer
+
+from clu import Command, CommandStatus
+from clu.client import AMQPClient
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+
+
+class FakeSender:
+    """Counts the commands sent and finishes them after a delay."""
+
+    def __init__(self, delay: float = 0.1, status=CommandStatus.DONE):
+        self.delay = delay
+        self.status = status
+        self.sent: list[tuple[str, str]] = []
+
+    async def __call__(self, target: str, command_string: str, **kwargs):
+        self.sent.append((target, command_string))
+
+        command = Command(command_string)
+        await asyncio.sleep(self.delay)
+        command.set_status(self.status)
+
+        return command
+
+
+async def test_coalesce_in_flight():
+    sender = FakeSender()
+    coalesced: list[str] = []
+    coalescer = CommandCoalescer(on_coalesced=coalesced.append)
+
+    results = await asyncio.gather(
+        coalescer.send(sender, "lvmieb", "shutter status sp1"),
+        coalescer.send(sender, "lvmieb", "shutter status sp1"),
+        coalescer.send(sender, "lvmieb", "shutter status sp2"),
+        coalescer.send(sender, "lvmnps", "status"),
+        coalescer.send(sender, "lvmnps", "status"),
+    )
+
+    assert len(sender.sent) == 3
+    assert results[0] is results[1]
+    assert results[3] is results[4]
+    assert results[0] is not results[2]
+    assert coalesced == ["lvmieb", "lvmnps"]
+
+    # Nothing is cached once the commands finish.
+    await coalescer.send(sender, "lvmnps", "status")
+    assert len(sender.sent) == 4
+
+
+async def test_coalesce_not_status():
+    sender = FakeSender()
+    coalescer = CommandCoalescer()
+
+    await asyncio.gather(
+        coalescer.send(sender, "lvmieb", "shutter open sp1"),
+        coalescer.send(sender, "lvmieb", "shutter open sp1"),
+        coalescer.send(sender, "lvmieb", "wago status", await_command=False),
+        coalescer.send(sender, "lvmieb", "wago status", await_command=False),
+    )
+
+    assert len(sender.sent) == 4
+
+
+async def test_coalesce_different_kwargs():
+    sender = FakeSender()
+    coalescer = CommandCoalescer()
+
+    results = await asyncio.gather(
+        coalescer.send(sender, "lvmnps", "status", time_limit=5),
+        coalescer.send(sender, "lvmnps", "status", time_limit=5),
+        coalescer.send(sender, "lvmnps", "status", time_limit=10),
+        coalescer.send(sender, "lvmnps", "status", time_limit=5, internal=True),
+    )
+
+    assert len(sender.sent) == 3
+    assert results[0] is results[1]
+    assert results[0] is not results[2]
+    assert results[0] is not results[3]
+
+
+async def test_coalesce_ttl():
+    sender = FakeSender(delay=0.01)
+    coalescer = CommandCoalescer(ttl=0.2)
+
+    command1 = await coalescer.send(sender, "lvmnps", "status")
+    command2 = await coalescer.send(sender, "lvmnps", "status")
+
+    assert command1 is command2
+    assert len(sender.sent) == 1
+
+    await asyncio.sleep(0.25)
+
+    await coalescer.send(sender, "lvmnps", "status")
+    assert len(sender.sent) == 2
+
+
+async def test_coalesce_ttl_failed():
+    sender = FakeSender(delay=0.01, status=CommandStatus.FAILED)
+    coalescer = CommandCoalescer(ttl=1)
+
+    await coalescer.send(sender, "lvmnps", "status")
+    await coalescer.send(sender, "lvmnps", "status")
+
+    assert len(sender.sent) == 2
+
+
+async def test_coalesce_cancelled_caller():
+    sender = FakeSender(delay=0.2)
+    coalescer = CommandCoalescer()
+
+    task1 = asyncio.create_task(coalescer.send(sender, "lvmnps", "status"))
+    task2 = asyncio.create_task(coalescer.send(sender, "lvmnps", "status"))
+
+    await asyncio.sleep(0.05)
+    task1.cancel()
+
+    command = await task2
+    assert command.status.did_succeed
+    assert len(sender.sent) == 1
+
+
+async def test_actor_send_command_coalesced(actor: SCPActor, mocker):
+    sender = FakeSender()
+    mocker.patch.object(AMQPClient, "send_command", side_effect=sender.__call__)
+
+    actor.coalescer.enabled = True
+
+    await asyncio.gather(
+        actor.send_command("lvmieb", "transducer status"),
+        actor.send_command("lvmieb", "transducer", "status"),
+    )
+
+    assert sender.sent == [("lvmieb", "transducer status")]
+    assert 'lvmscp_coalesced_commands_total{actor="lvmieb"} 1' in actor.metrics.render()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_command_calib_batch.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from .conftest import send_command_handler
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+@pytest.mark.parametrize("flavour,exptime", [("bias", ""), ("dark", "0.01")])
+async def test_command_calib_batch(
+    delegate: LVMExposeDelegate,
+    actor: SCPActor,
+    mocker,
+    flavour: str,
+    exptime: str,
+):
+    mocker.patch.object(actor.controllers["sp1"], "is_connected", return_value=True)
+
+    send_command = mocker.spy(delegate, "_send_command")
+    move_shutter = mocker.patch.object(delegate, "move_shutter")
+
+    command = await actor.invoke_mock_command(
+        f"calib-batch -c sp1 {flavour} 3 {exptime}"
+    )
+    command.send_command = send_command_handler  # type: ignore
+    await command
+
+    assert command.status.did_succeed
+
+    calib_batch = command.replies[-1].message["calib_batch"]
+    assert calib_batch["frame"] == 3
+    assert calib_batch["cadence"] > 0
+
+    move_shutter.assert_not_called()
+
+    commands = [call.args[1] for call in send_command.call_args_list]
+    assert commands.count("transducer status sp1") == 3
+    assert "status" not in commands
+
+    cotasks = delegate.actor.config["calib_batch"]["cotasks"][flavour]
+    assert ("hartmann status sp1" in commands) is ("hartmann" in cotasks)
+
+    # The full set of cotasks is restored after the batch.
+    assert delegate.cotasks is None
+    assert delegate.use_shutter is True
+
+
+async def test_command_calib_batch_dark_no_exptime(actor: SCPActor):
+    command = await actor.invoke_mock_command("calib-batch dark 3")
+    await command
+
+    assert command.status.did_fail
+
+
+async def test_command_calib_batch_invalid_cotask(
+    delegate: LVMExposeDelegate,
+    actor: SCPActor,
+    monkeypatch,
+    mocker,
+):
+    mocker.patch.object(actor.controllers["sp1"], "is_connected", return_value=True)
+    monkeypatch.setitem(actor.config["calib_batch"]["cotasks"], "bias", ["bad"])
+
+    command = await actor.invoke_mock_command("calib-batch -c sp1 bias 1")
+    await command
+
+    assert command.status.did_fail
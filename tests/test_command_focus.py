@@ -8,12 +8,18 @@
 
 from __future__ import annotations
 
+import asyncio
+import pathlib
+from types import SimpleNamespace
+
 from typing import TYPE_CHECKING
 
+import numpy
 import pytest
+from astropy.io import fits
 
 from clu.actor import Reply
-from clu.command import Command
+from clu.command import Command, CommandStatus
 
 
 if TYPE_CHECKING:
@@ -34,3 +40,171 @@ async def test_command_focus(actor: SCPActor, focus_command: str, mocker):
     await cmd
 
     assert cmd.status.did_succeed
+
+
+async def test_command_focus_window_mode(actor: SCPActor, mocker):
+    command = Command()
+    command.replies.append(Reply("i", {"filenames": ["/data/sdr-0001.fits"]}))
+    command.set_result(command)
+
+    send_command = mocker.patch.object(actor, "send_command", return_value=command)
+
+    cmd = await actor.invoke_mock_command("focus --window-mode focus_strip sp2 5")
+    await cmd
+
+    assert cmd.status.did_succeed
+
+    expose_strings = [
+        call.args[1] for call in send_command.call_args_list if "expose" in call.args[1]
+    ]
+    assert expose_strings == ["expose --arc --window-mode focus_strip 5.0"] * 2
+
+
+async def test_command_focus_bad_window_mode(actor: SCPActor):
+    cmd = await actor.invoke_mock_command("focus --window-mode bad_mode sp2 5")
+    await cmd
+
+    assert cmd.status.did_fail
+
+
+async def test_command_focus_auto_exptime(
+    actor: SCPActor,
+    mocker,
+    tmp_path: pathlib.Path,
+):
+    filenames = []
+    for ccd, peak in [("b1", 5000), ("r1", 10000), ("z1", 2000)]:
+        data = numpy.full((100, 100), 1000, dtype=numpy.uint16)
+        data[49:52, 20:25] += peak
+        filename = str(tmp_path / f"sdR-s-{ccd}-00000001.fits")
+        fits.PrimaryHDU(data, header=fits.Header({"CCD": ccd})).writeto(filename)
+        filenames.append(filename)
+
+    command = Command()
+    command.replies.append(Reply("i", {"filenames": filenames}))
+    command.set_result(command)
+
+    send_command = mocker.patch.object(actor, "send_command", return_value=command)
+
+    cmd = await actor.invoke_mock_command("focus --auto-exptime sp2 2")
+    await cmd
+
+    assert cmd.status.did_succeed
+
+    expose_strings = [
+        call.args[1] for call in send_command.call_args_list if "expose" in call.args[1]
+    ]
+    assert expose_strings == [
+        "expose --arc --window-mode focus_strip 2.0",
+        "expose --arc 6.0",
+        "expose --arc 6.0",
+    ]
+
+    auto_exptime = [
+        reply["auto_exptime"] for reply in actor.mock_replies if "auto_exptime" in reply
+    ]
+    assert auto_exptime[0]["ccds"] == ["b1", "r1", "z1"]
+    assert auto_exptime[0]["peak"] == [5000.0, 10000.0, 2000.0]
+
+
+async def test_command_focus_auto_exptime_no_lines(
+    actor: SCPActor,
+    mocker,
+    tmp_path: pathlib.Path,
+):
+    filename = str(tmp_path / "sdR-s-b1-00000001.fits")
+    data = numpy.full((100, 100), 1000, dtype=numpy.uint16)
+    fits.PrimaryHDU(data, header=fits.Header({"CCD": "b1"})).writeto(filename)
+
+    command = Command()
+    command.replies.append(Reply("i", {"filenames": [filename]}))
+    command.set_result(command)
+
+    send_command = mocker.patch.object(actor, "send_command", return_value=command)
+
+    cmd = await actor.invoke_mock_command("focus --auto-exptime sp2 2")
+    await cmd
+
+    assert cmd.status.did_fail
+    assert "No lines detected" in actor.mock_replies[-1]["error"]
+
+    expose_strings = [
+        call.args[1] for call in send_command.call_args_list if "expose" in call.args[1]
+    ]
+    assert expose_strings == ["expose --arc --window-mode focus_strip 2.0"]
+
+
+class FakeSpectrograph:
+    """Replies to expose and Hartmann commands with delays."""
+
+    def __init__(self, readout_time: float = 0.2, hd_time: float = 0.05):
+        self.readout_time = readout_time
+        self.hd_time = hd_time
+        self.events: list[tuple[str, str]] = []
+
+    async def _finish(self, command: Command, command_string: str, reply_callback):
+        if command_string.startswith("expose"):
+            await asyncio.sleep(0.02)
+            if reply_callback:
+                reply_callback(SimpleNamespace(body={"readout_started": {}}))
+            self.events.append(("readout", command_string))
+            await asyncio.sleep(self.readout_time)
+        else:
+            await asyncio.sleep(self.hd_time)
+
+        self.events.append(("done", command_string))
+        command.set_status(CommandStatus.DONE)
+
+    async def __call__(
+        self,
+        target: str,
+        command_string: str,
+        await_command: bool = True,
+        reply_callback=None,
+        **kwargs,
+    ):
+        command = Command(command_string)
+        self.events.append(("sent", command_string))
+
+        task = asyncio.create_task(
+            self._finish(command, command_string, reply_callback)
+        )
+        if await_command:
+            await task
+
+        return command
+
+
+async def test_command_focus_preposition(actor: SCPActor, mocker):
+    spectrograph = FakeSpectrograph()
+    mocker.patch.object(actor, "send_command", side_effect=spectrograph.__call__)
+
+    cmd = await actor.invoke_mock_command("focus sp2 5")
+    await cmd
+
+    assert cmd.status.did_succeed
+
+    sent = [event[1] for event in spectrograph.events if event[0] == "sent"]
+    assert sent == [
+        "hartmann open -s right",
+        "hartmann close -s left",
+        "expose --arc 5.0",
+        "hartmann open -s left",
+        "hartmann close -s right",
+        "expose --arc 5.0",
+        "hartmann open -s all",
+    ]
+
+    # The doors for the second side are moved before the first exposure finishes.
+    events = spectrograph.events
+    assert events.index(("sent", "hartmann close -s right")) < events.index(
+        ("done", "expose --arc 5.0")
+    )
+
+    await asyncio.sleep(0.05)
+
+    timing = [
+        reply["focus_timing"] for reply in actor.mock_replies if "focus_timing" in reply
+    ]
+    assert len(timing) == 1
+    assert timing[0]["time_saved"] >= 0.1
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_command_index.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+
+from typing import TYPE_CHECKING
+
+import pytest
+from click.testing import CliRunner
+from lvmscp.__main__ import lvmscp
+from lvmscp.index import ExposureIndex
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+@pytest.fixture(autouse=True)
+def enable_index(actor: SCPActor, monkeypatch):
+    monkeypatch.setitem(actor.config["index"], "enabled", True)
+
+
+async def _expose(delegate: LVMExposeDelegate, command: Command, flavour: str):
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour=flavour,
+        exposure_time=0.01,
+        readout=True,
+    )
+    assert result
+
+
+async def test_command_index_query(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+):
+    await _expose(delegate, command, "bias")
+    await _expose(delegate, command, "arc")
+
+    cmd = await actor.invoke_mock_command("index query --flavour arc --ccd b1")
+    await cmd
+    assert cmd.status.did_succeed
+
+    index_query = cmd.replies[-1].message["index_query"]
+    assert index_query["n_results"] == 1
+
+    row = index_query["results"][0]
+    assert row["flavour"] == "arc"
+    assert row["controller"] == "sp1"
+    assert row["ccd"] == "b1"
+    assert row["exposure_no"] == delegate.last_exposure_no
+    assert os.path.exists(row["path"])
+    assert row["checksum"] is not None
+    assert row["header"]["HARTMANN"] == "0 0"
+
+    cmd = await actor.invoke_mock_command("index query --header 'HARTMANN=0 0'")
+    await cmd
+    assert cmd.status.did_succeed
+    assert cmd.replies[-1].message["index_query"]["n_results"] == 6
+
+
+async def test_command_index_disabled(actor: SCPActor, monkeypatch):
+    monkeypatch.setitem(actor.config["index"], "enabled", False)
+
+    cmd = await actor.invoke_mock_command("index query")
+    await cmd
+    assert cmd.status.did_fail
+
+
+async def test_index_backfill_cli(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    tmp_path: pathlib.Path,
+):
+    await _expose(delegate, command, "object")
+
+    data_dir = delegate.actor.config["files"]["data_dir"]
+    index_path = tmp_path / "backfill.sqlite"
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        lvmscp, ["index", "--path", str(index_path), "backfill", data_dir]
+    )
+    assert result.exit_code == 0
+    assert "Added 3 files" in result.output
+
+    # Files already in the index are skipped.
+    result = runner.invoke(
+        lvmscp, ["index", "--path", str(index_path), "backfill", data_dir]
+    )
+    assert "Added 0 files" in result.output
+
+    result = runner.invoke(
+        lvmscp,
+        ["index", "--path", str(index_path), "query", "--ccd", "r1", "--json"],
+    )
+    assert result.exit_code == 0
+
+    results = json.loads(result.output)
+    assert len(results) == 1
+    assert results[0]["flavour"] == "object"
+
+    # Checksums are read from the checksum file in the MJD directory.
+    index = ExposureIndex(index_path)
+    original = delegate.actor.get_exposure_index()
+    assert original is not None
+    assert results[0]["checksum"] == original.query(ccd="r1")[0]["checksum"]
+    assert len(index.query()) == 3
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_command_profile.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import os
+import pathlib
+import threading
+import time
+
+from typing import TYPE_CHECKING
+
+from lvmscp.profiling import MemoryProfiler
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+
+
+async def test_command_profile(actor: SCPActor, tmp_path: pathlib.Path, monkeypatch):
+    monkeypatch.setitem(actor.config["actor"], "log_dir", str(tmp_path))
+
+    cmd = await actor.invoke_mock_command("profile start --interval 0.001")
+    await cmd
+    assert cmd.status.did_succeed
+
+    # Keep the event loop busy for a bit.
+    for _ in range(20):
+        sum(range(10000))
+        await asyncio.sleep(0.005)
+
+    cmd = await actor.invoke_mock_command("profile stop --top 5")
+    await cmd
+    assert cmd.status.did_succeed
+
+    profile = cmd.replies[-1].message["profile"]
+    assert profile["samples"] > 0
+    assert len(profile["top"]) > 0
+    assert os.path.exists(profile["filename"])
+    assert os.path.exists(profile["filename"] + ".folded")
+
+
+async def test_command_profile_stop_not_running(actor: SCPActor):
+    cmd = await actor.invoke_mock_command("profile stop")
+    await cmd
+
+    assert cmd.status.did_fail
+
+
+async def test_command_memory(actor: SCPActor, tmp_path: pathlib.Path, monkeypatch):
+    monkeypatch.setitem(actor.config["actor"], "log_dir", str(tmp_path))
+
+    cmd = await actor.invoke_mock_command("memory diff")
+    await cmd
+    assert cmd.status.did_fail
+
+    cmd = await actor.invoke_mock_command("memory snapshot")
+    await cmd
+    assert cmd.status.did_succeed
+    assert cmd.replies[-1].message["memory"]["baseline"] is True
+
+    data = [bytearray(1000) for _ in range(100)]
+
+    cmd = await actor.invoke_mock_command("memory diff --top 3")
+    await cmd
+    assert cmd.status.did_succeed
+
+    memory = cmd.replies[-1].message["memory"]
+    assert len(memory["top"]) == 3
+    assert os.path.exists(memory["filename"])
+
+    cmd = await actor.invoke_mock_command("memory stop")
+    await cmd
+    assert cmd.status.did_succeed
+    assert not actor.memory_profiler.tracing
+
+    del data
+
+
+async def test_command_memory_executor(
+    actor: SCPActor,
+    tmp_path: pathlib.Path,
+    monkeypatch,
+    mocker,
+):
+    monkeypatch.setitem(actor.config["actor"], "log_dir", str(tmp_path))
+
+    threads: list[int] = []
+    snapshot = actor.memory_profiler.snapshot
+
+    def record_thread():
+        threads.append(threading.get_ident())
+        return snapshot()
+
+    mocker.patch.object(actor.memory_profiler, "snapshot", side_effect=record_thread)
+
+    cmd = await actor.invoke_mock_command("memory snapshot")
+    await cmd
+    assert cmd.status.did_succeed
+
+    # The snapshot is not taken in the thread running the event loop.
+    assert threads and threads[0] != threading.get_ident()
+
+    cmd = await actor.invoke_mock_command("memory stop")
+    await cmd
+    assert not actor.memory_profiler.tracing
+
+
+def test_memory_profiler_nframes():
+    profiler = MemoryProfiler.from_config({"nframes": 100, "max_nframes": 10})
+    assert profiler.nframes == 10
+
+    assert MemoryProfiler.from_config({"nframes": 0}).nframes == 1
+    assert MemoryProfiler.from_config({}).nframes == 5
+
+
+def test_memory_profiler_max_duration():
+    profiler = MemoryProfiler(max_duration=0.1)
+
+    profiler.snapshot()
+    assert profiler.tracing
+    assert len(profiler.snapshots) == 1
+
+    time.sleep(0.3)
+
+    # The profiler stops on its own after max_duration.
+    assert not profiler.tracing
+    assert len(profiler.snapshots) == 0
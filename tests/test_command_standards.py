@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_command_standards.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import json
+
+from typing import TYPE_CHECKING
+
+import numpy
+import pytest
+from astropy.io import fits
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+STANDARDS = [
+    {
+        "id": 4383919281947200,
+        "ra": 120.5,
+        "dec": -20.1,
+        "acquired": True,
+        "t0": "2026-10-19T01:00:00.000",
+        "t1": "2026-10-19T01:00:30.000",
+        "exptime": 30.0,
+        "fibre": "P1-1",
+    },
+    {"id": 4383919281947201, "ra": 121.5, "dec": -21.1},
+]
+
+
+@pytest.mark.parametrize("table,cards", [(False, True), (True, False), (True, True)])
+async def test_command_standards(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+    monkeypatch,
+    table: bool,
+    cards: bool,
+):
+    monkeypatch.setitem(actor.config, "standards", {"table": table, "cards": cards})
+
+    cmd = await actor.invoke_mock_command(f"standards set '{json.dumps(STANDARDS)}'")
+    await cmd
+    assert cmd.status.did_succeed
+    assert cmd.replies[-1].message["standards"]["n_standards"] == 2
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+        readout=True,
+    )
+    assert result
+
+    # The standards are cleared after the exposure.
+    assert delegate.standards is None
+
+    assert actor.model
+    filename = actor.model["filenames"].value[0]
+
+    with fits.open(filename, checksum=True) as hdul:
+        header = hdul[0].header
+
+        if cards:
+            assert header["STD1ID"] == 4383919281947200
+            assert header["STD1ACQ"] is True
+            assert header["STD2FIB"] is None
+            assert header["STD2EXP"] == 0.0
+        else:
+            assert header.get("STD1ID", None) is None
+
+        if table:
+            data = hdul["STANDARDS"].data
+            assert len(data) == 2
+            assert data["id"][1] == 4383919281947201
+            assert data["fibre"][0] == "P1-1"
+            assert numpy.isclose(data["ra"][1], 121.5)
+        else:
+            assert "STANDARDS" not in hdul
+
+
+@pytest.mark.parametrize(
+    "table",
+    [
+        "[{}]",
+        '[{"id": "abc"}]',
+        '[{"id": 1, "bad_column": 2}]',
+        json.dumps([{"id": ii} for ii in range(16)]),
+        "not json",
+    ],
+)
+async def test_command_standards_invalid(actor: SCPActor, table: str):
+    cmd = await actor.invoke_mock_command(f"standards set '{table}'")
+    await cmd
+
+    assert cmd.status.did_fail
+    assert actor.exposure_delegate.standards is None
+
+
+async def test_command_standards_clear(actor: SCPActor):
+    cmd = await actor.invoke_mock_command(f"standards set '{json.dumps(STANDARDS)}'")
+    await cmd
+    assert actor.exposure_delegate.standards is not None
+
+    cmd = await actor.invoke_mock_command("standards clear")
+    await cmd
+    assert cmd.status.did_succeed
+    assert actor.exposure_delegate.standards is None
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_cryo.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy
+import pytest
+from lvmscp.cryo import CryoHistory
+
+from .conftest import send_command_handler
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+
+
+T0 = 1_700_000_000.0
+
+
+def test_cryo_forecast_depth():
+    history = CryoHistory()
+
+    # 100 mm depleting at 2 mm/h, one sample every 10 minutes.
+    for ii in range(12):
+        history.add("b1", "depth", 100 - 2 * ii / 6, t=T0 + ii * 600)
+
+    forecast = history.forecast(now=T0 + 11 * 600)["b1"]["depth"]
+
+    assert forecast["n_samples"] == 12
+    assert forecast["rate"] == pytest.approx(-2)
+    assert forecast["value"] == pytest.approx(100 - 2 * 11 / 6)
+    assert forecast["time_to_limit"] == pytest.approx((100 - 2 * 11 / 6) / 2, 0.01)
+    assert forecast["limit_time"] is not None
+
+
+def test_cryo_forecast_not_enough_samples():
+    history = CryoHistory(min_samples=5)
+
+    for ii in range(3):
+        history.add("b1", "depth", 100 - ii, t=T0 + ii * 600)
+
+    forecast = history.forecast(now=T0 + 1800)["b1"]["depth"]
+
+    assert forecast["rate"] is None
+    assert forecast["time_to_limit"] is None
+
+
+def test_cryo_forecast_pressure():
+    history = CryoHistory(limits={"pressure": 1e-4})
+
+    for ii in range(10):
+        history.add("r1", "pressure", 1e-6 + 1e-6 * ii, t=T0 + ii * 3600)
+
+    forecast = history.forecast(now=T0 + 9 * 3600)["r1"]["pressure"]
+
+    assert forecast["rate"] == pytest.approx(1e-6)
+    assert forecast["time_to_limit"] == pytest.approx(90, abs=0.01)
+
+
+def test_cryo_fill_resets_history():
+    history = CryoHistory()
+
+    for ii in range(10):
+        history.add("z1", "depth", 50 - ii, t=T0 + ii * 600)
+
+    history.add("z1", "depth", 120, t=T0 + 6000)
+
+    forecast = history.forecast(now=T0 + 6000)["z1"]["depth"]
+    assert forecast["n_samples"] == 1
+
+
+def test_cryo_ring_buffer():
+    history = CryoHistory(capacity=8)
+
+    rng = numpy.random.default_rng(1)
+    values = 100 - numpy.arange(30) * 0.1 + rng.normal(0, 0.01, 30)
+    for ii, value in enumerate(values):
+        history.add("b1", "depth", value, t=T0 + ii * 600)
+
+    forecast = history.forecast(now=T0 + 29 * 600)["b1"]["depth"]
+    assert forecast["n_samples"] == 8
+
+    # The running fit matches a fit to the last samples.
+    times = numpy.arange(22, 30) * 600 / 3600
+    slope, _ = numpy.polyfit(times, values[22:], 1)
+    assert forecast["rate"] == pytest.approx(slope)
+
+
+def test_cryo_header_values():
+    history = CryoHistory(min_samples=2)
+
+    history.add_header_values(
+        "b1",
+        {"DEPTHA": (10.0, ""), "DEPTHB": (12.0, ""), "PRESSURE": (1e-6, "")},
+        t=T0,
+    )
+    history.add_header_values("b1", {"DEPTHC": 9.0, "PRESSURE": None}, t=T0 + 3600)
+
+    forecast = history.forecast(now=T0 + 3600)["b1"]
+    assert forecast["depth"]["rate"] == pytest.approx(-2.0)
+    assert forecast["pressure"]["n_samples"] == 1
+
+
+async def test_command_cryo_forecast(actor: SCPActor, mocker):
+    mocker.patch.object(actor, "send_command", side_effect=send_command_handler)
+
+    command = await actor.invoke_mock_command("cryo-forecast --poll")
+    await command
+
+    assert command.status.did_succeed
+
+    forecast = command.replies.get("cryo_forecast")
+    assert forecast["b1"]["depth"]["n_samples"] == 1
+    assert forecast["r1"]["pressure"]["n_samples"] == 1
+    assert "depth" not in forecast["r1"]
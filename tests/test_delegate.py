@@ -8,16 +8,21 @@
 
 from __future__ import annotations
 
+import asyncio
+import glob
+import hashlib
 import os
-import pathlib
+import time
 
 from typing import TYPE_CHECKING
 
-import numpy
 import pytest
 from astropy.io import fits
+from lvmscp.tools import read_manifest
 
-from clu import Command, Reply
+from clu import Command
+
+from .conftest import send_command_handler
 
 
 if TYPE_CHECKING:
@@ -25,95 +30,6 @@ if TYPE_CHECKING:
     from lvmscp.delegate import LVMExposeDelegate
 
 
-@pytest.fixture()
-async def delegate(actor: SCPActor, monkeypatch, tmp_path: pathlib.Path, mocker):
-    mocker.patch.object(actor.controllers["sp1"], "set_window")
-    mocker.patch.object(actor.controllers["sp1"], "expose")
-    mocker.patch.object(actor.controllers["sp1"], "readout")
-
-    mocker.patch.object(
-        actor.controllers["sp1"],
-        "fetch",
-        return_value=(numpy.ones((2048, 6144)), 1),
-    )
-
-    mocker.patch.object(actor.exposure_delegate, "get_telescope_info", return_value={})
-
-    mocker.patch.object(
-        actor.exposure_delegate,
-        "_get_ccd_data",
-        return_value=numpy.zeros((100, 100)),
-    )
-
-    mocker.patch.object(
-        actor.controllers["sp1"],
-        "get_device_status",
-        return_value={
-            "controller": "sp1",
-            "mod2/tempa": -110,
-            "mod2/tempb": -110,
-            "mod2/tempc": -110,
-            "mod12/tempa": -110,
-            "mod12/tempb": -110,
-            "mod12/tempc": -110,
-        },
-    )
-
-    files_data_dir = tmp_path / "archon"
-
-    monkeypatch.setitem(actor.config["files"], "data_dir", str(files_data_dir))
-
-    await actor.exposure_delegate.reset()
-
-    yield actor.exposure_delegate
-
-
-async def send_command_handler(actor: str, command_string: str, **kwargs):
-    _child_command = Command(command_string)
-
-    if actor == "lvmieb" and "shutter status" in command_string:
-        spec = command_string.split()[-1]
-        _child_command.replies.append(
-            Reply(
-                "i",
-                message={f"{spec}_shutter": {"invalid": False, "open": False}},
-            )
-        )
-    elif actor == "lvmieb" and "hartmann status" in command_string:
-        spec = command_string.split()[-1]
-        _child_command.replies.append(
-            Reply(
-                "i",
-                message={
-                    f"{spec}_hartmann_left": {
-                        "power": True,
-                        "open": True,
-                        "invalid": False,
-                        "bits": "01111111",
-                    },
-                    f"{spec}_hartmann_right": {
-                        "power": True,
-                        "open": True,
-                        "invalid": False,
-                        "bits": "10111111",
-                    },
-                },
-            )
-        )
-
-    _child_command.finish()
-
-    return _child_command
-
-
-@pytest.fixture()
-async def command(delegate: LVMExposeDelegate, mocker):
-    _command = Command("", actor=delegate.actor)
-    _command.send_command = send_command_handler  # type: ignore
-
-    yield _command
-
-
 async def test_delegate(delegate: LVMExposeDelegate, actor: SCPActor):
     assert actor.exposure_delegate == delegate
 
@@ -200,3 +116,283 @@ async def test_shutter_fails_to_close(delegate, command, mocker):
         "Frame was read out but shutter failed to close. "
         "There may be contamination in the image." in replies
     )
+
+
+async def test_delegate_expose_rice(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    monkeypatch,
+):
+    files_config = delegate.actor.config["files"]
+    monkeypatch.setitem(files_config, "compression", "rice")
+    monkeypatch.setitem(files_config, "template", "sdR-{ccd}-{exposure_no:08d}.fits.fz")
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="bias",
+        exposure_time=0,
+        readout=True,
+    )
+
+    assert result
+
+    assert delegate.actor.model and delegate.actor.model["filenames"] is not None
+    filenames = delegate.actor.model["filenames"].value
+    assert filenames[0].endswith(".fits.fz")
+
+    hdu = fits.open(filenames[0])
+    assert isinstance(hdu[1], fits.CompImageHDU)
+
+    raw_header = fits.getheader(filenames[0], 1, disable_image_compression=True)
+    assert raw_header["ZCMPTYPE"] == "RICE_1"
+    assert hdu[1].data.shape == (100, 100)
+    assert hdu[1].header["CCDTEMP1"] == -110
+
+
+@pytest.mark.parametrize("compression", ["gzip", "rice"])
+async def test_delegate_checksum_manifest(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    monkeypatch,
+    compression: str,
+):
+    files_config = delegate.actor.config["files"]
+    monkeypatch.setitem(files_config, "manifest", "{MJD}.manifest.jsonl")
+    monkeypatch.setitem(files_config, "compression", compression)
+    if compression == "rice":
+        template = "sdR-{ccd}-{exposure_no:08d}.fits.fz"
+        monkeypatch.setitem(files_config, "template", template)
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="bias",
+        exposure_time=0,
+        readout=True,
+    )
+
+    assert result
+
+    assert delegate.actor.model and delegate.actor.model["filenames"] is not None
+    filenames = delegate.actor.model["filenames"].value
+    assert len(filenames) == 3
+
+    dirname = os.path.dirname(filenames[0])
+    mjd = os.path.basename(dirname)
+
+    checksums = {}
+    for checksum_file in glob.glob(os.path.join(dirname, "*.md5sum")):
+        with open(checksum_file) as fd:
+            for line in fd:
+                digest, basename = line.split()
+                checksums[basename] = digest
+
+    manifest = read_manifest(os.path.join(dirname, f"{mjd}.manifest.jsonl"))
+    assert len(manifest) == 3
+
+    entries = {entry["filename"]: entry for entry in manifest}
+
+    for filename in filenames:
+        with open(filename, "rb") as fd:
+            contents = fd.read()
+
+        basename = os.path.basename(filename)
+        md5 = hashlib.md5(contents).hexdigest()
+
+        assert checksums[basename] == md5
+        assert entries[basename]["md5"] == md5
+        assert entries[basename]["size"] == len(contents)
+        assert entries[basename]["exposure_no"] == delegate.last_exposure_no
+
+        hdul = fits.open(filename)
+        assert hdul[-1].header["CCDTEMP1"] == -110
+
+    assert not glob.glob(os.path.join(dirname, "*.part"))
+
+
+def test_rice_gzip_template(actor: SCPActor, monkeypatch):
+    from lvmscp.delegate import LVMExposeDelegate
+
+    monkeypatch.setitem(actor.config["files"], "compression", "rice")
+
+    with pytest.raises(ValueError):
+        LVMExposeDelegate(actor)
+
+
+async def test_delegate_exposure_progress(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+    monkeypatch,
+):
+    monkeypatch.setitem(actor.config, "exposure_progress", {"cadence": 0.05})
+
+    actor.mock_replies.clear()
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.2,
+        readout=True,
+    )
+    assert result
+
+    # Replies are published asynchronously.
+    await asyncio.sleep(0.05)
+
+    progress = [
+        reply["exposure_progress"]
+        for reply in actor.mock_replies
+        if "exposure_progress" in reply
+    ]
+    phases = [message["phase"] for message in progress]
+
+    assert phases.count("integrating") >= 3
+    assert phases.index("reading") < phases.index("writing")
+    assert phases[-1] == "done"
+    assert progress[-1]["percent"] == 100
+    assert progress[-1]["exposure_no"] > 0
+
+    percents = [message["percent"] for message in progress]
+    assert percents == sorted(percents)
+
+    assert delegate.get_progress() is None
+
+
+async def test_delegate_exposure_progress_failed(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+    mocker,
+):
+    mocker.patch.object(delegate, "move_shutter", return_value=False)
+
+    actor.mock_replies.clear()
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.1,
+        readout=True,
+    )
+    assert not result
+
+    await asyncio.sleep(0.05)
+
+    progress = [
+        reply["exposure_progress"]
+        for reply in actor.mock_replies
+        if "exposure_progress" in reply
+    ]
+    assert progress[-1]["phase"] == "failed"
+
+
+async def test_delegate_readout_started(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+):
+    actor.mock_replies.clear()
+
+    result = await delegate.expose(
+        command,
+        [actor.controllers["sp1"]],
+        flavour="arc",
+        exposure_time=0.01,
+        readout=True,
+    )
+    assert result
+
+    await asyncio.sleep(0.05)
+
+    replies = [reply for reply in actor.mock_replies if "readout_started" in reply]
+    assert len(replies) == 1
+    assert replies[0]["readout_started"]["exposure_no"] > 0
+
+
+@pytest.mark.parametrize(
+    "mode,autoflush,age,flushed",
+    [
+        ("auto", None, None, True),
+        ("auto", True, None, False),
+        ("auto", False, 10, False),
+        ("auto", False, 100, True),
+        ("always", True, 10, True),
+        ("never", None, None, False),
+    ],
+)
+async def test_delegate_pre_flush(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    monkeypatch,
+    mocker,
+    mode: str,
+    autoflush: bool | None,
+    age: float | None,
+    flushed: bool,
+):
+    actor = delegate.actor
+    controller = actor.controllers["sp1"]
+
+    monkeypatch.setitem(actor.config, "pre_flush", {"mode": mode, "window": 60})
+    flush = mocker.patch.object(controller, "flush")
+
+    controller.auto_flush = autoflush
+    if age is not None:
+        controller.last_cleared = time.time() - age
+        controller.last_cleared_by = "readout"
+
+    result = await delegate.expose(
+        command,
+        [controller],
+        flavour="bias",
+        exposure_time=0.0,
+        readout=True,
+    )
+    assert result
+
+    assert flush.called is flushed
+
+    outcome = "flushed" if flushed else "skipped"
+    assert actor.metrics.pre_flushes.get(controller="sp1", outcome=outcome) == 1
+
+    assert actor.model
+    header = fits.getheader(actor.model["filenames"].value[0])
+    assert header["PREFLUSH"] is flushed
+    if age is None:
+        assert header["CLEARAGE"] is None
+    else:
+        assert header["CLEARAGE"] == pytest.approx(age, abs=1)
+        assert header["CLEARBY"] == "readout"
+
+
+async def test_controller_flush_state(actor: SCPActor, mocker):
+    controller = actor.controllers["sp1"]
+
+    assert controller.get_flush_state() == {
+        "autoflush": None,
+        "since_cleared": None,
+        "cleared_by": None,
+    }
+
+    mocker.patch.object(controller, "set_param")
+    mocker.patch("archon.controller.ArchonController.flush")
+    mocker.patch("archon.controller.ArchonController.readout", return_value=1)
+
+    await controller.flush(count=1)
+    assert controller.get_flush_state()["cleared_by"] == "flush"
+
+    # Non-blocking readouts do not clear the detector when they return.
+    await controller.readout(block=False)
+    assert controller.get_flush_state()["cleared_by"] == "flush"
+
+    assert await controller.readout() == 1
+    await controller.set_autoflush(True)
+
+    state = controller.get_flush_state()
+    assert state["autoflush"] is True
+    assert state["since_cleared"] == 0
+    assert state["cleared_by"] == "readout"
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_exposure_queue.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import pathlib
+
+from typing import TYPE_CHECKING
+
+import pytest
+from lvmscp.exposure_queue import DELEGATE_LOCKED_ERROR, ExposureQueue
+
+from clu import Command, Reply
+
+from .conftest import send_command_handler
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+async def wait_for_jobs(exposure_queue: ExposureQueue, timeout: float = 5):
+    """Waits until all the jobs have finished."""
+
+    async def _wait():
+        while any(job.active for job in exposure_queue.jobs):
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(_wait(), timeout)
+
+
+async def test_queue_order(actor: SCPActor):
+    exposure_queue = actor.exposure_queue
+
+    job1 = exposure_queue.submit("--bias")
+    job2 = exposure_queue.submit("--arc 10", priority=5)
+    job3 = exposure_queue.submit("--dark 5")
+
+    assert [job.job_id for job in exposure_queue.queued] == [2, 1, 3]
+    assert (job1.job_id, job2.job_id, job3.job_id) == (1, 2, 3)
+
+    exposure_queue.set_priority(3, 10)
+    exposure_queue.cancel(1)
+
+    assert [job.job_id for job in exposure_queue.queued] == [3, 2]
+    assert job1.status == "cancelled"
+
+    with pytest.raises(ValueError):
+        exposure_queue.cancel(1)
+
+    with pytest.raises(KeyError):
+        exposure_queue.set_priority(10, 1)
+
+    await asyncio.sleep(0.05)
+    assert actor.mock_replies[-1]["exposure_queue_job"]["job_id"] == 1
+
+
+async def test_queue_history(actor: SCPActor):
+    exposure_queue = ExposureQueue(actor, history=2)
+
+    for _ in range(4):
+        exposure_queue.cancel(exposure_queue.submit("--bias").job_id)
+
+    assert [job.job_id for job in exposure_queue.jobs] == [3, 4]
+
+
+async def test_queue_persistence(actor: SCPActor, tmp_path: pathlib.Path):
+    path = tmp_path / "queue.json"
+
+    exposure_queue = ExposureQueue(actor, path=path)
+    exposure_queue.submit("--bias")
+    exposure_queue.submit("--arc 10", priority=1)
+    exposure_queue.pause()
+
+    # Simulate a crash while the first job is running.
+    exposure_queue.jobs[0].status = "running"
+    exposure_queue.save()
+
+    assert json.loads(path.read_text())["next_id"] == 3
+
+    new_queue = ExposureQueue(actor, path=path)
+    new_queue.load()
+
+    assert new_queue.paused
+    assert new_queue.jobs[0].status == "failed"
+    assert new_queue.jobs[0].error is not None
+    assert [job.job_id for job in new_queue.queued] == [2]
+    assert new_queue.submit("--bias").job_id == 3
+
+
+async def test_queue_runner(actor: SCPActor, mocker):
+    exposure_queue = actor.exposure_queue
+
+    executed: list[str] = []
+
+    async def execute(job):
+        executed.append(job.command_string)
+
+        command = Command(job.command_string, actor=actor)
+        command.replies.append(Reply("i", {"filenames": [f"{job.job_id}.fits"]}))
+        if "fail" in job.command_string:
+            command.fail(error="Expose failed.")
+        else:
+            command.finish()
+
+        return command
+
+    mocker.patch.object(exposure_queue, "execute", side_effect=execute)
+
+    # Hold the delegate so that the jobs are queued before the runner starts them.
+    lock = actor.exposure_delegate.lock
+    await lock.acquire()
+
+    exposure_queue.start()
+
+    exposure_queue.submit("--bias")
+    exposure_queue.submit("--fail", priority=1)
+    exposure_queue.submit("--arc 10", priority=2)
+
+    await asyncio.sleep(0.05)
+    assert executed == []
+
+    lock.release()
+    await wait_for_jobs(exposure_queue)
+
+    assert executed == ["--arc 10", "--fail", "--bias"]
+
+    job = exposure_queue.get_job(3)
+    assert job.status == "done"
+    assert job.filenames == ["3.fits"]
+
+    failed = exposure_queue.get_job(2)
+    assert failed.status == "failed"
+    assert failed.error == "Expose failed."
+
+    # A paused queue does not start jobs.
+    exposure_queue.pause()
+    exposure_queue.submit("--bias")
+    await asyncio.sleep(0.05)
+    assert len(executed) == 3
+
+    exposure_queue.pause(False)
+    await wait_for_jobs(exposure_queue)
+    assert len(executed) == 4
+
+    await exposure_queue.stop()
+
+
+async def test_queue_runner_delegate_taken(actor: SCPActor, mocker):
+    exposure_queue = actor.exposure_queue
+    lock = actor.exposure_delegate.lock
+
+    executed: list[bool] = []
+
+    async def execute(job):
+        command = Command(job.command_string, actor=actor)
+
+        # The first time, a client exposure takes the delegate before the job.
+        if len(executed) == 0:
+            await lock.acquire()
+            asyncio.get_running_loop().call_later(0.1, lock.release)
+            command.fail(error=DELEGATE_LOCKED_ERROR)
+        else:
+            command.finish()
+
+        executed.append(lock.locked())
+
+        return command
+
+    mocker.patch.object(exposure_queue, "execute", side_effect=execute)
+
+    exposure_queue.start()
+    job = exposure_queue.submit("--bias")
+
+    await wait_for_jobs(exposure_queue)
+
+    # The job was queued again and run once the client exposure finished.
+    assert executed == [True, False]
+    assert job.status == "done"
+    assert job.error is None
+
+    await exposure_queue.stop()
+
+
+async def test_queue_expose(
+    delegate: LVMExposeDelegate,
+    actor: SCPActor,
+    mocker,
+):
+    mocker.patch.object(actor.controllers["sp1"], "is_connected", return_value=True)
+    mocker.patch.object(actor, "send_command", side_effect=send_command_handler)
+
+    exposure_queue = actor.exposure_queue.start()
+
+    job = exposure_queue.submit("-c sp1 --bias")
+    await wait_for_jobs(exposure_queue)
+
+    assert job.status == "done"
+    assert len(job.filenames) == 3
+    assert all(os.path.exists(filename) for filename in job.filenames)
+
+    await exposure_queue.stop()
+
+
+async def test_command_queue(actor: SCPActor):
+    command = await actor.invoke_mock_command("queue submit -p 2 -c sp1 --arc 10")
+    await command
+
+    assert command.status.did_succeed
+    job = actor.mock_replies[-1]["exposure_queue_job"]
+    assert job["priority"] == 2
+    assert job["command_string"] == "-c sp1 --arc 10"
+
+    command = await actor.invoke_mock_command("queue submit --bad-option")
+    await command
+    assert command.status.did_fail
+
+    command = await actor.invoke_mock_command(f"queue priority {job['job_id']} 5")
+    await command
+    assert command.status.did_succeed
+    assert actor.mock_replies[-1]["exposure_queue"]["jobs"][0]["priority"] == 5
+
+    command = await actor.invoke_mock_command("queue cancel --all")
+    await command
+    assert command.status.did_succeed
+
+    command = await actor.invoke_mock_command("queue list")
+    await command
+    assert actor.mock_replies[-1]["exposure_queue"]["queued"] == []
+
+    command = await actor.invoke_mock_command(f"queue cancel {job['job_id']}")
+    await command
+    assert command.status.did_fail
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_fast_abort.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+
+from archon.controller import ControllerStatus
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+async def start_exposure(delegate: LVMExposeDelegate, command: Command[SCPActor]):
+    controller = delegate.actor.controllers["sp1"]
+
+    task = delegate.set_task(
+        delegate.expose(command, [controller], flavour="object", exposure_time=60)
+    )
+    await asyncio.sleep(0.1)
+
+    controller.update_status(ControllerStatus.EXPOSING)
+
+    return task
+
+
+async def test_fast_abort(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    mocker,
+):
+    actor = delegate.actor
+    controller = actor.controllers["sp1"]
+
+    move_shutter = mocker.patch.object(delegate, "move_shutter", return_value=True)
+    abort = mocker.patch.object(controller, "abort")
+    flush = mocker.patch.object(controller, "flush")
+
+    task = await start_exposure(delegate, command)
+    cotasks = delegate._expose_cotasks
+
+    result = await delegate.fast_abort(command, flush=True)
+
+    assert result["shutters_closed"] is True
+    assert result["flushed"] is True
+    assert result["latency"] < 1
+
+    assert task.cancelled()
+    assert cotasks is None or cotasks.done()
+
+    move_shutter.assert_called_with("sp1", "close")
+    abort.assert_called_once_with(readout=False)
+    flush.assert_called_once_with(count=1)
+
+    assert command.status.did_fail
+    assert not delegate.lock.locked()
+    assert delegate.expose_data is None
+
+    assert actor.metrics.exposures.get(flavour="object", outcome="aborted") == 1
+    assert actor.metrics.abort_seconds.get_count(flushed="true") == 1
+
+
+async def test_fast_abort_shutter_fails(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    mocker,
+):
+    actor = delegate.actor
+    controller = actor.controllers["sp1"]
+
+    move_shutter = mocker.patch.object(delegate, "move_shutter", return_value=True)
+    mocker.patch.object(controller, "abort")
+
+    await start_exposure(delegate, command)
+
+    # The shutter fails to close and is not retried.
+    move_shutter.reset_mock()
+    move_shutter.return_value = False
+
+    abort_command = await actor.invoke_mock_command("fast-abort")
+    await abort_command
+
+    assert abort_command.status.did_fail
+    assert move_shutter.call_count == 1
+
+    result = abort_command.replies[-1].message["fast_abort"]
+    assert result["shutters_closed"] is False
+    assert result["flushed"] is False
+
+    assert actor.metrics.shutter_failures.get(controller="sp1", action="close") == 1
+    assert not delegate.lock.locked()
+
+
+async def test_fast_abort_readout(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    mocker,
+):
+    actor = delegate.actor
+    controller = actor.controllers["sp1"]
+
+    mocker.patch.object(delegate, "move_shutter", return_value=True)
+    abort = mocker.patch.object(controller, "abort")
+    # Records whether the delegate was still locked when the controller was reset.
+    locked: list[bool] = []
+    reset = mocker.patch.object(
+        controller,
+        "reset",
+        side_effect=lambda **_: locked.append(delegate.lock.locked()),
+    )
+
+    await start_exposure(delegate, command)
+
+    # The integration is done and the controller is reading out.
+    controller.update_status(ControllerStatus.EXPOSING, "off", notify=False)
+    controller.update_status(ControllerStatus.READING)
+
+    abort_command = await actor.invoke_mock_command("fast-abort")
+    await abort_command
+
+    assert abort_command.status.did_succeed
+
+    # The controller is reset instead of aborted, and autoflush is turned back on.
+    abort.assert_not_called()
+    reset.assert_called_once_with(autoflush=True)
+    assert locked == [True]
+
+    assert command.status.did_fail
+    assert not delegate.lock.locked()
+
+
+async def test_fast_abort_not_exposing(actor: SCPActor):
+    command = await actor.invoke_mock_command("fast-abort")
+    await command
+
+    assert command.status.did_fail
+    assert actor.mock_replies[-1]["error"] == "No exposure is running."
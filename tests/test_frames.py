@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_frames.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+
+from typing import TYPE_CHECKING
+
+import numpy
+import pytest
+from astropy.io import fits
+from lvmscp.frames import FrameRing
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+@pytest.fixture()
+def frame_ring(actor: SCPActor):
+    ring = FrameRing()
+
+    actor.frame_ring = ring
+    actor.metrics.frame_ring_in_use.callback = lambda: ring.in_use
+
+    yield ring
+
+    actor.frame_ring = None
+
+
+def test_frame_ring_store_release():
+    ring = FrameRing(n_slots=2)
+
+    data = numpy.arange(100, dtype=numpy.uint16).reshape(10, 10)
+    view = ring.store("b1.fits", data)
+
+    assert view is not data
+    assert numpy.array_equal(view, data)
+    assert ring.slot_size == data.nbytes
+    assert ring.in_use == 1
+
+    # Smaller frames fit in a slot.
+    small = ring.store("r1.fits", data[:5, :5])
+    assert small.shape == (5, 5)
+    assert ring.in_use == 2
+
+    # The ring is full.
+    overflow = ring.store("z1.fits", data)
+    assert overflow is data
+    assert ring.overflows == 1
+
+    ring.release("b1.fits")
+    assert ring.in_use == 1
+
+    # The released slot is reused and the buffers are not reallocated.
+    slots = ring.slots
+    ring.store("z1.fits", data * 2)
+    assert ring.slots is slots
+    assert [filename for filename, _ in ring.pending()] == ["z1.fits", "r1.fits"]
+
+
+def test_frame_ring_too_large():
+    ring = FrameRing(n_slots=2, slot_size=100)
+
+    data = numpy.ones((10, 10), dtype=numpy.uint16)
+    assert ring.store("b1.fits", data) is data
+    assert ring.overflows == 1
+    assert ring.in_use == 0
+
+
+def test_frame_ring_windowed_then_full():
+    full = numpy.ones((40, 60), dtype=numpy.uint16)
+    windowed = numpy.ones((10, 60), dtype=numpy.uint16)
+
+    # Reserved with the size of the full frame before the first frame is stored.
+    ring = FrameRing(n_slots=2)
+    ring.reserve(full.nbytes)
+
+    assert ring.store("b1.fits", windowed) is not windowed
+    assert ring.store("r1.fits", full) is not full
+    assert ring.overflows == 0
+
+    # Slots already sized from a windowed frame grow once they are free.
+    ring = FrameRing(n_slots=2)
+    ring.store("b1.fits", windowed)
+    assert ring.slot_size == windowed.nbytes
+
+    ring.reserve(full.nbytes)
+    assert ring.slot_size == windowed.nbytes
+
+    ring.release("b1.fits")
+    ring.reserve(full.nbytes)
+    assert ring.slot_size == full.nbytes
+
+    assert ring.store("r1.fits", full) is not full
+    assert ring.overflows == 0
+
+    # An explicit slot size is not changed.
+    ring = FrameRing(n_slots=2, slot_size=windowed.nbytes)
+    ring.reserve(full.nbytes)
+    assert ring.slot_size == windowed.nbytes
+
+
+def test_frame_ring_invalid():
+    with pytest.raises(ValueError):
+        FrameRing(n_slots=0)
+
+
+def test_frame_ring_persistent(tmp_path: pathlib.Path):
+    ring = FrameRing(n_slots=3, directory=tmp_path / "ring")
+    assert ring.persistent
+
+    data = numpy.random.randint(0, 65535, (20, 30)).astype(numpy.uint16)
+    ring.store("b1.fits", data)
+    ring.store("r1.fits", data + 1)
+    ring.release("b1.fits")
+
+    assert (tmp_path / "ring" / "slot0.dat").exists()
+    assert not (tmp_path / "ring" / "slot0.json").exists()
+    assert (tmp_path / "ring" / "slot1.json").exists()
+
+    # A new ring (e.g., after a crash) finds the frame not released.
+    del ring
+    new_ring = FrameRing(n_slots=3, directory=tmp_path / "ring")
+
+    assert new_ring.slot_size == data.nbytes
+    pending = new_ring.pending()
+    assert len(pending) == 1
+    assert pending[0][0] == "r1.fits"
+    assert numpy.array_equal(pending[0][1], data + 1)
+
+
+async def test_delegate_frame_ring(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    frame_ring: FrameRing,
+    mocker,
+):
+    ring = frame_ring
+
+    store = mocker.spy(ring, "store")
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="bias",
+        exposure_time=0.0,
+        readout=True,
+    )
+
+    assert result
+    assert store.call_count == 3
+    assert ring.in_use == 0
+    assert ring.overflows == 0
+    assert "lvmscp_frame_ring_slots_in_use 0" in delegate.actor.metrics.render()
+
+
+async def test_delegate_frame_ring_full_frame(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    frame_ring: FrameRing,
+    monkeypatch,
+):
+    ring = frame_ring
+
+    controller = delegate.actor.controllers["sp1"]
+    default_window = {
+        "lines": 40,
+        "pixels": 60,
+        "overscanlines": 0,
+        "overscanpixels": 10,
+        "preskiplines": 0,
+        "postskiplines": 0,
+        "preskippixels": 0,
+        "postskippixels": 0,
+    }
+    monkeypatch.setattr(controller, "default_window", default_window)
+
+    # The fetched frames (100x100) are smaller than the full frame (80x140).
+    result = await delegate.expose(
+        command,
+        [controller],
+        flavour="bias",
+        exposure_time=0.0,
+        readout=True,
+    )
+
+    assert result
+    assert ring.slot_size == 80 * 140 * 8
+
+
+async def test_delegate_frame_ring_failed_write(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    tmp_path: pathlib.Path,
+    mocker,
+):
+    ring = FrameRing(n_slots=3, directory=tmp_path / "ring")
+    delegate.actor.frame_ring = ring
+
+    mocker.patch.object(delegate, "_write_ccd_data", side_effect=OSError("Disk full"))
+
+    # Each exposure fills all the slots, so a leaked slot would overflow the next one.
+    for _ in range(2):
+        await delegate.expose(
+            command,
+            [delegate.actor.controllers["sp1"]],
+            flavour="bias",
+            exposure_time=0.0,
+            readout=True,
+        )
+
+        assert ring.in_use == 0
+
+    assert ring.overflows == 0
+    assert ring.pending() == []
+
+    delegate.actor.frame_ring = None
+
+
+async def test_recover_frame_ring(actor: SCPActor, tmp_path: pathlib.Path):
+    ring = FrameRing(n_slots=3, directory=tmp_path / "ring")
+    actor.frame_ring = ring
+
+    filename = str(tmp_path / "data" / "sdR-s-b1-00000010.fits.gz")
+    data = numpy.full((50, 40), 7, dtype=numpy.uint16)
+    ring.store(filename, data)
+    ring.store(str(tmp_path / "data" / "sdR-s-r1-00000010.fits.gz"), data)
+
+    # Only the first frame has a lock file.
+    lock_path = actor.exposure_recovery._get_path(filename)
+    lock_path.parent.mkdir(parents=True)
+    with open(lock_path, "w") as fd:
+        json.dump(
+            {
+                "controller": "sp1",
+                "buffer": 1,
+                "ccd": "b1",
+                "exposure_no": 10,
+                "filename": filename,
+                "header": {
+                    "FILENAME": ["", "File basename"],
+                    "EXPOSURE": [0, "Exposure number"],
+                },
+            },
+            fd,
+        )
+
+    recovered = await actor.recover_frame_ring()
+
+    assert recovered == [filename]
+    assert os.path.exists(filename)
+    assert not lock_path.exists()
+    assert ring.in_use == 0
+
+    hdu = fits.open(filename)
+    assert numpy.array_equal(hdu[0].data, data)
+    assert hdu[0].header["EXPOSURE"] == 10
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_header_sources.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+
+import pytest
+from astropy.io import fits
+from lvmscp import config
+from lvmscp.header_sources import (
+    HeaderSourceReply,
+    get_header_values,
+    load_header_sources,
+    resolve_path,
+)
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+def test_load_header_sources():
+    sources = load_header_sources(config["header_sources"], config)
+
+    names = [source.name for source in sources]
+    assert "telescope_pwi[skye]" in names
+    assert "lamps" in names
+
+    lamps = sources[names.index("lamps")]
+    assert [key.key for key in lamps.keys] == [lamp.upper() for lamp in config["lamps"]]
+    assert lamps.keys[0].context == {"lamp": "Argon", "LAMP": "ARGON"}
+
+    telescopes = [source for source in sources if source.group == "telescopes"]
+    assert len(telescopes) == 11
+
+    pwi = sources[names.index("telescope_pwi[skye]")]
+    assert pwi.format(pwi.actor) == "lvm.skye.pwi"
+    assert [key.key for key in pwi.keys] == ["TESKYERA", "TESKYEDE", "TESKYEAM"]
+
+
+def test_resolve_path():
+    message = {"a": {"b": [1, {"c": 2}]}}
+
+    assert resolve_path(message, "a.b.1.c") == 2
+
+    with pytest.raises(KeyError):
+        resolve_path(message, "a.d")
+
+
+def test_get_header_values():
+    sources = load_header_sources(
+        {
+            "pwi": {
+                "actor": "lvm.sci.pwi",
+                "command": "status",
+                "keys": {
+                    "RA": {"path": "ra", "transform": "hours_to_degrees", "round": 1},
+                    "AIRMASS": {"path": "alt", "transform": "airmass", "round": 3},
+                    "MISSING": "not_there",
+                },
+            },
+            "depth": {
+                "actor": "lvmieb",
+                "command": "depth status",
+                "priority": 1,
+                "keys": {
+                    "DEPTHA": {"path": "depth.A", "ccd_from": "depth.camera"},
+                    "PRESSURE": {"path": "p.{ccd}", "comment": "Pressure"},
+                    "RA": "ra",
+                },
+            },
+        }
+    )
+
+    replies = [
+        HeaderSourceReply("depth", {}, {"depth": {"camera": "b1", "A": 1.5}}),
+        HeaderSourceReply("pwi", {}, {"ra": 1.0, "alt": 60.0}),
+    ]
+    replies[0].message.update({"p": {"b1": 1e-6, "r1": 2e-6}, "ra": 0.5})
+
+    b1 = get_header_values(sources, replies, ccd="b1")
+    assert b1["DEPTHA"] == (1.5, "")
+    assert b1["PRESSURE"] == (1e-6, "Pressure")
+    assert b1["AIRMASS"][0] == pytest.approx(1.155)
+    assert "MISSING" not in b1
+
+    # The source with higher priority takes precedence.
+    assert b1["RA"][0] == 0.5
+
+    r1 = get_header_values(sources, replies, ccd="r1")
+    assert "DEPTHA" not in r1
+    assert r1["PRESSURE"][0] == 2e-6
+
+
+async def test_header_sources_exposure(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+):
+    sent: list[tuple[str, str]] = []
+
+    async def send_command(actor: str, command_string: str, **kwargs):
+        sent.append((actor, command_string))
+        return await command_handler(actor, command_string, **kwargs)
+
+    command_handler = command.send_command
+    command.send_command = send_command  # type: ignore
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+        readout=True,
+    )
+    assert result
+
+    # All the lamps are read from a single status command.
+    assert sent.count(("lvmnps", "status")) == 1
+
+    assert delegate.actor.model
+    filenames = delegate.actor.model["filenames"].value
+
+    headers = {}
+    for filename in filenames:
+        header = fits.getheader(filename)
+        headers[header["CCD"]] = header
+
+    assert headers["b1"]["HARTMANN"] == "0 0"
+    assert headers["b1"]["LABTEMP"] == 12.5
+    assert headers["r1"]["PRESSURE"] == 1e-6
+    assert headers["b1"]["DEPTHA"] == 1.1
+    assert headers["r1"]["DEPTHA"] is None
+    assert headers["z1"]["ARGON"] == "ON"
+    assert headers["z1"]["NEON"] == "OFF"
+
+
+async def test_header_source_timeout(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    monkeypatch,
+):
+    sources = delegate.actor.config["header_sources"]
+    monkeypatch.setitem(sources, "sensors", {**sources["sensors"], "timeout": 0.1})
+
+    async def send_command(actor: str, command_string: str, **kwargs):
+        if "wago" in command_string:
+            await asyncio.sleep(1)
+        return await command_handler(actor, command_string, **kwargs)
+
+    command_handler = command.send_command
+    command.send_command = send_command  # type: ignore
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+        readout=True,
+    )
+    assert result
+
+    assert delegate.actor.model
+    header = fits.getheader(delegate.actor.model["filenames"].value[0])
+    assert header["LABTEMP"] is None
+    assert header["HARTMANN"] == "0 0"
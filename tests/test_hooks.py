@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_hooks.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import pathlib
+import sys
+
+from typing import TYPE_CHECKING
+
+import pytest
+from lvmscp.hooks import (
+    CommandHook,
+    CopyHook,
+    PostWriteHook,
+    PostWritePipeline,
+    SocketHook,
+    get_file_context,
+    load_hooks,
+)
+from lvmscp.metrics import SCPMetrics
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+@pytest.fixture()
+def image(tmp_path: pathlib.Path):
+    path = tmp_path / "data" / "60500" / "sdR-s-b1-00000010.fits.gz"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"image data")
+
+    yield get_file_context(str(path), exposure_no=10, ccd="b1")
+
+
+def test_load_hooks():
+    hooks = load_hooks(
+        [
+            {"type": "copy", "destination": "/data/{mjd}"},
+            {"type": "command", "name": "notify", "command": "echo {filename}"},
+            {"type": "socket", "path": "/tmp/lvm.sock", "retries": 0},
+        ]
+    )
+
+    assert [type(hook) for hook in hooks] == [CopyHook, CommandHook, SocketHook]
+    assert [hook.name for hook in hooks] == ["copy", "notify", "socket"]
+    assert hooks[2].retries == 0
+
+    with pytest.raises(ValueError):
+        load_hooks([{"type": "ftp"}])
+
+
+async def test_copy_hook(image, tmp_path: pathlib.Path):
+    hook = CopyHook("transfer", destination=str(tmp_path / "transfer" / "{mjd}"))
+    await hook.run(image)
+
+    copy = tmp_path / "transfer" / "60500" / image["basename"]
+    assert copy.read_bytes() == b"image data"
+    assert not os.path.exists(str(copy) + ".part")
+
+
+async def test_command_hook(image, tmp_path: pathlib.Path):
+    output = tmp_path / "notified.txt"
+
+    script = f"import sys; open({str(output)!r}, 'w').write(sys.argv[1])"
+    hook = CommandHook("notify", command=f"{sys.executable} -c {script!r} {{ccd}}")
+    await hook.run(image)
+
+    assert output.read_text() == "b1"
+
+    failing = CommandHook("fail", command=f"{sys.executable} -c 'exit(3)'")
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        await failing.run(image)
+
+
+async def test_socket_hook(image, tmp_path: pathlib.Path):
+    received: list[dict] = []
+
+    async def handle(reader, writer):
+        received.append(json.loads(await reader.readline()))
+        writer.close()
+
+    path = str(tmp_path / "lvm.sock")
+    server = await asyncio.start_unix_server(handle, path)
+
+    async with server:
+        await SocketHook("dashboard", path=path).run(image)
+        await asyncio.sleep(0.05)
+
+    assert received == [image]
+
+
+async def test_pipeline(image, tmp_path: pathlib.Path):
+    metrics = SCPMetrics()
+
+    calls: list[str] = []
+
+    class FlakyHook(CopyHook):
+        async def run(self, context):
+            calls.append(self.name)
+            if len(calls) < 3:
+                raise OSError("Disk not mounted.")
+            await super().run(context)
+
+    hooks = [
+        FlakyHook("flaky", destination=str(tmp_path / "transfer"), retry_delay=0),
+        CommandHook("broken", command="/nonexistent/command", retries=1, retry_delay=0),
+        CopyHook("backup", destination=str(tmp_path / "backup")),
+    ]
+
+    pipeline = PostWritePipeline(hooks, workers=1, metrics=metrics)
+    assert pipeline.submit(image)
+
+    await asyncio.wait_for(pipeline.join(), 5)
+
+    # The first hook succeeded on the last retry, and the failure of the second
+    # hook did not prevent the third from running.
+    assert calls == ["flaky", "flaky", "flaky"]
+    assert (tmp_path / "transfer" / image["basename"]).exists()
+    assert (tmp_path / "backup" / image["basename"]).exists()
+
+    assert metrics.post_write_failures.get(hook="flaky") == 2
+    assert metrics.post_write_failures.get(hook="broken") == 2
+    assert metrics.post_write_seconds.get_count(hook="backup") == 1
+
+    await pipeline.stop()
+
+
+async def test_pipeline_timeout_and_overflow(image):
+    hook = CommandHook("slow", command="sleep 10", timeout=0.1, retries=0)
+
+    pipeline = PostWritePipeline([hook], workers=1, max_size=1)
+
+    # The first file is taken by the worker, the second waits, and the third is
+    # dropped without blocking.
+    assert pipeline.submit(image)
+    await asyncio.sleep(0)
+    assert pipeline.submit(image)
+    assert not pipeline.submit(image)
+    assert pipeline.dropped == 1
+
+    await asyncio.wait_for(pipeline.join(), 5)
+    await pipeline.stop()
+
+
+async def test_delegate_post_write(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    tmp_path: pathlib.Path,
+):
+    actor = delegate.actor
+    actor.post_write = PostWritePipeline.from_config(
+        {"hooks": [{"type": "copy", "destination": str(tmp_path / "transfer")}]},
+        metrics=actor.metrics,
+    )
+
+    result = await delegate.expose(
+        command,
+        [actor.controllers["sp1"]],
+        flavour="bias",
+        exposure_time=0.0,
+        readout=True,
+    )
+    assert result
+
+    await asyncio.wait_for(actor.post_write.join(), 5)
+
+    filenames = actor.model["filenames"].value
+    assert len(filenames) == 3
+    for filename in filenames:
+        assert (tmp_path / "transfer" / os.path.basename(filename)).exists()
+
+    assert actor.metrics.post_write_seconds.get_count(hook="copy") == 3
+
+
+def test_post_write_hook_abstract():
+    with pytest.raises(TypeError):
+        PostWriteHook(name="base")  # type: ignore[abstract]
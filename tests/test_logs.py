@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_logs.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import logging
+import pathlib
+import uuid
+
+import pytest
+from lvmscp.logs import BatchingQueueHandler
+
+
+@pytest.fixture()
+def log_and_handler(tmp_path: pathlib.Path):
+    log = logging.getLogger(f"test-logs-{uuid.uuid4().hex}")
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+
+    path = tmp_path / "test.log"
+    handler = logging.FileHandler(str(path))
+    handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+    log.addHandler(handler)
+
+    yield log, handler, path
+
+    handler.close()
+
+
+def test_queue_handler_writes(log_and_handler):
+    log, handler, path = log_and_handler
+
+    queue_handler = BatchingQueueHandler.install(log, [handler], batch_size=10)
+    assert handler not in log.handlers
+
+    for nn in range(100):
+        log.info(f"Record {nn}")
+
+    queue_handler.uninstall(log)
+
+    assert handler in log.handlers
+    assert queue_handler not in log.handlers
+    assert queue_handler.written == 100
+    assert queue_handler.dropped == 0
+
+    lines = path.read_text().splitlines()
+    assert lines == [f"INFO - Record {nn}" for nn in range(100)]
+
+
+def test_queue_handler_drops(log_and_handler):
+    log, handler, path = log_and_handler
+
+    # Do not start the thread so that the queue fills up.
+    queue_handler = BatchingQueueHandler([handler], max_size=5)
+    log.removeHandler(handler)
+    log.addHandler(queue_handler)
+
+    for nn in range(8):
+        log.info(f"Record {nn}")
+
+    assert queue_handler.dropped == 3
+
+    queue_handler.uninstall(log)
+
+    assert len(path.read_text().splitlines()) == 5
+
+
+def test_queue_handler_level(log_and_handler):
+    log, handler, path = log_and_handler
+    handler.setLevel(logging.WARNING)
+
+    queue_handler = BatchingQueueHandler.install(log, [handler])
+
+    log.debug("Debug record")
+    log.warning("Warning record")
+
+    queue_handler.uninstall(log)
+
+    assert path.read_text().splitlines() == ["WARNING - Warning record"]
+
+
+def test_queue_handler_exc_info(log_and_handler):
+    log, handler, path = log_and_handler
+
+    queue_handler = BatchingQueueHandler.install(log, [handler])
+
+    try:
+        raise ValueError("Something went wrong.")
+    except ValueError:
+        log.exception("Failed.")
+
+    queue_handler.uninstall(log)
+
+    text = path.read_text()
+    assert "ERROR - Failed." in text
+    assert "ValueError: Something went wrong." in text
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_masters.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+
+from typing import TYPE_CHECKING
+
+import numpy
+import pytest
+from astropy.io import fits
+from lvmscp.masters import MasterLibrary, combine_stack, parse_section, update_master
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+SECTIONS = {
+    "TRIMSEC1": "[1:100, 101:200]",
+    "TRIMSEC2": "[109:208, 101:200]",
+    "TRIMSEC3": "[1:100, 1:100]",
+    "TRIMSEC4": "[109:208, 1:100]",
+    "BIASSEC1": "[101:104, 101:200]",
+    "BIASSEC2": "[105:108, 101:200]",
+    "BIASSEC3": "[101:104, 1:100]",
+    "BIASSEC4": "[105:108, 1:100]",
+}
+
+LEVELS = [1000, 1010, 1020, 1030]
+
+
+def write_frame(
+    path: pathlib.Path,
+    name: str,
+    flavour: str = "bias",
+    exptime: float = 0.0,
+    noise: float = 3.0,
+    dark_rate: float = 0.0,
+    shape: tuple[int, int] = (200, 208),
+    seed: int = 0,
+):
+    rng = numpy.random.default_rng(seed)
+
+    data = rng.normal(0, noise, shape)
+    for quad, level in enumerate(LEVELS):
+        data[parse_section(SECTIONS[f"TRIMSEC{quad + 1}"])] += level
+        data[parse_section(SECTIONS[f"BIASSEC{quad + 1}"])] += level
+        data[parse_section(SECTIONS[f"TRIMSEC{quad + 1}"])] += dark_rate * exptime
+
+    header = fits.Header({"IMAGETYP": flavour, "EXPTIME": exptime, **SECTIONS})
+
+    filename = path / name
+    fits.PrimaryHDU(numpy.round(data).astype(numpy.uint16), header=header).writeto(
+        filename
+    )
+
+    return str(filename)
+
+
+def test_parse_section():
+    assert parse_section("[2078:4120, 1:2040]") == (slice(0, 2040), slice(2077, 4120))
+
+    with pytest.raises(ValueError):
+        parse_section("2078:4120")
+
+
+@pytest.mark.parametrize("method", ["median", "mean"])
+def test_combine_stack(method: str):
+    rng = numpy.random.default_rng(1)
+
+    stack = rng.normal(100, 1, (7, 300, 20)).astype(numpy.float32)
+    stack[3, 10, 10] = 60000  # A cosmic ray
+
+    master = combine_stack(stack, method=method)
+
+    assert master.shape == (300, 20)
+    assert master[10, 10] == pytest.approx(100, abs=2)
+    assert numpy.median(master) == pytest.approx(100, abs=0.1)
+
+    with pytest.raises(ValueError):
+        combine_stack(stack, method="mode")
+
+
+def test_update_master(tmp_path: pathlib.Path):
+    library = str(tmp_path / "masters")
+
+    for ii in range(4):
+        filename = write_frame(tmp_path, f"bias{ii}.fits", seed=ii)
+        stats = update_master(library, "b1", "bias", filename, stack_size=3)
+
+    assert stats["skipped"] is None
+    assert stats["nframes"] == 3
+    assert stats["level"] == pytest.approx(LEVELS, abs=1)
+    assert stats["master_level"] == pytest.approx(LEVELS, abs=1)
+    assert stats["readnoise"] == pytest.approx([3.0] * 4, abs=0.3)
+
+    master = numpy.load(tmp_path / "masters" / "b1_bias.npy")
+    assert master.dtype == numpy.float32
+    assert master.shape == (200, 208)
+
+    # Windowed frames are not added to the stack.
+    filename = write_frame(tmp_path, "window.fits", shape=(100, 208))
+    stats = update_master(library, "b1", "bias", filename, stack_size=3)
+    assert stats["skipped"] is not None
+
+    # A stack started with a windowed frame is restarted with the first full frame.
+    windowed = str(tmp_path / "masters_windowed")
+    filename = write_frame(tmp_path, "window2.fits", shape=(100, 208))
+    assert update_master(windowed, "b1", "bias", filename)["nframes"] == 1
+
+    filename = write_frame(tmp_path, "full.fits")
+    stats = update_master(windowed, "b1", "bias", filename)
+    assert stats["skipped"] is None
+    assert stats["nframes"] == 1
+    assert numpy.load(tmp_path / "masters_windowed" / "b1_bias.npy").shape == (
+        200,
+        208,
+    )
+
+    # Darks are bias subtracted and divided by the exposure time.
+    filename = write_frame(tmp_path, "dark.fits", "dark", exptime=100, dark_rate=0.5)
+    stats = update_master(library, "b1", "dark", filename, stack_size=3)
+
+    assert stats["nframes"] == 1
+    assert stats["master_level"] == pytest.approx([0.5] * 4, abs=0.05)
+
+
+async def test_master_library(tmp_path: pathlib.Path):
+    detectors = {"b1": {"gain": [1.0] * 4, "readnoise": [3.0, 3.0, 3.0, 5.0]}}
+    library = MasterLibrary(str(tmp_path / "masters"), detectors=detectors)
+
+    assert library.get_master("b1") is None
+    assert library.get_drift("b1") is None
+
+    tasks = [
+        library.submit(write_frame(tmp_path, f"bias{ii}.fits", seed=ii), "b1", "bias")
+        for ii in range(3)
+    ]
+    assert library.submit(str(tmp_path / "arc.fits"), "b1", "arc") is None
+
+    results = await asyncio.gather(*tasks)
+    assert [result["nframes"] for result in results] == [1, 2, 3]
+
+    master = library.get_master("b1")
+    assert master is not None and master.shape == (200, 208)
+
+    drift = library.get_drift("b1")
+    assert drift is not None
+    assert drift["nframes"] == 3
+    assert drift["level_drift"] == pytest.approx([0] * 4, abs=1)
+    assert drift["readnoise_drift"][0] == pytest.approx(0, abs=0.3)
+    assert drift["readnoise_drift"][3] == pytest.approx(-2, abs=0.3)
+    assert drift["ok"] is False
+
+    await library.stop()
+
+
+async def test_command_masters(actor: SCPActor, tmp_path: pathlib.Path):
+    command = await actor.invoke_mock_command("masters")
+    await command
+    assert command.status.did_fail
+
+    actor.masters = MasterLibrary.from_config(
+        {"path": str(tmp_path / "{actor}")},
+        actor.config,
+    )
+    assert actor.masters.path == str(tmp_path / "lvmscp")
+
+    await actor.masters.update(write_frame(tmp_path, "bias.fits"), "b1", "bias")
+
+    command = await actor.invoke_mock_command("masters b1 r1")
+    await command
+
+    assert command.status.did_succeed
+
+    drift = [
+        reply["master_drift"] for reply in actor.mock_replies if "master_drift" in reply
+    ]
+    assert len(drift) == 1
+    assert drift[0]["ccd"] == "b1"
+    assert drift[0]["nframes"] == 1
+
+    await actor.masters.stop()
+
+
+async def test_delegate_masters(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    tmp_path: pathlib.Path,
+    monkeypatch,
+    mocker,
+):
+    actor = delegate.actor
+    actor.masters = MasterLibrary(str(tmp_path / "masters"))
+    submit = mocker.patch.object(actor.masters, "submit")
+
+    result = await delegate.expose(
+        command,
+        [actor.controllers["sp1"]],
+        flavour="bias",
+        exposure_time=0.0,
+        readout=True,
+    )
+    assert result
+
+    assert submit.call_count == 3
+    assert {call.args[2] for call in submit.call_args_list} == {"bias"}
+    assert {call.args[1] for call in submit.call_args_list} == {"r1", "b1", "z1"}
+
+    # Frames read with a window are not added.
+    submit.reset_mock()
+
+    controller = actor.controllers["sp1"]
+    monkeypatch.setattr(controller, "default_window", {"lines": 4080})
+    monkeypatch.setattr(controller, "current_window", {"lines": 400})
+
+    result = await delegate.expose(
+        command,
+        [controller],
+        flavour="bias",
+        exposure_time=0.0,
+        readout=True,
+    )
+    assert result
+
+    submit.assert_not_called()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_metrics.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+
+import pytest
+from lvmscp.metrics import (
+    Counter,
+    Histogram,
+    Metric,
+    MetricsRegistry,
+    MetricsServer,
+)
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+    from clu import Command
+
+
+def test_render():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("test_total", "A counter.", ["kind"]))
+    histogram = registry.register(Histogram("test_seconds", "A hist.", buckets=[1]))
+
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    histogram.observe(0.5)
+    histogram.observe(3)
+
+    text = registry.render()
+
+    assert "# TYPE test_total counter" in text
+    assert 'test_total{kind="a"} 3.0' in text
+    assert 'test_seconds_bucket{le="1.0"} 1' in text
+    assert 'test_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_seconds_count 2" in text
+
+
+def test_labels_required():
+    counter = Counter("test_total", "A counter.", ["kind"])
+
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+@pytest.mark.parametrize("flavour", ["bias", "object"])
+async def test_delegate_metrics(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    flavour: str,
+):
+    metrics = delegate.metrics
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour=flavour,
+        exposure_time=0.01,
+        readout=True,
+    )
+
+    assert result
+
+    assert metrics.exposures.get(flavour=flavour, outcome="success") == 1
+    assert metrics.readout_seconds.get_count() == 1
+    assert metrics.fetch_seconds.get_count(controller="sp1") == 1
+    assert metrics.write_seconds.get_count(ccd="r1") == 1
+    assert metrics.cotask_seconds.get_count(actor="lvmieb") > 0
+    assert sum(metrics.bytes_written._values.values()) > 0
+
+
+async def test_delegate_metrics_shutter_fails(
+    delegate: LVMExposeDelegate, command, mocker
+):
+    mocker.patch.object(delegate, "move_shutter", return_value=False)
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.1,
+        readout=True,
+    )
+
+    assert not result
+
+    metrics = delegate.metrics
+    assert metrics.exposures.get(flavour="object", outcome="failed") == 1
+    assert metrics.shutter_failures.get(controller="sp1", action="open") == 2
+
+
+async def test_metrics_server(actor: SCPActor):
+    actor.metrics.exposures.inc(flavour="arc", outcome="success")
+
+    server = await MetricsServer(actor.metrics, port=0).start()
+
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await writer.drain()
+
+    response = (await reader.read()).decode()
+    writer.close()
+
+    await server.stop()
+
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert 'lvmscp_exposures_total{flavour="arc",outcome="success"} 1.0' in response
+    assert "lvmscp_resident_memory_bytes" in response
+
+
+def test_metric_abstract():
+    with pytest.raises(TypeError):
+        Metric("lvmscp_test", "A test metric.")  # type: ignore[abstract]
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_reheader.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import warnings
+from copy import deepcopy
+
+from typing import TYPE_CHECKING
+
+import numpy
+import pytest
+import yaml
+from astropy.io import fits
+from click.testing import CliRunner
+from lvmscp.__main__ import lvmscp
+from lvmscp.reheader import read_telemetry, reheader
+from lvmscp.tools import read_manifest
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+MJD = 60500
+
+TELEMETRY_CONFIG = {"telemetry": "{MJD}.telemetry.jsonl"}
+
+REPLIES = [
+    {
+        "source": "sensors",
+        "context": {"spec": "sp1", "lvmieb": "lvmieb"},
+        "message": {"sp1_sensors": {"t3": 12.5, "rh3": 30}},
+    },
+    {
+        "source": "pressure",
+        "context": {"spec": "sp1", "lvmieb": "lvmieb"},
+        "message": {"transducer": {"b1_pressure": 1e-6, "r1_pressure": 2e-6}},
+    },
+]
+
+
+async def test_delegate_telemetry(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    monkeypatch,
+):
+    files_config = delegate.actor.config["files"]
+    monkeypatch.setitem(files_config, "telemetry", "{MJD}.telemetry.jsonl")
+
+    result = await delegate.expose(
+        command,
+        [delegate.actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+        readout=True,
+    )
+    assert result
+
+    filename = delegate.actor.model["filenames"].value[0]
+    mjd_dir = pathlib.Path(filename).parent
+    telemetry_path = mjd_dir / f"{mjd_dir.name}.telemetry.jsonl"
+
+    # One entry per exposure, not per CCD.
+    lines = telemetry_path.read_text().splitlines()
+    assert len(lines) == 1
+
+    entry = json.loads(lines[0])
+    assert entry["spec"] == "sp1"
+    assert entry["flavour"] == "object"
+    assert {reply["source"] for reply in entry["replies"]} >= {"hartmann", "sensors"}
+
+    telemetry = read_telemetry(telemetry_path)
+    assert list(telemetry) == [("sp1", entry["exposure_no"])]
+
+
+@pytest.fixture()
+def night(tmp_path: pathlib.Path):
+    mjd_dir = tmp_path / str(MJD)
+    mjd_dir.mkdir()
+
+    data = numpy.arange(100 * 120, dtype=numpy.uint16).reshape(100, 120)
+
+    header = fits.Header()
+    header["SPEC"] = "sp1"
+    header["EXPOSURE"] = 10
+    header["CCD"] = "b1"
+    header["LABTEMP"] = (None, "Lab temperature [C]")
+    header["LABHUMID"] = (25.0, "Lab relative humidity [%]")
+
+    # Uncompressed.
+    fits.PrimaryHDU(data, header=header).writeto(mjd_dir / "sdR-s-b1-00000010.fits")
+
+    # Gzipped.
+    header["CCD"] = "r1"
+    buffer = fits.HDUList([fits.PrimaryHDU(data, header=header)])
+    with gzip.open(mjd_dir / "sdR-s-r1-00000010.fits.gz", "wb") as fd:
+        buffer.writeto(fd)
+
+    # Rice-compressed, with an exposure with no telemetry.
+    header["CCD"] = "z1"
+    header["EXPOSURE"] = 11
+    fits.HDUList(
+        [
+            fits.PrimaryHDU(),
+            fits.CompImageHDU(data, header=header, compression_type="RICE_1"),
+        ]
+    ).writeto(mjd_dir / "sdR-s-z1-00000011.fits.fz", checksum=True)
+
+    with open(mjd_dir / f"{MJD}.telemetry.jsonl", "w") as fd:
+        entry = {"exposure_no": 10, "spec": "sp1", "flavour": "arc"}
+        fd.write(json.dumps({**entry, "replies": REPLIES[:1]}) + "\n")
+        fd.write(json.dumps({**entry, "replies": REPLIES[1:]}) + "\n")
+        fd.write('{"exposure_no": 11, "spec"')
+
+    yield mjd_dir, data
+
+
+def _get_config(actor: SCPActor, data_dir: pathlib.Path):
+    config = deepcopy(dict(actor.config))
+
+    config["files"] = {
+        **config["files"],
+        "data_dir": str(data_dir),
+        "telemetry": "{MJD}.telemetry.jsonl",
+        "manifest": "{MJD}.manifest.jsonl",
+    }
+    config["checksum"] = {"write": True, "mode": "md5"}
+
+    return config
+
+
+def test_read_telemetry(night):
+    mjd_dir, _ = night
+
+    telemetry = read_telemetry(mjd_dir / f"{MJD}.telemetry.jsonl")
+
+    assert list(telemetry) == [("sp1", 10)]
+    assert [reply.source for reply in telemetry[("sp1", 10)]] == [
+        "sensors",
+        "pressure",
+    ]
+
+
+def test_reheader(actor: SCPActor, night):
+    mjd_dir, data = night
+    config = _get_config(actor, mjd_dir.parent)
+
+    # Stale entry that must be replaced.
+    (mjd_dir / f"{MJD}.md5sum").write_text("abcd  sdR-s-b1-00000010.fits\n")
+
+    results = reheader(config, [MJD], workers=2)
+
+    assert sorted(os.path.basename(result.filename) for result in results) == [
+        "sdR-s-b1-00000010.fits",
+        "sdR-s-r1-00000010.fits.gz",
+    ]
+
+    for result in results:
+        assert result.error is None
+        assert result.updated == ["LABTEMP", "PRESSURE"]
+
+        with fits.open(result.filename) as hdul:
+            assert hdul[0].header["LABTEMP"] == 12.5
+            assert hdul[0].header["LABHUMID"] == 25.0  # Not overwritten.
+            assert numpy.array_equal(hdul[0].data, data)
+
+        with open(result.filename, "rb") as fd:
+            assert result.digest == hashlib.md5(fd.read()).hexdigest()
+
+    assert fits.getheader(mjd_dir / "sdR-s-b1-00000010.fits")["PRESSURE"] == 1e-6
+    assert fits.getheader(mjd_dir / "sdR-s-r1-00000010.fits.gz")["PRESSURE"] == 2e-6
+    assert fits.getheader(mjd_dir / "sdR-s-z1-00000011.fits.fz", 1)["LABTEMP"] is None
+
+    checksums = (mjd_dir / f"{MJD}.md5sum").read_text().splitlines()
+    assert len(checksums) == 2
+    assert "abcd  sdR-s-b1-00000010.fits" not in checksums
+
+    manifest = read_manifest(mjd_dir / f"{MJD}.manifest.jsonl")
+    assert len(manifest) == 2
+    assert manifest[0]["reheader"] == ["LABTEMP", "PRESSURE"]
+
+    # A second run finds nothing to update.
+    results = reheader(config, [MJD], workers=2)
+    assert all(len(result.updated) == 0 for result in results)
+
+
+def test_reheader_fz(actor: SCPActor, night):
+    mjd_dir, data = night
+    config = _get_config(actor, mjd_dir.parent)
+
+    with open(mjd_dir / f"{MJD}.telemetry.jsonl", "a") as fd:
+        fd.write(
+            "\n" + json.dumps({"exposure_no": 11, "spec": "sp1", "replies": REPLIES})
+        )
+
+    results = reheader(config, [MJD], workers=1)
+    assert len(results) == 3
+
+    filename = mjd_dir / "sdR-s-z1-00000011.fits.fz"
+    with fits.open(filename) as hdul:
+        assert hdul[1].header["LABTEMP"] == 12.5
+        assert numpy.array_equal(hdul[1].data, data)
+
+    # The checksums of the compressed HDU are recomputed.
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with fits.open(filename, checksum=True, disable_image_compression=True) as hdul:
+            assert hdul[1].header["CHECKSUM"]
+            assert hdul[1].header["DATASUM"]
+
+
+def test_reheader_dry_run_overwrite(actor: SCPActor, night):
+    mjd_dir, _ = night
+    config = _get_config(actor, mjd_dir.parent)
+
+    filename = mjd_dir / "sdR-s-b1-00000010.fits"
+    mtime = os.path.getmtime(filename)
+
+    results = reheader(config, [MJD], overwrite=True, dry_run=True, workers=1)
+
+    by_name = {os.path.basename(result.filename): result for result in results}
+    assert by_name["sdR-s-b1-00000010.fits"].updated == [
+        "LABHUMID",
+        "LABTEMP",
+        "PRESSURE",
+    ]
+
+    assert os.path.getmtime(filename) == mtime
+    assert fits.getheader(filename)["LABTEMP"] is None
+    assert not (mjd_dir / f"{MJD}.md5sum").exists()
+
+
+def test_reheader_no_telemetry_config(actor: SCPActor, tmp_path: pathlib.Path):
+    config = _get_config(actor, tmp_path)
+    config["files"]["telemetry"] = None
+
+    with pytest.raises(ValueError):
+        reheader(config, [MJD])
+
+
+def test_reheader_cli(actor: SCPActor, night, tmp_path: pathlib.Path):
+    mjd_dir, _ = night
+
+    # The user configuration only overrides some sections of the base one.
+    config_file = tmp_path / "config.yml"
+    config = {
+        "files": {"data_dir": str(mjd_dir.parent), **TELEMETRY_CONFIG},
+        "checksum": {"write": False},
+    }
+    config_file.write_text(yaml.safe_dump(config))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        lvmscp,
+        ["-c", str(config_file), "reheader", str(MJD - 1), "--max-mjd", str(MJD)],
+    )
+
+    assert result.exit_code == 0
+    assert "sdR-s-b1-00000010.fits: LABTEMP, PRESSURE" in result.output
+    assert "2 out of 2 files updated." in result.output
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_reload.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import json
+import pathlib
+
+from typing import TYPE_CHECKING
+
+import pytest
+import yaml
+from astropy.io import fits
+from lvmscp.reload import get_changed_sections, validate_config
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+def write_config(actor: SCPActor, path: pathlib.Path, **changes):
+    """Writes the actor configuration with some sections changed."""
+
+    config = json.loads(json.dumps(actor.config))
+    config.update(changes)
+
+    path.write_text(yaml.safe_dump(config))
+
+    return config
+
+
+def test_validate_config(actor: SCPActor):
+    config = json.loads(json.dumps(actor.config))
+    assert validate_config(config) == []
+
+    config["header"]["BADCMD"] = {"command": "foo"}
+    config["header"]["TOOLONG"] = [1, "comment", 2, 3]
+    config["timeouts"]["readout_max"] = "60"
+    config["lamps"] = "Argon"
+    config["coalescing"]["patterns"] = ["(status"]
+    config["header_sources"]["sensors"]["keys"] = {"LABTEMP": {"transform": "bad"}}
+
+    errors = validate_config(config)
+    assert len(errors) == 6
+
+
+def test_get_changed_sections():
+    config = {"header": {"A": 1}, "controllers": {"sp1": {}}, "timeouts": {"a": 1}}
+    new_config = {"header": {"A": 2}, "controllers": {}, "timeouts": {"a": 1}}
+
+    assert get_changed_sections(config, new_config) == (["header"], ["controllers"])
+
+
+async def test_reload_config(actor: SCPActor, tmp_path: pathlib.Path):
+    path = tmp_path / "lvmscp.yml"
+
+    timeouts = {**actor.config["timeouts"], "readout_max": 120}
+    header = {**actor.config["header"], "OBSERVER": ["Nobody", "The observer"]}
+    write_config(
+        actor,
+        path,
+        timeouts=timeouts,
+        header=header,
+        lamps=["Argon", "Neon"],
+        enabled_controllers=["sp1"],
+    )
+
+    coalescer = actor.coalescer
+
+    reloaded, restart = await actor.reload_config(str(path))
+
+    assert reloaded == ["header", "lamps", "timeouts"]
+    assert restart == ["enabled_controllers"]
+
+    # The controllers share the actor configuration; the delegate has a copy.
+    assert actor.controllers["sp1"].config["timeouts"]["readout_max"] == 120
+    assert actor.exposure_delegate.config["header"]["OBSERVER"][0] == "Nobody"
+    assert actor.config["lamps"] == ["Argon", "Neon"]
+
+    assert actor.config["enabled_controllers"] == ["sp1", "sp2"]
+    assert actor.coalescer is coalescer
+
+    # Nothing changes the second time.
+    assert await actor.reload_config(str(path)) == ([], ["enabled_controllers"])
+
+
+async def test_reload_config_status_delay(
+    actor: SCPActor,
+    tmp_path: pathlib.Path,
+    mocker,
+):
+    path = tmp_path / "lvmscp.yml"
+    write_config(actor, path, status_delay=5.0)
+
+    emit_status = mocker.patch.object(actor, "emit_status")
+
+    actor.start_emit_status()
+    task = actor.emit_status_task
+    emit_status.assert_called_with(30.0)
+
+    reloaded, _ = await actor.reload_config(str(path))
+    assert reloaded == ["status_delay"]
+
+    # The task is restarted with the new delay.
+    assert actor.emit_status_task is not task
+    emit_status.assert_called_with(5.0)
+
+    await asyncio.sleep(0)
+    assert task is not None and task.done()
+
+
+async def test_reload_config_invalid(actor: SCPActor, tmp_path: pathlib.Path):
+    path = tmp_path / "lvmscp.yml"
+    write_config(actor, path, timeouts={"readout_max": -1})
+
+    with pytest.raises(ValueError):
+        await actor.reload_config(str(path))
+
+    assert actor.config["timeouts"]["readout_max"] == 60
+
+
+async def test_reload_config_waits(actor: SCPActor, tmp_path: pathlib.Path):
+    path = tmp_path / "lvmscp.yml"
+    write_config(actor, path, coalescing={"enabled": True})
+
+    coalescer = actor.coalescer
+
+    lock = actor.exposure_delegate.lock
+    await lock.acquire()
+
+    task = asyncio.create_task(actor.reload_config(str(path)))
+    await asyncio.sleep(0.05)
+
+    assert not task.done()
+    assert actor.config["coalescing"]["enabled"] is False
+
+    lock.release()
+    assert await task == (["coalescing"], [])
+
+    assert actor.coalescer is not coalescer
+    assert actor.coalescer.enabled is True
+
+
+async def test_reload_config_header(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    tmp_path: pathlib.Path,
+):
+    actor = delegate.actor
+    path = tmp_path / "lvmscp.yml"
+
+    header = {**actor.config["header"], "OBSERVER": ["Nobody", "The observer"]}
+    write_config(actor, path, header=header)
+
+    await actor.reload_config(str(path))
+
+    result = await delegate.expose(
+        command,
+        [actor.controllers["sp1"]],
+        flavour="bias",
+        exposure_time=0.0,
+        readout=True,
+    )
+    assert result
+
+    filename = actor.model["filenames"].value[0]
+    assert fits.getheader(filename)["OBSERVER"] == "Nobody"
+
+
+async def test_command_reload_config(actor: SCPActor, tmp_path: pathlib.Path):
+    path = tmp_path / "lvmscp.yml"
+    write_config(actor, path, lamps=["Argon"], archon={})
+
+    command = await actor.invoke_mock_command(f"reload-config {path}")
+    await command
+
+    assert command.status.did_succeed
+    assert actor.mock_replies[-1]["config_reload"] == {
+        "reloaded": ["lamps"],
+        "restart_required": ["archon"],
+    }
+
+    write_config(actor, path, timeouts="bad")
+
+    command = await actor.invoke_mock_command(f"reload-config {path}")
+    await command
+
+    assert command.status.did_fail
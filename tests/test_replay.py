@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_replay.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+
+from typing import TYPE_CHECKING
+
+import pytest
+from astropy.io import fits
+from lvmscp.replay import (
+    ReplayStub,
+    TrafficRecorder,
+    measure_dead_time,
+    read_traffic,
+)
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+def _record(target: str, command: str, elapsed: float, replies: list[dict] = []):
+    return {
+        "target": target,
+        "command": command,
+        "start_time": 0.0,
+        "elapsed": elapsed,
+        "status": "DONE",
+        "replies": [{"code": "i", "message": message} for message in replies],
+    }
+
+
+RECORDS = [
+    _record(
+        "lvmieb",
+        "shutter status sp1",
+        0.05,
+        [{"sp1_shutter": {"invalid": False, "open": False}}],
+    ),
+    _record("lvmieb", "shutter open sp1", 0.05),
+    _record("lvmieb", "shutter close sp1", 0.05),
+    _record(
+        "lvmieb",
+        "hartmann status sp1",
+        0.1,
+        [
+            {
+                "sp1_hartmann_left": {"open": True},
+                "sp1_hartmann_right": {"open": False},
+            }
+        ],
+    ),
+    _record("lvmieb", "wago status sp1", 0.05, [{"sp1_sensors": {"t3": 10.0}}]),
+    _record("lvmieb", "wago status sp1", 0.15, [{"sp1_sensors": {"t3": 11.0}}]),
+    _record("lvmnps", "status", 0.4, [{"outlets": [{"name": "Argon", "state": 1}]}]),
+]
+
+
+async def test_record_traffic(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+    tmp_path: pathlib.Path,
+):
+    path = tmp_path / "traffic.jsonl"
+
+    cmd = await actor.invoke_mock_command(f"traffic start {path}")
+    await cmd
+    assert cmd.status.did_succeed
+
+    result = await delegate.expose(
+        command,
+        [actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+        readout=True,
+    )
+    assert result
+
+    cmd = await actor.invoke_mock_command("traffic stop")
+    await cmd
+    assert cmd.status.did_succeed
+    assert actor.traffic_recorder is None
+
+    records = read_traffic(path)
+    assert len(records) == cmd.replies[-1].message["traffic"]["n_records"]
+
+    commands = {(record["target"], record["command"]) for record in records}
+    assert ("lvmieb", "shutter open sp1") in commands
+    assert ("lvmieb", "hartmann status sp1") in commands
+
+    hartmann = [rr for rr in records if rr["command"] == "hartmann status sp1"][0]
+    assert hartmann["status"] == "DONE"
+    assert hartmann["elapsed"] >= 0
+    assert "sp1_hartmann_left" in hartmann["replies"][0]["message"]
+
+
+async def test_traffic_recorder_background(tmp_path: pathlib.Path):
+    path = tmp_path / "traffic.jsonl"
+
+    recorder = TrafficRecorder(path, max_size=2)
+
+    command = Command("status")
+    command.set_status("DONE")
+
+    # Nothing is written until the thread runs; records over max_size are dropped.
+    for _ in range(3):
+        recorder.record("lvmieb", "status", 0.1, command)
+
+    assert not path.exists()
+    assert recorder.n_records == 2
+    assert recorder.dropped == 1
+
+    recorder.start()
+    await asyncio.sleep(0.05)
+    recorder.record("lvmnps", "status", 0.1, command)
+    recorder.stop()
+
+    records = read_traffic(path)
+    assert len(records) == 3
+    assert records[0]["status"] == "DONE"
+    assert records[-1]["target"] == "lvmnps"
+
+
+async def test_replay_dead_time(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+):
+    stub = ReplayStub(RECORDS, seed=1)
+    command.send_command = stub.send_command  # type: ignore
+
+    dead_time = await measure_dead_time(
+        delegate,
+        command,
+        [actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+        count=2,
+    )
+
+    assert dead_time["failed"] == 0
+
+    # The slowest cotask (lvmnps) bounds the dead time from below.
+    assert dead_time["median"] > 0.4
+    assert dead_time["median"] < 3
+
+    assert actor.model
+    header = fits.getheader(actor.model["filenames"].value[0])
+    assert header["HARTMANN"] == "0 1"
+    assert header["LABTEMP"] in [10.0, 11.0]
+
+    # Replaying faster reduces the dead time.
+    stub.speed = 10
+    fast = await measure_dead_time(
+        delegate,
+        command,
+        [actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+    )
+    assert fast["median"] < dead_time["median"]
+
+
+async def test_replay_failures(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    actor: SCPActor,
+):
+    stub = ReplayStub(RECORDS, failure_rate=1.0, seed=1)
+    command.send_command = stub.send_command  # type: ignore
+
+    # The shutter status check fails so the exposure is not taken.
+    dead_time = await measure_dead_time(
+        delegate,
+        command,
+        [actor.controllers["sp1"]],
+        flavour="object",
+        exposure_time=0.01,
+    )
+    assert dead_time["failed"] == 1
+
+    assert all(status == "FAILED" for _, _, status in stub.calls)
+
+
+async def test_replay_timeout():
+    stub = ReplayStub(RECORDS, timeout_rate=1.0, seed=1)
+
+    cmd = await stub.send_command("lvmnps", "status", time_limit=0.01)
+    assert cmd.status.name == "TIMEDOUT"
+
+    # Latencies larger than the time limit also time out.
+    stub = ReplayStub(RECORDS, seed=1)
+    cmd = await stub.send_command("lvmnps", "status", time_limit=0.01)
+    assert cmd.status.did_fail
+
+
+@pytest.mark.parametrize("command_string", ["unknown", "status"])
+async def test_replay_not_recorded(command_string: str):
+    stub = ReplayStub(RECORDS)
+
+    cmd = await stub.send_command("lvmieb", command_string)
+    assert cmd.status.did_fail
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_validation.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import jsonschema
+import pytest
+from lvmscp.validation import ReplyValidator, compile_schema
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+
+
+REPLIES = [
+    {"status": {"controller": "sp1", "status": 1, "status_names": ["IDLE"]}},
+    {"status": {"controller": "sp1", "status": 1.0, "status_names": ("IDLE",)}},
+    {"status": {"controller": "sp1", "status": True, "status_names": []}},
+    {"status": {"controller": "sp1", "status": 1}},
+    {"status": "sp1"},
+    {"frame": {"controller": "sp1", "buffer": 1}},
+    {"frame": {"controller": "sp1", "buffer": "1"}},
+    {"error": "Failed."},
+    {"error": {"controller": "sp1", "error": "Failed."}},
+    {"error": {"controller": "sp1", "other": "Failed."}},
+    {"error": 1},
+    {"text": {"controller": "sp1", "text": "Hi."}},
+    {"text": {"controller": "sp1"}},
+    {"filenames": ["sdR-s-b1-00000001.fits.gz"]},
+    {"next_exposure_no": 10, "text": "Exposing."},
+    {"exposure_progress": {"phase": "reading", "percent": 50.0}},
+]
+
+
+@pytest.mark.parametrize("reply", REPLIES)
+def test_compiled_matches_jsonschema(actor: SCPActor, reply: dict):
+    assert actor.model
+
+    validator = actor.model.VALIDATOR(actor.model.schema)
+    compiled = ReplyValidator(actor.model.schema, actor.model.VALIDATOR)
+
+    assert compiled.is_valid(reply) == validator.is_valid(reply)
+
+
+def test_compile_schema_keywords():
+    schema = {
+        "type": "object",
+        "properties": {
+            "count": {"type": "integer", "minimum": 0},
+            "values": {"type": "array", "items": {"type": ["number", "null"]}},
+            "mode": {"anyOf": [{"type": "string"}, {"type": "boolean"}]},
+        },
+        "patternProperties": {"^x_": {"type": "string"}},
+        "additionalProperties": False,
+        "required": ["count"],
+    }
+
+    check = compile_schema(schema)
+
+    assert check({"count": 1, "values": [1.5, None], "mode": True, "x_a": "b"})
+    assert not check({"count": -1})
+    assert not check({"count": 1, "values": ["a"]})
+    assert not check({"count": 1, "mode": 1})
+    assert not check({"count": 1, "x_a": 1})
+    assert not check({"count": 1, "other": 1})
+    assert not check({"values": []})
+
+
+def test_compile_schema_ref():
+    schema = {
+        "type": "object",
+        "definitions": {"pos": {"type": "number"}},
+        "properties": {
+            "a": {"$ref": "#/definitions/pos"},
+            "b": {"type": "array", "items": {"$ref": "#/definitions/pos"}},
+        },
+    }
+
+    validator = ReplyValidator(schema)
+
+    assert validator.is_valid({"a": 1, "b": [1.5, 2]})
+    assert not validator.is_valid({"a": "x"})
+    assert not validator.is_valid({"b": [1, "x"]})
+
+    with pytest.raises(jsonschema.exceptions.ValidationError):
+        validator.validate({"a": "x"})
+
+
+def test_reply_validator_skip(actor: SCPActor):
+    assert actor.model
+
+    schema = actor.model.schema
+    validator = ReplyValidator(schema, actor.model.VALIDATOR, skip=["status"])
+
+    # Skipped keywords are not checked, but the other keywords are.
+    validator.validate({"status": "not an object"})
+
+    with pytest.raises(jsonschema.exceptions.ValidationError) as err:
+        validator.validate({"status": "not an object", "error": 1})
+
+    assert list(err.value.path) == ["error"]
+
+
+def test_actor_validator(actor: SCPActor):
+    assert actor.model
+    assert isinstance(actor.model.validator, ReplyValidator)
+    assert actor.model.validator.skip == {"exposure_progress"}
+
+    result, err = actor.model.validate({"status": {"controller": 1}})
+
+    assert result is False
+    assert isinstance(err, jsonschema.exceptions.ValidationError)
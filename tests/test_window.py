@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Author: José Sánchez-Gallego (gallegoj@uw.edu)
+# @Date: 2026-10-19
+# @Filename: test_window.py
+# @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from astropy.io import fits
+from lvmscp.window import get_frame_shape, get_readout_fraction, get_window_sections
+
+from clu import Command
+
+
+if TYPE_CHECKING:
+    from lvmscp.actor import SCPActor
+    from lvmscp.delegate import LVMExposeDelegate
+
+
+# Default window from the ACF.
+DEFAULT_WINDOW = {
+    "lines": 2040,
+    "pixels": 2040,
+    "preskiplines": 0,
+    "postskiplines": 0,
+    "preskippixels": 0,
+    "postskippixels": 0,
+    "overscanpixels": 20,
+    "overscanlines": 0,
+    "hbin": 1,
+    "vbin": 1,
+}
+
+
+def test_window_sections_default(test_config: dict):
+    sections = get_window_sections(DEFAULT_WINDOW)
+    assert sections is not None
+
+    # The full-frame sections are the ones in the header configuration.
+    for key, section in sections.items():
+        assert section == test_config["header"][key][0]
+
+
+def test_window_sections_binned():
+    sections = get_window_sections({**DEFAULT_WINDOW, "hbin": 2, "vbin": 2})
+    assert sections is not None
+
+    assert sections["TRIMSEC1"] == "[1:1021, 1021:2040]"
+    assert sections["BIASSEC1"] == "[1022:1030, 1021:2040]"
+    assert sections["BIASSEC2"] == "[1031:1039, 1021:2040]"
+    assert sections["TRIMSEC4"] == "[1040:2060, 1:1020]"
+
+
+def test_frame_shape():
+    assert get_frame_shape(DEFAULT_WINDOW) == (4080, 4120)
+    assert get_frame_shape({**DEFAULT_WINDOW, "hbin": 2, "vbin": 2}) == (2040, 2060)
+    assert get_frame_shape(DEFAULT_WINDOW, taps=1) == (2040, 2060)
+    assert get_frame_shape({}) is None
+
+
+def test_window_sections_unknown():
+    assert get_window_sections({"hbin": 2}) is None
+
+
+@pytest.mark.parametrize(
+    "window,fraction",
+    [
+        ({}, 1.0),
+        ({"lines": 500, "preskiplines": 1540}, 500 / 2040),
+        ({"hbin": 2, "vbin": 2}, 0.25),
+    ],
+)
+def test_readout_fraction(window: dict, fraction: float):
+    assert get_readout_fraction(window, DEFAULT_WINDOW) == pytest.approx(fraction)
+
+
+def test_readout_fraction_no_default():
+    assert get_readout_fraction({"hbin": 2, "vbin": 2}, {}) == 1
+
+
+async def test_expose_window_mode(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    monkeypatch,
+):
+    controller = delegate.actor.controllers["sp1"]
+    monkeypatch.setattr(controller, "default_window", DEFAULT_WINDOW.copy())
+    monkeypatch.setattr(controller, "current_window", DEFAULT_WINDOW.copy())
+
+    result = await delegate.expose(
+        command,
+        [controller],
+        flavour="bias",
+        exposure_time=0,
+        window_mode="binned_2x2",
+    )
+    assert result
+
+    window = controller.set_window.call_args.kwargs  # type: ignore
+    assert window == {**DEFAULT_WINDOW, "hbin": 2, "vbin": 2}
+
+    filename = delegate.actor.model["filenames"].value[0]  # type: ignore
+    header = fits.getheader(filename)
+    assert header["CCDSUM"] == "2 2"
+    assert header["TRIMSEC1"] == "[1:1021, 1021:2040]"
+    assert header["BIASSEC4"] == "[1031:1039, 1:1020]"
+
+    # The following exposure restores the full frame.
+    result = await delegate.expose(command, [controller], flavour="bias")
+    assert result
+
+    assert controller.set_window.call_args.kwargs == DEFAULT_WINDOW  # type: ignore
+
+
+async def test_readout_time_window(
+    delegate: LVMExposeDelegate,
+    command: Command[SCPActor],
+    monkeypatch,
+    mocker,
+):
+    controller = delegate.actor.controllers["sp1"]
+    monkeypatch.setattr(controller, "default_window", DEFAULT_WINDOW.copy())
+
+    readout_times: list[float] = []
+
+    async def readout(*args, **kwargs):
+        readout_times.append(delegate.get_readout_time())
+
+    mocker.patch.object(controller, "readout", side_effect=readout)
+
+    await delegate.expose(
+        command,
+        [controller],
+        flavour="bias",
+        exposure_time=0,
+        window_mode="focus_strip",
+    )
+
+    assert readout_times == [pytest.approx(55 * 500 / 2040, abs=0.1)]